@@ -9,15 +9,15 @@ sys.path.append(parent_dir)
 import cv2
 import numpy as np
 import time
-import config
+from core import config
 import threading
 import customtkinter as ctk
 
 # PIL is required by CustomTkinter to display images
 from PIL import Image, ImageTk 
 
-from utils import FPSCounter
-from modules import CameraProducer, AIConsumer, PrivacyFilter, AlertLogger
+from utils import FPSCounter, RenderTrigger
+from modules import create_producer, AIConsumer, PrivacyFilter, AlertLogger
 
 # CustomTkinter Setup
 ctk.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
@@ -50,8 +50,15 @@ class SurveillanceApp(ctk.CTk):
         self.last_snapshot_time = 0
         self.drag_idx = -1
 
+        # Redraw only when something changed (config.RENDER_ON_CHANGE): the
+        # Tk thread polls the trigger every RENDER_INPUT_INTERVAL seconds
+        if config.DISPLAY_ALIGNMENT == "exact":
+            self.trigger = RenderTrigger(consumer=consumer)
+        else:
+            self.trigger = RenderTrigger(producer=producer)
+
         self.setup_ui()
-        self.update_loop()
+        self.schedule_update()
 
     def setup_ui(self):
         # === GRID LAYOUT ===
@@ -115,9 +122,11 @@ class SurveillanceApp(ctk.CTk):
     # --- INTERACTION HANDLERS ---
     def toggle_zone(self):
         self.show_zone = self.zone_switch.get()
+        self.trigger.notify("input")
 
     def toggle_blur(self):
         self.blur_faces = self.blur_switch.get()
+        self.trigger.notify("input")
 
     def save_zone(self):
         config.save_zone(current_points)
@@ -159,50 +168,53 @@ class SurveillanceApp(ctk.CTk):
             norm_y = max(0, min(480, norm_y))
 
             current_points[self.drag_idx] = [norm_x, norm_y]
-            config.RESTRICTED_ZONE = current_points
+            config.set_restricted_zone(current_points)
+            self.trigger.notify("zone")
 
     def on_release(self, event):
         self.drag_idx = -1
 
     # --- MAIN UPDATE LOOP ---
+    def schedule_update(self):
+        """Tk thread: runs update_loop() if something changed, then schedules the next poll."""
+        try:
+            if not config.RENDER_ON_CHANGE or self.trigger.wait(timeout=0):
+                self.update_loop()
+        finally:
+            # Rescheduled even if update_loop() raised, so the GUI keeps redrawing
+            if config.RENDER_ON_CHANGE:
+                self.after(int(config.RENDER_INPUT_INTERVAL * 1000), self.schedule_update)
+            else:
+                # Schedule next update (30ms approx = 33 FPS)
+                self.after(30, self.schedule_update)
+
     def update_loop(self):
         # 1. Get Data
-        frame = self.producer.get_frame()
-        detections = self.consumer.get_detections()
-
-        if frame is not None:
+        analysed, detections = self.consumer.get_aligned()
+        if config.DISPLAY_ALIGNMENT == "exact" and analysed is not None:
+            ref = analysed
+        else:
+            # Borrow the frame (no copy): cv2.resize below produces our private copy
+            ref = self.producer.borrow_frame()
+
+        if ref is not None:
             # Resize for display (Performance & Fit in UI)
             # We assume the internal drawing coordinates are 640x480
-            resized_frame = cv2.resize(frame, (640, 480))
+            out = cv2.resize(ref.image, (640, 480))
             
             # 2. Logic
             self.fps_counter.update()
-            out = resized_frame.copy()
-
-            visible_ids = set()
-            current_frame_intruders = set()
-            alert_triggered = False
-            intruders_log = []
-
-            for (x1, y1, x2, y2, cf, inside, cx, cy, t_id) in detections:
-                # Scale coords to 640x480 if model output is different
-                # Assuming model imgsz is 512 or 640, let's scale to fit our 640x480 view
-                scale_x = 640 / config.INFER_IMGSZ
-                scale_y = 480 / config.INFER_IMGSZ # Aspect ratio might be slightly off, but fine for demo
-                
-                sx1, sy1 = int(x1 * scale_x), int(y1 * scale_y)
-                sx2, sy2 = int(x2 * scale_x), int(y2 * scale_y)
-                
-                if t_id != -1: visible_ids.add(t_id)
-                
-                if inside:
-                    alert_triggered = True
-                    if t_id != -1: current_frame_intruders.add(t_id)
-                    intruders_log.append((t_id, cf))
-                
-                color = (0, 0, 255) if inside else (0, 255, 0)
-                cv2.rectangle(out, (sx1, sy1), (sx2, sy2), color, 2)
-                cv2.putText(out, f"ID:{t_id}", (sx1, max(20, sy1 - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+            tracked = detections.track_id != -1
+            visible_ids = set(detections.track_id[tracked].tolist())
+            current_frame_intruders = set(detections.track_id[tracked & detections.inside].tolist())
+            alert_triggered = bool(detections.inside.any())
+            intruders_log = list(zip(detections.track_id[detections.inside].tolist(),
+                                     detections.conf[detections.inside].tolist()))
+
+            # Detections are in camera-frame coordinates: map them to the 640x480 view
+            h, w = ref.image.shape[:2]
+            detections.scaled(640 / w, 480 / h).draw(out, font_scale=0.5, centers=False)
 
             # Update Occupancy
             self.active_intruders = self.active_intruders.intersection(visible_ids)
@@ -216,7 +228,11 @@ class SurveillanceApp(ctk.CTk):
                 for (tid, conf) in intruders_log:
                     self.logger.log_event(f"ID:{tid}", conf, "Inside Zone")
                 if time.time() - self.last_snapshot_time > 5.0:
-                    self.logger.save_snapshot(out)
+                    if config.SNAPSHOT_ALIGNMENT == "exact" and analysed is not None and analysed is not ref:
+                        # Full-resolution analysed frame, the one the boxes belong to
+                        self.logger.save_snapshot(detections.draw(analysed.copy()))
+                    else:
+                        self.logger.save_snapshot(out)
                     self.last_snapshot_time = time.time()
             else:
                 self.status_lbl.configure(text="Monitoring...", text_color="green")
@@ -249,12 +265,9 @@ class SurveillanceApp(ctk.CTk):
             self.video_label.configure(image=imgtk)
             self.video_label.image = imgtk # Keep reference
 
-        # Schedule next update (30ms approx = 33 FPS)
-        self.after(30, self.update_loop)
-
 def main():
     # ===================== INIT THREADS =====================
-    producer = CameraProducer()
+    producer = create_producer()  # thread or capture process (config.CAPTURE_IN_PROCESS)
     consumer = AIConsumer(producer)
     producer.start()
     consumer.start()
@@ -263,9 +276,11 @@ def main():
     app = SurveillanceApp(producer, consumer)
     app.mainloop()
 
-    # Cleanup
-    producer.stop()
+    # Cleanup: readers first, so nothing is still blocked on the producer's ring
+    app.trigger.stop()
     consumer.stop()
+    consumer.join(timeout=2.0)
+    producer.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -9,18 +9,19 @@ sys.path.append(parent_dir)
 import cv2
 import numpy as np
 import time
-import config
+from core import config
 import threading
 
-from utils import FPSCounter
-from modules import CameraProducer, AIConsumer, PrivacyFilter, AlertLogger
+from utils import FPSCounter, LatencyTracer, OverlayCompositor, RenderTrigger
+from modules import (create_producer, AIConsumer, PrivacyFilter, AlertLogger, EvidenceStream,
+                     InferencePool, PooledConsumer, PersonDetector)
 
 # Global variables for mouse interaction
 current_points = np.array(config.RESTRICTED_ZONE, dtype=np.int32).tolist()
 drag_idx = -1
 radius = 10
 
-def mouse_callback(event, x, y, flags, param):
+def mouse_callback(event, x, y, flags, trigger):
     global drag_idx, current_points
     if event == cv2.EVENT_LBUTTONDOWN:
         for i, point in enumerate(current_points):
@@ -32,31 +33,94 @@ def mouse_callback(event, x, y, flags, param):
     elif event == cv2.EVENT_MOUSEMOVE:
         if drag_idx != -1:
             current_points[drag_idx] = [x, y]
-            config.RESTRICTED_ZONE = current_points
+            config.set_restricted_zone(current_points)
+            trigger.notify("zone")
     elif event == cv2.EVENT_LBUTTONUP:
         drag_idx = -1
 
+def draw_zones(canvas, zones, points, roi):
+    for zone in zones:
+        # Other named zones (the primary one is drawn editable below)
+        if zone["points"] is not config.RESTRICTED_ZONE:
+            pts = np.array(zone["points"], dtype=np.int32)
+            color = config.ZONE_COLORS[zone["type"]]
+            cv2.polylines(canvas, [pts], True, color, 2)
+            cv2.putText(canvas, zone["name"], tuple(pts[0]), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    pts = np.array(points, dtype=np.int32)
+    cv2.polylines(canvas, [pts], True, (0, 255, 255), 2)
+    for pt in pts:
+        cv2.circle(canvas, tuple(pt), radius, (0, 255, 0), -1)
+    if roi is not None:
+        # Area YOLO actually sees in ROI mode
+        cv2.rectangle(canvas, roi[:2], roi[2:], (255, 255, 0), 1)
+
+def draw_occupancy(canvas, occupancy_count, occupancy):
+    count_color = (0, 165, 255)
+    cv2.rectangle(canvas, (canvas.shape[1] - 200, 20), (canvas.shape[1] - 20, 90), count_color, -1)
+    cv2.putText(canvas, "INSIDE ZONE:", (canvas.shape[1] - 190, 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    cv2.putText(canvas, f"{occupancy_count}", (canvas.shape[1] - 190, 85),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
+    if len(occupancy) > 1:
+        # Per-zone occupancy (restricted + counting zones)
+        for i, (name, n) in enumerate(occupancy.items()):
+            cv2.putText(canvas, f"{name}: {n}", (canvas.shape[1] - 190, 115 + 25 * i),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+def draw_labels(canvas):
+    help_text = "Keys: [s]=Save Zone  [f]=Blur  [z]=Zone  [l]=Latency  [m]=Motion  [q]=Quit"
+    cv2.putText(canvas, help_text, (20, canvas.shape[0] - 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    cv2.putText(canvas, f"Device: {config.DEVICE}", (20, canvas.shape[0] - 55),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.65, (200, 200, 200), 2)
+
+def draw_blur_label(canvas):
+    cv2.putText(canvas, "FACE BLUR: ON", (20, 110),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
 def main():
     # ===================== INIT THREADS =====================
     print("Initializing Threads...")
-    producer = CameraProducer()
-    consumer = AIConsumer(producer)
+    producer = create_producer()  # thread or capture process (config.CAPTURE_IN_PROCESS)
+    tracer = LatencyTracer() if config.LATENCY_TRACING else None
+    if config.INFERENCE_POOL:
+        # Detector worker processes; several frames of the camera in flight
+        pool = InferencePool()
+        consumer = PooledConsumer(producer, pool, detector=PersonDetector(service=pool), tracer=tracer)
+    else:
+        pool = None
+        consumer = AIConsumer(producer, tracer=tracer)
+    # Dual-stream: main stream kept connected but only decoded for snapshots/clips
+    evidence = EvidenceStream() if config.camera_settings()["evidence_url"] else None
     
     # Start the threads
     producer.start()
     consumer.start()
+    if evidence:
+        evidence.start()
 
     # ===================== INIT UTILS =====================
     privacy_filter = PrivacyFilter()
     fps_counter = FPSCounter()
     logger = AlertLogger()
+    # Zones, counters and labels are cached; only redrawn when they change
+    hud = OverlayCompositor()
+    # Wakes the loop below when there is something new to draw: every camera
+    # frame ("latest" alignment) or every result ("exact": the analysed frame)
+    if config.DISPLAY_ALIGNMENT == "exact":
+        trigger = RenderTrigger(consumer=consumer)
+    else:
+        trigger = RenderTrigger(producer=producer)
 
     cv2.namedWindow(config.WINDOW_NAME, cv2.WINDOW_NORMAL)
     cv2.resizeWindow(config.WINDOW_NAME, config.WINDOW_WIDTH, config.WINDOW_HEIGHT)
-    cv2.setMouseCallback(config.WINDOW_NAME, mouse_callback)
+    cv2.setMouseCallback(config.WINDOW_NAME, mouse_callback, trigger)
 
     show_zone = True
     blur_faces = False
+    show_latency = False
+    show_motion = False
+    last_shown_seq = 0
 
     SNAPSHOT_COOLDOWN = 5.0
     last_snapshot_time = 0
@@ -65,45 +129,59 @@ def main():
     print("System Running (Multi-threaded). Press 'q' to quit.")
 
     while True:
+        # 0. INPUT: keys and mouse drags are handled inside waitKey
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord("q"):
+            break
+        elif key == ord("f"):
+            blur_faces = not blur_faces
+        elif key == ord("z"):
+            show_zone = not show_zone
+        elif key == ord("l"):
+            show_latency = not show_latency
+        elif key == ord("m"):
+            show_motion = not show_motion
+        elif key == ord("s"):
+            config.save_zone(current_points)
+        if key != 0xFF:
+            trigger.notify("key")
+
+        # Sleep until something changed (new frame/results, zone edit, key),
+        # waking regularly to keep the window responsive
+        if config.RENDER_ON_CHANGE and not trigger.wait(config.RENDER_INPUT_INTERVAL):
+            continue
+
         # 1. GET DATA (Non-blocking)
-        # Get the latest raw frame from the camera thread
-        frame = producer.get_frame()
-        
-        # Get the latest AI results from the processing thread
-        detections = consumer.get_detections()
-
-        if frame is None:
-            # If camera not ready, wait a bit
-            cv2.waitKey(100)
+        # Get the latest AI results from the processing thread, and the
+        # frame they were computed from (kept with "exact" alignment)
+        analysed, detections = consumer.get_aligned()
+        if config.DISPLAY_ALIGNMENT == "exact" and analysed is not None:
+            ref = analysed
+        else:
+            # Borrow the latest frame; its private copy below is what we draw on.
+            # (Only here: a borrow counts as decode demand, see DECODE_MODE)
+            ref = producer.borrow_frame()
+
+        if ref is None:
+            # Camera not ready: the trigger wakes us on its first frame
+            if not config.RENDER_ON_CHANGE:
+                time.sleep(0.1)
             continue
+        render_start = time.time()
+        out = ref.copy()
 
         # 2. PROCESSING (Main Thread is now only for Drawing!)
         fps_counter.update()
-        out = frame.copy() # Work on a copy for drawing
-
-        # Identify visible IDs
-        visible_ids = set()
-        current_frame_intruders = set()
-        alert_triggered = False
-        intruders_log = []
-
-        for (x1, y1, x2, y2, cf, inside, cx, cy, t_id) in detections:
-            if t_id != -1:
-                visible_ids.add(t_id)
-            
-            if inside:
-                alert_triggered = True
-                if t_id != -1:
-                    current_frame_intruders.add(t_id)
-                intruders_log.append((t_id, cf))
-            
-            color = (0, 0, 255) if inside else (0, 255, 0)
-            cv2.rectangle(out, (x1, y1), (x2, y2), color, 2)
-            cv2.circle(out, (cx, cy), 4, color, -1)
-            
-            label_text = f"ID:{t_id}" if t_id != -1 else "Unknown"
-            cv2.putText(out, label_text, (x1, max(20, y1 - 8)),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+        # Identify visible IDs (masks over the detection arrays)
+        tracked = detections.track_id != -1
+        visible_ids = set(detections.track_id[tracked].tolist())
+        current_frame_intruders = set(detections.track_id[tracked & detections.inside].tolist())
+        alert_triggered = bool(detections.inside.any())
+        intruders_log = list(zip(detections.track_id[detections.inside].tolist(),
+                                 detections.conf[detections.inside].tolist()))
+
+        detections.draw(out)
 
         # Update Occupancy
         active_intruders = active_intruders.intersection(visible_ids)
@@ -121,55 +199,73 @@ def main():
 
             current_time = time.time()
             if current_time - last_snapshot_time > SNAPSHOT_COOLDOWN:
-                logger.save_snapshot(out)
+                # The analysed frame itself, unless it is already on screen
+                snapshot = out
+                if config.SNAPSHOT_ALIGNMENT == "exact" and analysed is not None and analysed is not ref:
+                    snapshot = detections.draw(analysed.copy())
+                if evidence:
+                    # High-res snapshot + clip from the main stream, boxes mapped over
+                    evidence.save_snapshot(logger, detections, out.shape, fallback=snapshot.copy())
+                    evidence.record_clip(logger.new_clip_path())
+                else:
+                    logger.save_snapshot(snapshot)
                 last_snapshot_time = current_time
                 cv2.putText(out, "💾 SAVED SNAPSHOT", (20, 80),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
 
-        # ===================== DRAWING =====================
-        if show_zone:
-            pts = np.array(current_points, dtype=np.int32)
-            cv2.polylines(out, [pts], True, (0, 255, 255), 2)
-            for pt in pts:
-                cv2.circle(out, tuple(pt), radius, (0, 255, 0), -1)
-
-        # Draw Occupancy Counter
-        count_color = (0, 165, 255)
-        cv2.rectangle(out, (out.shape[1] - 200, 20), (out.shape[1] - 20, 90), count_color, -1)
-        cv2.putText(out, "INSIDE ZONE:", (out.shape[1] - 190, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        cv2.putText(out, f"{occupancy_count}", (out.shape[1] - 190, 85),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
-
         if blur_faces:
+            blur_start = time.time()
             privacy_filter.apply_face_blur(out)
-            cv2.putText(out, "FACE BLUR: ON", (20, 110),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            if tracer:
+                tracer.record("blur", time.time() - blur_start)
+
+        # ===================== DRAWING =====================
+        # Static parts: each layer is re-rasterized only when its key changes
+        hud.begin(out.shape)
+        roi = consumer.detector.roi if consumer.detector.camera["roi"] else None
+        zones = consumer.detector.get_zones()
+        hud.layer("zones", (consumer.detector.get_zone_version(), None if roi is None else tuple(roi)),
+                  lambda canvas: draw_zones(canvas, zones, current_points, roi), visible=show_zone)
+        occupancy = consumer.get_occupancy()
+        hud.layer("occupancy", (occupancy_count, tuple(occupancy.items())),
+                  lambda canvas: draw_occupancy(canvas, occupancy_count, occupancy))
+        hud.layer("blur", True, draw_blur_label, visible=blur_faces)
+        hud.layer("labels", config.DEVICE, draw_labels)
+        hud.apply(out)
 
         fps_counter.draw(out)
-        
-        help_text = "Keys: [s]=Save Zone  [f]=Blur  [z]=Zone  [q]=Quit"
-        cv2.putText(out, help_text, (20, out.shape[0] - 20), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        cv2.putText(out, f"Device: {config.DEVICE}", (20, out.shape[0] - 55),
+        ai_text = consumer.detector.scheduler.describe()
+        if consumer.detector.crop_mode:
+            passes = consumer.detector.passes
+            ai_text += f"  [{passes['full']} full / {passes['crops']} crop passes]"
+        cv2.putText(out, ai_text, (20, out.shape[0] - 85),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.65, (200, 200, 200), 2)
 
-        cv2.imshow(config.WINDOW_NAME, out)
+        if tracer and show_latency:
+            tracer.draw(out)
+        if show_motion and consumer.detector.motion is not None:
+            consumer.detector.motion.draw(out)
 
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord("q"):
-            break
-        elif key == ord("f"):
-            blur_faces = not blur_faces
-        elif key == ord("z"):
-            show_zone = not show_zone
-        elif key == ord("s"):
-            config.save_zone(current_points)
+        cv2.imshow(config.WINDOW_NAME, out)
+        if tracer and ref.seq != last_shown_seq:
+            # Once per camera frame: capture -> on screen, and age of the boxes drawn on it
+            shown = time.time()
+            tracer.record("render", shown - render_start)
+            tracer.record("glass_to_glass", shown - ref.timestamp)
+            tracer.record_span("detection_age", consumer.get_trace().get("capture"), shown)
+        last_shown_seq = ref.seq
 
-    # Cleanup
-    producer.stop()
+    # Cleanup: readers first, so nothing is still blocked on the producer's ring
+    trigger.stop()
     consumer.stop()
+    consumer.join(timeout=2.0)
+    if pool:
+        pool.stop()
+    producer.stop()
+    if evidence:
+        evidence.stop()
+    if tracer:
+        tracer.dump(config.LATENCY_REPORT_FILE)
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+# core/multi_main.py
+import sys
+import os
+# Fix for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import math
+import cv2
+import numpy as np
+
+from core import config
+from modules import CameraRegistry
+
+TILE_W, TILE_H = 480, 270
+
+def render_tile(frame, cam_id, status):
+    """Draws detections + zone for one camera and shrinks it to a grid tile."""
+    if frame is None:
+        tile = np.zeros((TILE_H, TILE_W, 3), dtype=np.uint8)
+        cv2.putText(tile, f"{cam_id}: connecting...", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
+        return tile
+
+    out = frame  # registry.get_frame() already hands us a private copy
+    for zone in status["zones"]:
+        pts = np.array(zone["points"], dtype=np.int32)
+        cv2.polylines(out, [pts], True, config.ZONE_COLORS[zone["type"]], 2)
+    status["detections"].draw(out, centers=False, labels=False)
+
+    tile = cv2.resize(out, (TILE_W, TILE_H))
+    label = (f"{cam_id}  cap {status['capture_fps']:.0f}fps  "
+             f"ai {status['inference_fps']:.0f}fps  in zone: {status['inside_zone']}")
+    cv2.putText(tile, label, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+    if len(status["occupancy"]) > 1:
+        per_zone = "  ".join(f"{name}: {n}" for name, n in status["occupancy"].items())
+        cv2.putText(tile, per_zone, (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+    return tile
+
+def main():
+    print("Initializing Camera Registry...")
+    registry = CameraRegistry(config.CAMERAS)
+    registry.start()
+
+    cam_ids = registry.camera_ids()
+    cols = math.ceil(math.sqrt(len(cam_ids)))
+    rows = math.ceil(len(cam_ids) / cols)
+    blank = np.zeros((TILE_H, TILE_W, 3), dtype=np.uint8)
+
+    cv2.namedWindow(config.WINDOW_NAME, cv2.WINDOW_NORMAL)
+    cv2.resizeWindow(config.WINDOW_NAME, config.WINDOW_WIDTH, config.WINDOW_HEIGHT)
+    print(f"Running {len(cam_ids)} camera(s). Press 'q' to quit.")
+
+    while True:
+        tiles = []
+        for cid in cam_ids:
+            status = registry.get_status(cid)
+            # "exact": the frame the detections were computed from
+            seq = status["detections"].seq if config.DISPLAY_ALIGNMENT == "exact" else None
+            tiles.append(render_tile(registry.get_frame(cid, seq), cid, status))
+        tiles += [blank] * (rows * cols - len(tiles))
+        grid = np.vstack([np.hstack(tiles[r * cols:(r + 1) * cols]) for r in range(rows)])
+
+        batch = registry.get_batch_stats()
+        if batch:
+            cv2.putText(grid, (f"batch {batch['avg_batch_size']:.1f}/{batch['max_batch']}  "
+                               f"wait {batch['last_wait_ms']:.0f}ms  infer {batch['last_batch_ms']:.0f}ms"),
+                        (10, grid.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+        pool = registry.get_pool_stats()
+        if pool:
+            loads = " ".join(f"{w['in_flight']}/{w['avg_infer_ms']:.0f}ms" for w in pool["workers"])
+            cv2.putText(grid, f"pool ({pool['dispatch']}) {loads}  reordered {pool['reordered']}",
+                        (10, grid.shape[0] - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+
+        cv2.imshow(config.WINDOW_NAME, grid)
+        if cv2.waitKey(30) & 0xFF == ord("q"):
+            break
+
+    registry.stop()
+    cv2.destroyAllWindows()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# core/quantize.py
+"""
+INT8 post-training quantization of the person detector, calibrated on our
+own footage.
+
+    python core/quantize.py [SOURCE ...] [--backend onnxruntime|openvino]
+                            [--frames 200] [--stride 25] [--method minmax]
+
+SOURCE: video files or image directories (default: clips/ and snapshots/).
+Frames are sampled every --stride frames, calibrated on, and then run
+through both the FP32 and the INT8 model to report accuracy drift and speed.
+The INT8 model is written next to the FP32 export; set DETECTOR_INT8 = True
+(same DETECTOR_BACKEND and INFER_IMGSZ) to use it.
+"""
+import sys
+import os
+# Fix for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import argparse
+import json
+import re
+import time
+import numpy as np
+
+from core import config
+from modules.inference_backends import exported_path, export_model, letterbox, load_engine, preprocess
+from modules.tracker import iou_matrix
+from utils import ReplayReader
+from rtsp_common.replay_reader import IMAGE_EXTS
+
+VIDEO_EXTS = (".mp4", ".mkv", ".avi", ".mov")
+DEFAULT_SOURCES = [os.path.join(config.BASE_DIR, "clips"), os.path.join(config.BASE_DIR, "snapshots")]
+
+def expand_sources(paths):
+    """Video files and image directories (videos inside a directory count separately)."""
+    sources = []
+    for path in paths:
+        if not os.path.isdir(path):
+            if os.path.exists(path):
+                sources.append(path)
+            continue
+        names = sorted(os.listdir(path))
+        sources += [os.path.join(path, f) for f in names if f.lower().endswith(VIDEO_EXTS)]
+        if any(f.lower().endswith(IMAGE_EXTS) for f in names):
+            sources.append(path)
+    return sources
+
+def sample_frames(sources, count, stride, imgsz):
+    """
+    Takes every `stride`-th frame, spread evenly over the sources, up to
+    `count` in total. Frames are kept letterboxed to imgsz (uint8), which is
+    what the model sees and keeps memory small.
+    """
+    frames = []
+    per_source = -(-count // len(sources))
+    for source in sources:
+        reader = ReplayReader(source, loop=False)
+        taken = 0
+        while taken < per_source and len(frames) < count and reader.grab():
+            if reader.index % stride:
+                continue
+            ok, frame = reader.retrieve()
+            if ok:
+                frames.append(letterbox(frame, imgsz)[0])
+                taken += 1
+        reader.release()
+        print(f"  {source}: {taken} frames")
+    return frames
+
+def head_index(names):
+    """Index of the Detect head, i.e. the last `model.N` in the node names."""
+    found = [int(m) for name in names for m in re.findall(r"model\.(\d+)", name)]
+    return max(found) if found else None
+
+def quantize_onnx(fp32_path, int8_path, frames, imgsz, method):
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod,
+                                          QuantFormat, QuantType, quantize_static)
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.rewind()
+
+        def get_next(self):
+            frame = next(self.frames, None)
+            return None if frame is None else {self.input_name: preprocess(frame, imgsz)[0]}
+
+        def rewind(self):
+            self.frames = iter(frames)
+
+    model = onnx.load(fp32_path)
+    # The box decoding in the head (DFL, anchors, strides) loses too much in
+    # INT8; keep everything there but the convolutions in float
+    head = head_index(n.name for n in model.graph.node)
+    exclude = [n.name for n in model.graph.node
+               if head is not None and f"/model.{head}/" in n.name and n.op_type != "Conv"]
+    methods = {"minmax": CalibrationMethod.MinMax, "entropy": CalibrationMethod.Entropy,
+               "percentile": CalibrationMethod.Percentile}
+    quantize_static(
+        fp32_path, int8_path, FrameReader(model.graph.input[0].name),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=methods[method],
+        nodes_to_exclude=exclude,
+    )
+
+def quantize_openvino(fp32_path, int8_path, frames, imgsz, method):
+    import nncf
+    import openvino as ov
+
+    core = ov.Core()
+    xml = next(os.path.join(fp32_path, f) for f in os.listdir(fp32_path) if f.endswith(".xml"))
+    model = core.read_model(xml)
+    head = head_index(op.get_friendly_name() for op in model.get_ops())
+    # Same idea as for ONNX: keep the box decoding in the head in float
+    ignored = nncf.IgnoredScope(
+        patterns=[rf".*model\.{head}/.*/(Add|Subtract|Multiply|Divide)", r".*\.dfl.*"],
+        types=["Sigmoid"], validate=False)
+    if method != "minmax":
+        print(f"⚠️ --method {method} is ONNX Runtime only; NNCF uses its own range estimation")
+    quantized = nncf.quantize(
+        model, nncf.Dataset(frames, lambda frame: preprocess(frame, imgsz)[0]),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(frames),
+        ignored_scope=ignored,
+    )
+    os.makedirs(int8_path, exist_ok=True)
+    ov.save_model(quantized, os.path.join(int8_path, os.path.basename(xml)))
+
+def run_model(engine, frames, conf):
+    """Person detections and per-frame detect() time (pre/postprocess included)."""
+    for frame in frames[:5]:
+        engine.detect(frame, conf)  # warm-up
+    dets, times = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        d = engine.detect(frame, conf)
+        times.append(time.perf_counter() - start)
+        dets.append(d[d[:, 5] == 0])  # 0 is 'person'
+    return dets, np.array(times)
+
+def compare(ref_dets, test_dets, iou_threshold=0.5):
+    """
+    Agreement of the INT8 detections with the FP32 ones, frame by frame
+    (greedy IoU matching). FP32 is the reference: recall = FP32 persons the
+    INT8 model still finds, precision = INT8 persons FP32 also found.
+    """
+    tp = fp = fn = 0
+    ious, conf_drift = [], []
+    for ref, test in zip(ref_dets, test_dets):
+        iou = iou_matrix(ref[:, :4], test[:, :4])
+        used_ref, used_test = set(), set()
+        if iou.size:
+            for flat in np.argsort(-iou, axis=None):
+                r, t = np.unravel_index(flat, iou.shape)
+                if iou[r, t] < iou_threshold:
+                    break
+                if r in used_ref or t in used_test:
+                    continue
+                used_ref.add(r)
+                used_test.add(t)
+                ious.append(iou[r, t])
+                conf_drift.append(abs(ref[r, 4] - test[t, 4]))
+        tp += len(used_ref)
+        fn += len(ref) - len(used_ref)
+        fp += len(test) - len(used_test)
+    return {
+        "recall": tp / (tp + fn) if tp + fn else 1.0,
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "mean_iou": float(np.mean(ious)) if ious else 0.0,
+        "mean_conf_drift": float(np.mean(conf_drift)) if conf_drift else 0.0,
+        "fp32_persons": tp + fn,
+        "int8_persons": tp + fp,
+    }
+
+def timing(times, path):
+    size = (sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            if os.path.isdir(path) else os.path.getsize(path))
+    return {
+        "mean_ms": float(times.mean() * 1000.0),
+        "p50_ms": float(np.percentile(times, 50) * 1000.0),
+        "p95_ms": float(np.percentile(times, 95) * 1000.0),
+        "fps": float(1.0 / times.mean()),
+        "size_mb": size / 1e6,
+    }
+
+def print_report(report):
+    fp32, int8, drift = report["fp32"], report["int8"], report["drift"]
+    print(f"\n=== INT8 vs FP32 ({report['backend']}, imgsz {report['imgsz']}, "
+          f"{report['frames']} frames, {report['threads']} threads) ===")
+    print(f"{'':16}{'FP32':>10}{'INT8':>10}")
+    for key, label in (("mean_ms", "latency mean"), ("p50_ms", "latency p50"),
+                       ("p95_ms", "latency p95"), ("fps", "throughput fps"), ("size_mb", "model MB")):
+        print(f"{label:16}{fp32[key]:>10.1f}{int8[key]:>10.1f}")
+    print(f"{'persons found':16}{drift['fp32_persons']:>10}{drift['int8_persons']:>10}")
+    print(f"Speed-up: x{fp32['mean_ms'] / int8['mean_ms']:.2f}")
+    print(f"Drift vs FP32 (IoU >= 0.5): recall {drift['recall']:.3f}  precision {drift['precision']:.3f}  "
+          f"mean IoU {drift['mean_iou']:.3f}  mean |conf diff| {drift['mean_conf_drift']:.3f}")
+    if drift["recall"] < 0.95:
+        print("⚠️ INT8 misses more than 5% of the FP32 persons: try --method percentile/entropy "
+              "or more varied calibration footage")
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 calibration of the person detector")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES,
+                        help="video files / image directories (default: clips/ and snapshots/)")
+    parser.add_argument("--backend", choices=("onnxruntime", "openvino"),
+                        default="openvino" if config.DETECTOR_BACKEND == "openvino" else "onnxruntime")
+    parser.add_argument("--imgsz", type=int, default=config.INFER_IMGSZ)
+    parser.add_argument("--frames", type=int, default=200, help="calibration / evaluation frames")
+    parser.add_argument("--stride", type=int, default=25, help="take every Nth frame")
+    parser.add_argument("--method", choices=("minmax", "entropy", "percentile"), default="minmax",
+                        help="activation range calibration (ONNX Runtime)")
+    parser.add_argument("--conf", type=float, default=config.CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    sources = expand_sources(args.sources)
+    if not sources:
+        print("❌ No footage found. Pass video files or image directories.")
+        return
+    print(f"Sampling up to {args.frames} frames (every {args.stride}th)...")
+    frames = sample_frames(sources, args.frames, args.stride, args.imgsz)
+    if not frames:
+        print("❌ No frames could be read from the sources.")
+        return
+
+    model_path = config.PERSON_MODEL_PATH
+    fp32_path = export_model(model_path, args.backend, args.imgsz)
+    int8_path = exported_path(model_path, args.backend, args.imgsz, int8=True)
+    print(f"Calibrating INT8 model on {len(frames)} frames...")
+    quantize = quantize_onnx if args.backend == "onnxruntime" else quantize_openvino
+    quantize(fp32_path, int8_path, frames, args.imgsz, args.method)
+    print(f"✅ INT8 model saved at {int8_path}")
+
+    fp32_engine = load_engine(args.backend, fp32_path, args.imgsz)
+    int8_engine = load_engine(args.backend, int8_path, args.imgsz)
+    fp32_dets, fp32_times = run_model(fp32_engine, frames, args.conf)
+    int8_dets, int8_times = run_model(int8_engine, frames, args.conf)
+
+    report = {
+        "backend": args.backend,
+        "imgsz": args.imgsz,
+        "frames": len(frames),
+        "threads": fp32_engine.threads,
+        "method": args.method,
+        "conf": args.conf,
+        "sources": sources,
+        "fp32_model": fp32_path,
+        "int8_model": int8_path,
+        "fp32": timing(fp32_times, fp32_path),
+        "int8": timing(int8_times, int8_path),
+        "drift": compare(fp32_dets, int8_dets),
+    }
+    print_report(report)
+
+    report_file = os.path.join(config.BASE_DIR, "logs", f"quantization_{args.backend}_{args.imgsz}.json")
+    os.makedirs(os.path.dirname(report_file), exist_ok=True)
+    with open(report_file, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {report_file}")
+    print("Set DETECTOR_INT8 = True in core/config.py to run the detector on it.")
+
+if __name__ == "__main__":
+    main()
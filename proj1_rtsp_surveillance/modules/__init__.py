@@ -1,7 +1,14 @@
 # modules/__init__.py
 from .streamer import RTSPStreamer  # Kept for legacy, but not used in threaded mode
+from .detector_service import DetectorService
+from .detections import Detections
 from .detector import PersonDetector
 from .privacy import PrivacyFilter
 from .logger import AlertLogger
 from .producer import CameraProducer  # NEW
-from .consumer import AIConsumer      # NEW
\ No newline at end of file
+from .consumer import AIConsumer      # NEW
+from .replay import ReplayProducer
+from .capture_process import ProcessCameraProducer, create_producer
+from .inference_pool import InferencePool, PooledConsumer
+from .evidence import EvidenceStream
+from .camera_registry import CameraRegistry
\ No newline at end of file
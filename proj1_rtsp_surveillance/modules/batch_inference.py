@@ -0,0 +1,199 @@
+# modules/batch_inference.py
+import threading
+import time
+from core import config
+from modules.consumer import AIConsumer
+from utils import FPSCounter
+
+class BatchInferenceWorker(threading.Thread):
+    """
+    One inference thread for many cameras.
+
+    Each cycle it collects the newest unprocessed frame of every camera
+    whose detector wants one (scheduler / motion gate), waiting at most
+    max_wait after the first frame arrives or until max_batch frames are
+    ready, then runs them through DetectorService.track_batch() in one
+    forward pass. Results go back to each camera's own tracker and
+    BatchedConsumer. The scan starts at a different camera every cycle so
+    a full batch never starves the cameras at the end of the list.
+
+    A watcher thread per camera blocks on its ring until a frame arrives
+    (without reading it) and wakes the worker, so an idle worker sleeps.
+    get_stats()["cameras"] counts, per camera, the frames inferred and the
+    cycles it had a frame ready but was left out of a full batch.
+    """
+    def __init__(self, service, max_batch=None, max_wait=None):
+        super().__init__()
+        self.daemon = True
+        self.service = service
+        self.max_batch = max_batch or config.BATCH_MAX_SIZE
+        self.max_wait = config.BATCH_MAX_WAIT if max_wait is None else max_wait
+        self.consumers = {}  # cam_id -> BatchedConsumer
+        self.lock = threading.Lock()
+        self.cond = threading.Condition()
+        self.arrived = set()  # cam_ids with a frame not looked at yet
+        self.next_start = 0
+        self.is_running = True
+
+        # Telemetry
+        self.fps_counter = FPSCounter()  # batches per second
+        self.batches = 0
+        self.frames = 0
+        self.last_batch_size = 0
+        self.last_wait = 0.0             # collection time of the last batch
+        self.last_batch_time = 0.0       # forward pass + tracking time
+        self.inferred = {}               # cam_id -> frames run through YOLO
+        self.deferred = {}               # cam_id -> cycles left out of a full batch
+
+    def add(self, consumer):
+        with self.lock:
+            self.consumers[consumer.detector.camera_id] = consumer
+        threading.Thread(target=self._watch_frames, args=(consumer,),
+                         name=f"batch-watch-{consumer.detector.camera_id}", daemon=True).start()
+
+    def _watch_frames(self, consumer):
+        cam_id = consumer.detector.camera_id
+        seq = 0
+        while self.is_running and self.consumers.get(cam_id) is consumer:
+            # Timeout keeps stop()/remove() responsive
+            new_seq = consumer.producer.wait_frame_seq(seq, timeout=0.5)
+            if new_seq is not None:
+                seq = new_seq
+                with self.cond:
+                    self.arrived.add(cam_id)
+                    self.cond.notify_all()
+
+    def remove(self, consumer):
+        with self.lock:
+            self.consumers.pop(consumer.detector.camera_id, None)
+
+    def _scan_order(self):
+        with self.lock:
+            consumers = list(self.consumers.values())
+        if not consumers:
+            return consumers
+        start = self.next_start % len(consumers)
+        self.next_start += 1
+        return consumers[start:] + consumers[:start]
+
+    def _collect(self):
+        """Returns [(consumer, ref)] for this cycle (may be empty)."""
+        batch = {}
+        held = set()  # arrivals that could not join this batch, kept for the next
+        first_time = None
+        while self.is_running:
+            # Sleep until a camera has a new frame (or the batch's max_wait runs out)
+            timeout = 0.5 if first_time is None else max(0.0, self.max_wait - (time.time() - first_time))
+            with self.cond:
+                self.cond.wait_for(lambda: self.arrived, timeout)
+                arrived, self.arrived = self.arrived, set()
+
+            consumers = self._scan_order()
+            for consumer in consumers:
+                cam_id = consumer.detector.camera_id
+                if cam_id not in arrived:
+                    continue
+                if cam_id in batch or len(batch) >= self.max_batch:
+                    held.add(cam_id)
+                    continue
+                ref = consumer.producer.borrow_frame()
+                if ref is None or ref.seq <= consumer.last_seq:
+                    continue
+                consumer.keep_frame(ref)
+                if consumer.detector.should_infer(ref.image, ref.seq):
+                    batch[cam_id] = (consumer, ref)
+                    if first_time is None:
+                        first_time = time.time()
+                else:
+                    # Not scheduled: previous detections, moved to this frame
+                    consumer.publish(ref, consumer.detector.predict(ref.seq, ref.timestamp))
+
+            if batch and (len(batch) >= min(self.max_batch, len(consumers))
+                          or time.time() - first_time >= self.max_wait):
+                self.last_wait = time.time() - first_time
+                for cam_id in held - batch.keys():
+                    self.deferred[cam_id] = self.deferred.get(cam_id, 0) + 1
+                if held:
+                    with self.cond:
+                        self.arrived |= held
+                for cam_id in batch:
+                    self.inferred[cam_id] = self.inferred.get(cam_id, 0) + 1
+                return list(batch.values())
+        return []
+
+    def run(self):
+        while self.is_running:
+            batch = self._collect()
+            if not batch:
+                continue
+            # One forward pass per (imgsz, conf) group; normally all cameras share it
+            groups = {}
+            for consumer, ref in batch:
+                key = (consumer.detector.camera["imgsz"], consumer.detector.camera["conf"])
+                groups.setdefault(key, []).append((consumer, ref))
+            for (imgsz, conf), items in groups.items():
+                self._infer(items, imgsz, conf)
+
+    def _infer(self, items, imgsz, conf):
+        # Crop-mode cameras batch their own crops (detect_batch) and track
+        # with their predictor, so they stay out of the shared forward pass
+        for consumer, ref in [item for item in items if item[0].detector.crop_mode]:
+            consumer.detector.run_crop_mode(ref.image, ref.seq, ref.timestamp)
+            consumer.publish(ref, consumer.detector.last_person_dets)
+        items = [item for item in items if not item[0].detector.crop_mode]
+        if not items:
+            return
+        infer_start = time.time()
+        requests, offsets = [], []
+        for consumer, ref in items:
+            consumer.detector.scheduler.on_run_start(infer_start)
+            source, offset = consumer.detector.prepare_input(ref.image)
+            requests.append((consumer.detector.camera_id, source))
+            offsets.append(offset)
+
+        results = self.service.track_batch(requests, imgsz, conf)
+        infer_end = time.time()
+
+        for (consumer, ref), r, offset in zip(items, results, offsets):
+            consumer.detector.finish_inference(r, offset, infer_start, infer_end, ref.seq, ref.timestamp)
+            consumer.publish(ref, consumer.detector.last_person_dets)
+
+        self.batches += 1
+        self.frames += len(items)
+        self.last_batch_size = len(items)
+        self.last_batch_time = infer_end - infer_start
+        self.fps_counter.update()
+
+    def get_stats(self):
+        return {
+            "batches_per_sec": self.fps_counter.fps,
+            "last_batch_size": self.last_batch_size,
+            "avg_batch_size": self.frames / self.batches if self.batches else 0.0,
+            "last_wait_ms": self.last_wait * 1000.0,
+            "last_batch_ms": self.last_batch_time * 1000.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "cameras": {cam_id: {"inferred": self.inferred.get(cam_id, 0),
+                                 "deferred": self.deferred.get(cam_id, 0)}
+                        for cam_id in list(self.consumers)},
+        }
+
+    def stop(self):
+        self.is_running = False
+
+class BatchedConsumer(AIConsumer):
+    """
+    AIConsumer for a camera served by a BatchInferenceWorker: same results
+    interface (get_detections, get_trace, fps_counter), but no thread of its
+    own. start()/stop() register it with the worker.
+    """
+    def __init__(self, producer, worker, detector=None, tracer=None):
+        super().__init__(producer, detector=detector, tracer=tracer)
+        self.worker = worker
+
+    def start(self):
+        self.worker.add(self)
+
+    def stop(self):
+        self.is_running = False
+        self.worker.remove(self)
@@ -0,0 +1,166 @@
+# modules/camera_registry.py
+from core import config
+from modules.detector_service import DetectorService
+from modules.detector import PersonDetector
+from modules.capture_process import create_producer
+from modules.consumer import AIConsumer
+from modules.batch_inference import BatchInferenceWorker, BatchedConsumer
+from modules.inference_pool import InferencePool, PooledConsumer
+from modules.evidence import EvidenceStream
+
+class CameraRegistry:
+    """
+    Runs many cameras in one process.
+    Every camera gets its own capture thread and inference thread, but all
+    of them share a single DetectorService (one YOLO model in memory).
+    With BATCH_INFERENCE, one BatchInferenceWorker runs the frames of all
+    cameras through the model together instead. With INFERENCE_POOL the
+    "service" is an InferencePool and each camera gets a PooledConsumer,
+    so cameras (and frames of one camera) are detected in parallel worker
+    processes.
+    """
+    def __init__(self, cameras=None, service=None, batch=None):
+        self.service = service or (InferencePool() if config.INFERENCE_POOL else DetectorService())
+        batch = config.BATCH_INFERENCE if batch is None else batch
+        self.batcher = BatchInferenceWorker(self.service) if batch else None
+        self.producers = {}
+        self.consumers = {}
+        self.evidence = {}  # cam_id -> EvidenceStream (dual-stream cameras only)
+        self.started = False
+
+        for camera in (config.CAMERAS if cameras is None else cameras):
+            self.add_camera(camera)
+
+    def add_camera(self, camera):
+        settings = config.camera_settings(camera)
+        cam_id = settings["id"]
+        if cam_id in self.producers:
+            raise ValueError(f"Duplicate camera id: {cam_id}")
+
+        producer = create_producer(settings)
+        detector = PersonDetector(service=self.service, camera=settings)
+        if self.batcher is not None:
+            consumer = BatchedConsumer(producer, self.batcher, detector=detector)
+        elif isinstance(self.service, InferencePool):
+            # Keeps several frames of this camera in flight across the workers
+            consumer = PooledConsumer(producer, self.service, detector=detector)
+        else:
+            consumer = AIConsumer(producer, detector=detector)
+        self.producers[cam_id] = producer
+        self.consumers[cam_id] = consumer
+        if settings["evidence_url"]:
+            self.evidence[cam_id] = EvidenceStream(settings)
+
+        if self.started:
+            self._start_camera(cam_id)
+        return cam_id
+
+    def _start_camera(self, cam_id):
+        self.producers[cam_id].start()
+        self.consumers[cam_id].start()
+        if cam_id in self.evidence:
+            self.evidence[cam_id].start()
+
+    def _stop_camera(self, cam_id):
+        # Consumer first: it may be blocked on the producer's (shared) ring
+        consumer = self.consumers[cam_id]
+        consumer.stop()
+        if consumer.is_alive():  # BatchedConsumers have no thread of their own
+            consumer.join(timeout=2.0)
+        self.producers[cam_id].stop()
+        if cam_id in self.evidence:
+            self.evidence[cam_id].stop()
+
+    def remove_camera(self, cam_id):
+        self._stop_camera(cam_id)
+        del self.consumers[cam_id], self.producers[cam_id]
+        self.evidence.pop(cam_id, None)
+        self.service.forget(cam_id)
+
+    def start(self):
+        for cam_id in self.producers:
+            self._start_camera(cam_id)
+        if self.batcher is not None:
+            self.batcher.start()
+        self.started = True
+
+    def stop(self):
+        if self.batcher is not None:
+            self.batcher.stop()
+        for cam_id in list(self.producers):
+            self._stop_camera(cam_id)
+        if isinstance(self.service, InferencePool):
+            self.service.stop()
+        self.started = False
+
+    # ===================== QUERY API =====================
+    def camera_ids(self):
+        return list(self.producers)
+
+    def get_frame(self, cam_id, seq=None):
+        """
+        Private copy of the camera's latest frame, or of analysed frame `seq`
+        (e.g. get_detections().seq) while the consumer still keeps it
+        (DISPLAY_ALIGNMENT / SNAPSHOT_ALIGNMENT "exact").
+        """
+        if seq is not None:
+            analysed = self.consumers[cam_id].get_frame(seq)
+            if analysed is not None:
+                return analysed.copy()
+        return self.producers[cam_id].get_frame()
+
+    def get_detections(self, cam_id):
+        return self.consumers[cam_id].get_detections()
+
+    def get_evidence(self, cam_id):
+        """EvidenceStream of a dual-stream camera, or None."""
+        return self.evidence.get(cam_id)
+
+    def get_zone(self, cam_id):
+        return self.consumers[cam_id].detector.get_zone()
+
+    def set_zone(self, cam_id, zone_points):
+        self.consumers[cam_id].detector.set_zone(zone_points)
+
+    def get_zones(self, cam_id):
+        """All named zones of a camera: [{"name", "type", "points"}]."""
+        return self.consumers[cam_id].detector.get_zones()
+
+    def set_zones(self, cam_id, zones):
+        self.consumers[cam_id].detector.set_zones(zones)
+
+    def get_status(self, cam_id):
+        """Per-camera telemetry snapshot."""
+        detections = self.get_detections(cam_id)
+        return {
+            **self.producers[cam_id].get_stats(),
+            "inference_fps": self.consumers[cam_id].fps_counter.fps,
+            "people": len(detections),
+            "inside_zone": int(detections.inside.sum()),
+            "occupancy": self.consumers[cam_id].get_occupancy(),
+            "detections": detections,
+            "zone": self.get_zone(cam_id),
+            "zones": self.get_zones(cam_id),
+            "scheduler": self.consumers[cam_id].detector.scheduler.telemetry(),
+            "motion": self._motion_stats(cam_id),
+            "crop_passes": self._crop_stats(cam_id),
+        }
+
+    def _motion_stats(self, cam_id):
+        gate = self.consumers[cam_id].detector.motion
+        return None if gate is None else gate.stats()
+
+    def _crop_stats(self, cam_id):
+        detector = self.consumers[cam_id].detector
+        return dict(detector.passes) if detector.crop_mode else None
+
+    def get_batch_stats(self):
+        """Batch size / wait telemetry, or None without batched inference."""
+        return None if self.batcher is None else self.batcher.get_stats()
+
+    def get_pool_stats(self):
+        """Per-worker telemetry of the InferencePool, or None without one."""
+        return self.service.get_stats() if isinstance(self.service, InferencePool) else None
+
+    def get_all_status(self):
+        return {cam_id: self.get_status(cam_id) for cam_id in self.producers}
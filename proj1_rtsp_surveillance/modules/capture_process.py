@@ -0,0 +1,104 @@
+# modules/capture_process.py
+import multiprocessing as mp
+from core import config
+from utils import SharedFrameRing, FPSCounter
+from modules.producer import CameraProducer
+from modules.replay import ReplayProducer
+
+def _capture_main(camera, ring_args, stop_event):
+    """Entry point of the capture process: runs a normal CameraProducer on a shared ring."""
+    ring = SharedFrameRing(*ring_args)
+    producer = CameraProducer(camera, ring=ring)
+    producer.start()
+    try:
+        # Publish counters for the parent while we wait to be stopped
+        while not stop_event.wait(0.5):
+            ring.publish_stats(producer.get_stats())
+            if not producer.is_alive():
+                break  # capture gave up (e.g. frames too big for the ring), reason already printed
+    finally:
+        producer.stop()
+        producer.join(timeout=2.0)
+        ring.close()
+
+class ProcessCameraProducer:
+    """
+    Drop-in replacement for CameraProducer that captures and decodes in a
+    separate process. Frames arrive through a SharedFrameRing, so
+    get_frame() / borrow_frame() / get_next_frame() never pickle pixels and
+    decoding never competes with inference for the GIL.
+    """
+    def __init__(self, camera=None):
+        self.camera = config.camera_settings(camera)
+        self.camera_id = self.camera["id"]
+
+        ctx = mp.get_context(config.CAPTURE_PROCESS_START_METHOD)
+        self.ring = SharedFrameRing(ctx.Condition(),
+                                    num_slots=config.FRAME_RING_SLOTS,
+                                    max_frame_bytes=self._slot_bytes(self.camera))
+        self.stop_event = ctx.Event()
+        self.process = ctx.Process(target=_capture_main,
+                                   args=(self.camera, self.ring.attach_args(), self.stop_event),
+                                   name=f"capture-{self.camera_id}", daemon=True)
+        # Decode rate is measured on the reader side (one update per new seq)
+        self.fps_counter = FPSCounter()
+        self.last_seen_seq = 0
+
+    @staticmethod
+    def _slot_bytes(camera):
+        """max_frame_bytes, grown to the configured output size when the ffmpeg backend scales."""
+        size = camera["max_frame_bytes"]
+        if camera["backend"] == "ffmpeg" and camera["width"] and camera["height"]:
+            size = max(size, camera["width"] * camera["height"] * 3)
+        return size
+
+    def start(self):
+        self.process.start()
+
+    def _track(self, ref):
+        if ref is not None and ref.seq != self.last_seen_seq:
+            self.last_seen_seq = ref.seq
+            self.fps_counter.update()
+        return ref
+
+    def borrow_frame(self):
+        return self._track(self.ring.borrow())
+
+    def get_next_frame(self, after_seq=0, timeout=None):
+        return self._track(self.ring.wait_next(after_seq, timeout))
+
+    def wait_frame_seq(self, after_seq=0, timeout=None):
+        return self.ring.wait_seq(after_seq, timeout)
+
+    def is_frame_valid(self, seq):
+        return self.ring.is_valid(seq)
+
+    def get_frame(self):
+        """Returns a private, writable copy of the latest frame (for drawing)."""
+        ref = self.borrow_frame()
+        return None if ref is None else ref.copy()
+
+    def get_stats(self):
+        return {"capture_fps": self.fps_counter.fps, **self.ring.stats(),
+                "capture_alive": self.process.is_alive()}
+
+    def stop(self):
+        self.stop_event.set()
+        if self.process.is_alive():
+            self.process.join(timeout=3.0)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.ring.close()
+
+def create_producer(camera=None):
+    """
+    Builds the capture side for a camera: recording playback, in-process
+    thread or separate capture process.
+    """
+    settings = config.camera_settings(camera)
+    if settings["replay"]:
+        # Playback paces itself against the ring; it always runs in-process
+        return ReplayProducer(settings)
+    if settings["capture_process"]:
+        return ProcessCameraProducer(settings)
+    return CameraProducer(settings)
@@ -0,0 +1,165 @@
+# modules/connector.py
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import cv2
+from core import config
+from utils import open_capture
+
+def _release_when_done(future):
+    """Releases a capture that finished opening after we stopped waiting for it."""
+    def release(f):
+        cap = f.result()
+        if cap is not None:
+            cap.release()
+    future.add_done_callback(release)
+
+class SourceConnector:
+    """
+    Opens a camera's primary source (RTSP) or its fallback (webcam).
+
+    - Primary and fallback are probed in parallel, each bounded by
+      CONNECT_TIMEOUT; the primary wins whenever it opens in time.
+    - Failed rounds back off exponentially (with jitter) up to
+      RECONNECT_MAX_DELAY. The backoff is only reset once the capture
+      thread reports a frame (mark_streaming), so a source that opens but
+      never delivers frames is retried with backoff too.
+    - While running on the fallback, a watcher thread keeps retrying the
+      primary; once it opens it is parked in `recovered_cap` for the capture
+      thread to switch over.
+    """
+    def __init__(self, camera):
+        self.camera = camera
+        self.camera_id = camera["id"]
+        self.primary = camera["url"]
+        self.fallback = camera["fallback"]
+        self.timeout = config.CONNECT_TIMEOUT
+        self.attempt = 0
+        self.awaiting_frame = False  # opened, but no frame read since
+        self.recovered_cap = None
+        self.lock = threading.Lock()
+        self.watch_thread = None
+
+    def _open(self, source, is_primary):
+        try:
+            options = config.capture_options(self.camera) if is_primary else {}
+            cap = open_capture(source, open_timeout=self.timeout, **options)
+            if cap.isOpened():
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                return cap
+            cap.release()
+        except Exception as e:
+            print(f"Connector [{self.camera_id}]: Error opening {source}: {e}")
+        return None
+
+    def next_delay(self):
+        """Jittered exponential backoff: 50-100% of base * 2^attempt, capped."""
+        delay = min(config.RECONNECT_MAX_DELAY, config.RECONNECT_BASE_DELAY * (2 ** self.attempt))
+        self.attempt += 1
+        return delay * random.uniform(0.5, 1.0)
+
+    def probe_once(self):
+        """One connection round. Returns (cap, is_primary) or (None, False)."""
+        pool = ThreadPoolExecutor(max_workers=2)
+        primary = pool.submit(self._open, self.primary, True)
+        fallback = pool.submit(self._open, self.fallback, False) if self.fallback is not None else None
+        pool.shutdown(wait=False)
+        deadline = time.time() + self.timeout
+
+        cap = self._result(primary, deadline)
+        if cap is not None:
+            if fallback is not None:
+                _release_when_done(fallback)
+            return cap, True
+
+        _release_when_done(primary)
+        if fallback is not None:
+            cap = self._result(fallback, deadline)
+            if cap is not None:
+                return cap, False
+        return None, False
+
+    @staticmethod
+    def _result(future, deadline):
+        try:
+            return future.result(timeout=max(0.0, deadline - time.time()))
+        except FutureTimeout:
+            return None
+
+    def connect(self, should_stop):
+        """
+        Blocks the calling (capture) thread until a source opens or
+        should_stop() is true. Returns (cap, is_primary).
+        """
+        self.release_recovered()
+        if self.awaiting_frame:
+            # The last source opened but never delivered a frame: back off
+            delay = self.next_delay()
+            print(f"Connector [{self.camera_id}]: ❌ Source opened but sent no frames. Retrying in {delay:.1f}s")
+            if self._sleep(delay, should_stop):
+                return None, False
+        while not should_stop():
+            print(f"Connector [{self.camera_id}]: Probing {self.primary}"
+                  + (f" and webcam {self.fallback}" if self.fallback is not None else ""))
+            cap, is_primary = self.probe_once()
+            if cap is not None:
+                self.awaiting_frame = True
+                print(f"Connector [{self.camera_id}]: ✅ Connected to "
+                      + ("RTSP Stream." if is_primary else f"Webcam ({self.fallback})."))
+                return cap, is_primary
+
+            delay = self.next_delay()
+            print(f"Connector [{self.camera_id}]: ❌ No source available. Retrying in {delay:.1f}s")
+            if self._sleep(delay, should_stop):
+                break
+        return None, False
+
+    def mark_streaming(self):
+        """Called by the capture thread on the first frame after connecting."""
+        self.attempt = 0
+        self.awaiting_frame = False
+
+    @staticmethod
+    def _sleep(seconds, should_stop):
+        """Sleeps in small steps; returns True if asked to stop."""
+        end = time.time() + seconds
+        while time.time() < end:
+            if should_stop():
+                return True
+            time.sleep(min(0.1, end - time.time()))
+        return should_stop()
+
+    # ===================== FALLBACK -> PRIMARY =====================
+    def watch_primary(self, should_stop):
+        """Starts retrying the primary in the background (while on the fallback)."""
+        if self.watch_thread is not None and self.watch_thread.is_alive():
+            return
+        self.watch_thread = threading.Thread(target=self._watch, args=(should_stop,), daemon=True)
+        self.watch_thread.start()
+
+    def _watch(self, should_stop):
+        while not self._sleep(config.PRIMARY_RETRY_INTERVAL, should_stop):
+            cap = self._open(self.primary, True)
+            if cap is None:
+                continue
+            with self.lock:
+                # Checked under the lock so stop() -> release_recovered() cannot miss it
+                if should_stop():
+                    cap.release()
+                    return
+                self.recovered_cap = cap
+            print(f"Connector [{self.camera_id}]: 🔁 RTSP source is back, switching from webcam.")
+            return
+
+    def take_recovered(self):
+        """Returns the re-opened primary capture (once), or None."""
+        with self.lock:
+            cap, self.recovered_cap = self.recovered_cap, None
+        return cap
+
+    def release_recovered(self):
+        """Releases a parked primary capture that was never switched to."""
+        cap = self.take_recovered()
+        if cap is not None:
+            cap.release()
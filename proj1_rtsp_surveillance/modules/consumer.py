@@ -1,32 +1,111 @@
 # modules/consumer.py
 import threading
-import time
+from core import config
 from modules.detector import PersonDetector
+from modules.detections import Detections
+from utils import FPSCounter, FrameHistory
 
 class AIConsumer(threading.Thread):
-    def __init__(self, producer):
+    def __init__(self, producer, detector=None, tracer=None, keep_history=None):
         super().__init__()
         self.daemon = True
         self.producer = producer
-        self.detector = PersonDetector() # Load model here in separate thread
-        self.last_detections = []
+        # Load model here unless a (shared-model) detector was handed in
+        self.detector = detector or PersonDetector()
+        self.last_detections = Detections.empty()
+        self.last_seq = 0          # sequence number of the last analysed frame
+        self.last_frame_time = 0.0 # its capture timestamp
+        self.fps_counter = FPSCounter()  # frames YOLO ran on per second
+        self.overwritten_frames = 0  # borrowed slots reused mid-inference
+        # Optional LatencyTracer; last_trace holds the timestamps of the frame
+        # behind last_detections (capture, decoded, infer_start/end, zone_end)
+        self.tracer = tracer
+        self.last_trace = {}
+        # Copies of the frames behind recent results ("exact" alignment)
+        if keep_history is None:
+            keep_history = "exact" in (config.DISPLAY_ALIGNMENT, config.SNAPSHOT_ALIGNMENT)
+        self.history = FrameHistory(config.FRAME_HISTORY) if keep_history else None
+        self.on_update = None  # called (no arguments) whenever new results are stored
         self.is_running = True
 
     def run(self):
         """The loop that runs AI in the background."""
         while self.is_running:
-            # 1. Get latest frame from producer
-            frame = self.producer.get_frame()
-            
-            if frame is not None:
-                # 2. Run Detection
-                # Note: This blocks the thread but NOT the UI/Main thread
-                results = self.detector.detect(frame)
-                
-                # 3. Store results for Main thread to draw
-                self.last_detections = results
-            else:
-                time.sleep(0.01) # Wait if no frame available
+            # 1. Sleep until the camera delivers a frame we have not seen yet
+            # (read-only view, no copy). Timeout keeps stop() responsive.
+            ref = self.producer.get_next_frame(self.last_seq, timeout=0.5)
+            if ref is None:
+                continue
+
+            self.keep_frame(ref)
+
+            # 2. Run Detection (once per new camera frame)
+            # Note: This blocks the thread but NOT the UI/Main thread
+            results = self.detector.detect(ref.image, seq=ref.seq, timestamp=ref.timestamp)
+
+            # 3. Store results for Main thread to draw
+            self.publish(ref, results)
+
+    def keep_frame(self, ref):
+        """
+        Copies a frame about to be analysed into the history (if kept), while
+        its ring slot is fresh: by the time its results are published the
+        slot may have been reused. A copy the writer overtook is dropped.
+        """
+        if self.history is None:
+            return
+        self.history.add(ref)
+        if not self.producer.is_frame_valid(ref.seq):
+            self.history.discard(ref.seq)
+
+    def publish(self, ref, results):
+        """Stores the detector's results for frame `ref` (also used by batched inference)."""
+        # The ring slot may have been reused while YOLO was reading it
+        if not self.producer.is_frame_valid(ref.seq):
+            self.overwritten_frames += 1
+
+        if self.detector.last_infer_frame == ref.seq:
+            self._trace(ref)
+        self._store(ref, results)
+
+    def _store(self, ref, results):
+        self.last_detections = results
+        self.last_seq = ref.seq
+        self.last_frame_time = ref.timestamp
+        if self.on_update is not None:
+            self.on_update()
+
+    def _trace(self, ref):
+        """Counts a frame YOLO ran on and records its decode/queue/inference/zone latency."""
+        self.fps_counter.update()
+        timings = self.detector.last_timings
+        trace = {"seq": ref.seq, "capture": ref.timestamp, "decoded": ref.decoded, **timings}
+        if self.tracer is not None:
+            self.tracer.record_span("decode", trace["capture"], trace["decoded"])
+            self.tracer.record_span("queue", trace["decoded"], trace["infer_start"])
+            self.tracer.record_span("inference", trace["infer_start"], trace["infer_end"])
+            self.tracer.record_span("zone", trace["infer_end"], trace["zone_end"])
+        self.last_trace = trace
+
+    def get_trace(self):
+        """Timestamps of the frame the current detections came from."""
+        return self.last_trace
+
+    def get_frame(self, seq):
+        """Private copy (FrameRef) of analysed frame `seq` while it is in the history, else None."""
+        return None if self.history is None else self.history.get(seq)
+
+    def get_aligned(self):
+        """
+        (FrameRef, Detections): the latest results and the frame they were
+        computed from (its seq). The FrameRef is None without a history.
+        """
+        detections = self.last_detections
+        return self.get_frame(detections.seq), detections
+
+    def get_occupancy(self):
+        """People per restricted/counting zone in the latest results."""
+        return self.last_detections.occupancy()
 
     def get_detections(self):
         """Returns the latest AI results."""
@@ -0,0 +1,89 @@
+# modules/detections.py
+import cv2
+import numpy as np
+
+class Detections:
+    """
+    The people found in one frame, as parallel numpy arrays instead of one
+    Python tuple per person, so zone tests, counting and drawing stay cheap
+    in crowded scenes.
+
+      boxes     (N, 4) int64  x1, y1, x2, y2 in frame coordinates
+      conf      (N,)   float32
+      track_id  (N,)   int64  -1 while the tracker has not assigned one
+      inside    (N,)   bool   center in any restricted zone
+      zones     (N, Z) bool   center in zone j (zone_names[j])
+      seq, timestamp          producer sequence number / capture time of the
+                              frame the boxes were detected on
+    """
+    __slots__ = ("boxes", "conf", "track_id", "inside", "zones", "zone_names", "seq", "timestamp")
+
+    def __init__(self, boxes, conf, track_id, inside, zones, zone_names=(), seq=None, timestamp=None):
+        self.boxes = boxes
+        self.conf = conf
+        self.track_id = track_id
+        self.inside = inside
+        self.zones = zones
+        self.zone_names = list(zone_names)
+        self.seq = seq
+        self.timestamp = timestamp
+
+    @classmethod
+    def empty(cls, zone_names=(), seq=None, timestamp=None):
+        return cls(np.zeros((0, 4), dtype=np.int64), np.zeros(0, dtype=np.float32),
+                   np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool),
+                   np.zeros((0, len(zone_names)), dtype=bool), zone_names, seq, timestamp)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __getitem__(self, index):
+        """Subset by boolean mask / index array (same frame, same zones)."""
+        return Detections(self.boxes[index], self.conf[index], self.track_id[index],
+                          self.inside[index], self.zones[index], self.zone_names,
+                          self.seq, self.timestamp)
+
+    @property
+    def centers(self):
+        """(N, 2) int64 box centers (the point zones are tested with)."""
+        return np.column_stack([(self.boxes[:, 0] + self.boxes[:, 2]) // 2,
+                                (self.boxes[:, 1] + self.boxes[:, 3]) // 2])
+
+    def zones_of(self, i):
+        """Names of the zones detection i is in."""
+        return [self.zone_names[j] for j in np.flatnonzero(self.zones[i])]
+
+    def occupancy(self):
+        """People per zone: {zone name: count}."""
+        return dict(zip(self.zone_names, self.zones.sum(axis=0).tolist()))
+
+    def scaled(self, sx, sy):
+        """Copy with boxes mapped to another frame size (e.g. substream -> main stream)."""
+        boxes = (self.boxes * np.array([sx, sy, sx, sy])).astype(np.int64)
+        return Detections(boxes, self.conf, self.track_id, self.inside, self.zones,
+                          self.zone_names, self.seq, self.timestamp)
+
+    def draw(self, frame, thickness=2, font_scale=0.6, centers=True, labels=True):
+        """
+        Boxes (red inside a restricted zone, green otherwise), centers and
+        track labels. All boxes of one colour go to cv2 in a single polylines call.
+        """
+        if not len(self):
+            return frame
+        x1, y1, x2, y2 = self.boxes.T
+        corners = np.stack([np.column_stack([x1, y1]), np.column_stack([x2, y1]),
+                            np.column_stack([x2, y2]), np.column_stack([x1, y2])], axis=1)
+        corners = corners.astype(np.int32)
+        for mask, color in ((self.inside, (0, 0, 255)), (~self.inside, (0, 255, 0))):
+            if mask.any():
+                cv2.polylines(frame, list(corners[mask]), True, color, thickness)
+        if centers:
+            for (cx, cy), inside in zip(self.centers.tolist(), self.inside.tolist()):
+                cv2.circle(frame, (cx, cy), 4, (0, 0, 255) if inside else (0, 255, 0), -1)
+        if not labels:
+            return frame
+        label_y = np.maximum(int(20 * font_scale / 0.6), y1 - 8).tolist()
+        for x, y, t_id, inside in zip(x1.tolist(), label_y, self.track_id.tolist(), self.inside.tolist()):
+            cv2.putText(frame, f"ID:{t_id}" if t_id != -1 else "Unknown", (x, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 255) if inside else (0, 255, 0), 2)
+        return frame
@@ -1,77 +1,321 @@
 # modules/detector.py
+import time
 import cv2
 import numpy as np
-import torch
-from ultralytics import YOLO
 from core import config
+from modules.detector_service import DetectorService
+from modules.scheduler import InferenceScheduler
+from modules.motion import MotionGate
+from modules.tracker import KalmanTracker, greedy_match, iou_matrix
+from modules.detections import Detections
+from utils import ZoneMask
 
 class PersonDetector:
-    def __init__(self):
-        print(f"Loading model: {config.PERSON_MODEL_PATH}...")
-        self.model = YOLO(config.PERSON_MODEL_PATH)
-        
-        # Device configuration
-        if torch.cuda.is_available():
-            self.model.to("cuda")
-            print(f"✅ Using GPU: {torch.cuda.get_device_name(0)}")
+    def __init__(self, service=None, camera=None):
+        # One DetectorService (and so one model) can be shared by many cameras
+        self.service = service or DetectorService()
+        self.camera = config.camera_settings(camera)
+        self.camera_id = self.camera["id"]
+
+        # The default camera follows config.ZONES (primary zone edited live by the UI).
+        # Registry cameras load their own zone file.
+        self.zones = None if camera is None else config.load_zones(self.camera["zone_file"])
+        self.zone_version = 0  # own zones; the default camera uses config.ZONE_VERSION
+        # Zones rasterized once per edit + grid index: zone tests are numpy lookups
+        self.zone_mask = ZoneMask()
+        self.frame_shape = None  # shape of the last frame sent to YOLO
+
+        self.last_person_dets = Detections.empty()
+        self.frame_count = 0       # camera frames seen (producer seq when known)
+        self.last_infer_frame = 0  # frame_count of the last YOLO run
+        # Picks which frames go through YOLO (fixed SKIP_EVERY_N or adaptive)
+        self.scheduler = InferenceScheduler(self.camera)
+        # Optional motion pre-filter: no motion near the zone -> no YOLO
+        self.motion = MotionGate() if self.camera["motion_gate"] else None
+        # Optional track-guided crop mode: full frame now and then, crops around the tracks in between
+        self.crop_mode = self.camera["crop_inference"]
+        self.last_full_time = None  # timestamp of the last full-frame pass
+        self.track_lost = False     # a crop pass lost someone: next pass is a full one
+        self.passes = {"full": 0, "crops": 0, "crop_images": 0}
+        # Optional motion predictor: boxes for the frames YOLO skips (crop mode tracks with it)
+        self.predictor = (KalmanTracker(max_ahead=config.PREDICT_MAX_AHEAD)
+                          if self.camera["predict"] or self.crop_mode else None)
+        # ROI mode: infer on the zone's bounding rectangle only
+        self.roi = None       # (x0, y0, x1, y1) of the last crop
+        self.roi_key = None   # (zone, frame shape) the ROI was computed for
+        self.roi_edit = (None, 0.0)  # (zone version, when first seen) of a zone edit in progress
+        # Wall-clock stamps of the last YOLO run (for latency tracing)
+        self.last_timings = {"infer_start": None, "infer_end": None, "zone_end": None}
+
+    def get_zones(self):
+        return config.ZONES if self.zones is None else self.zones
+
+    def get_zone(self):
+        """Points of the primary (first restricted) zone."""
+        return config.primary_zone(self.get_zones())["points"]
+
+    def watched_zones(self):
+        """Points of every restricted/counting zone (what the motion gate watches)."""
+        return [z["points"] for z in self.get_zones() if z["type"] != "ignore"]
+
+    def get_zone_version(self):
+        return config.ZONE_VERSION if self.zones is None else self.zone_version
+
+    def set_zone(self, zone_points):
+        if self.zones is None:
+            config.set_restricted_zone(zone_points)
         else:
-            config.DEVICE = "cpu"
-            config.USE_HALF = False
-            print("⚠️ CUDA not available, using CPU")
+            config.primary_zone(self.zones)["points"] = zone_points
+            self.zone_version += 1
 
-        self.last_person_dets = [] 
-        self.frame_count = 0
+    def set_zones(self, zones):
+        if self.zones is None:
+            config.set_zones(zones)
+        else:
+            self.zones = zones
+            self.zone_version += 1
 
-    def detect(self, frame):
+    def detect(self, frame, seq=None, timestamp=None):
         """
         Runs tracking/detection.
-        Returns list: (x1, y1, x2, y2, conf, inside_zone, cx, cy, track_id)
+        seq: producer sequence number of the frame, so SKIP_EVERY_N counts
+             camera frames even when the caller misses some.
+        timestamp: its capture time (stored with the results).
+        Whether YOLO runs on this frame is up to the InferenceScheduler and
+        the motion gate; otherwise the previous results are returned, moved
+        to this frame by the motion predictor (see predict()).
+        Returns Detections (boxes, conf, track_id, inside, per-zone membership).
+        """
+        if self.should_infer(frame, seq):
+            self._run_inference(frame, seq, timestamp)
+            return self.last_person_dets
+
+        return self.predict(seq, timestamp)
+
+    def predict(self, seq=None, timestamp=None):
+        """
+        Detections for a frame YOLO did not run on: the Kalman tracks moved
+        to the frame's capture time, with the zones tested again. Without the
+        predictor, the last YOLO results unchanged.
+        """
+        last = self.last_person_dets
+        if self.predictor is None or self.frame_shape is None or (seq is not None and seq == last.seq):
+            return last
+        t = time.time() if timestamp is None else timestamp
+        return self._to_detections(self.predictor.predict(t), seq, timestamp)
+
+    def should_infer(self, frame, seq=None):
+        """
+        Counts the frame and asks the scheduler (and motion gate) whether
+        YOLO should run on it. Batched inference calls this directly.
         """
-        self.frame_count += 1
-        do_detect = (self.frame_count % config.SKIP_EVERY_N == 0)
-        
+        self.frame_count = self.frame_count + 1 if seq is None else seq
+        if self.motion is not None:
+            # Every frame, so motion is always measured against the previous one
+            self.motion.observe(frame, self.watched_zones())
+        do_detect = self.scheduler.should_run(self.frame_count - self.last_infer_frame)
+        if do_detect and self.motion is not None:
+            do_detect = self.motion.check()
         if do_detect:
-            self._run_inference(frame)
-        
-        return self.last_person_dets
+            self.last_infer_frame = self.frame_count
+        return do_detect
+
+    def get_roi(self, frame_shape):
+        """
+        Bounding rectangle of the restricted/counting zones plus
+        camera["roi_margin"], clipped to the frame, as (x0, y0, x1, y1);
+        None if it would not save anything.
+        """
+        key = (self.get_zone_version(), frame_shape[:2])
+        if key == self.roi_key:
+            return self.roi
+        if self.roi_key is not None and key[1] == self.roi_key[1]:
+            # Zone edited (every mouse move of a drag bumps the version): keep
+            # the current crop, and the tracker, until the edit settles
+            now = time.time()
+            if key[0] != self.roi_edit[0]:
+                self.roi_edit = (key[0], now)
+            if now - self.roi_edit[1] < config.INFER_ROI_SETTLE:
+                return self.roi
+        points = [p for z in self.get_zones() if z["type"] != "ignore" for p in z["points"]]
+        h, w = frame_shape[:2]
+        margin = self.camera["roi_margin"]
+        x, y, bw, bh = cv2.boundingRect(np.array(points or self.get_zone(), dtype=np.int32))
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(w, x + bw + margin), min(h, y + bh + margin)
+        roi = (x0, y0, x1, y1)
+        if x1 <= x0 or y1 <= y0 or (x1 - x0) * (y1 - y0) >= w * h:
+            roi = None  # zone outside the frame or covering all of it
+        if self.roi_key is not None and roi != self.roi:
+            # Track coordinates are crop-relative: start the tracker over
+            self.service.forget(self.camera_id)
+        self.roi, self.roi_key = roi, key
+        return roi
+
+    def prepare_input(self, frame):
+        """
+        Returns (source, (ox, oy)): the image to send to YOLO and the offset
+        that maps its boxes back to full-frame coordinates.
+        ROI mode: the crop (a view, no copy) is letterboxed to imgsz on its
+        own, so people in the zone get more model pixels than in a full-frame pass.
+        """
+        self.frame_shape = frame.shape
+        roi = self.get_roi(frame.shape) if self.camera["roi"] else None
+        if roi is None:
+            return frame, (0, 0)
+        return frame[roi[1]:roi[3], roi[0]:roi[2]], roi[:2]
 
-    def _run_inference(self, frame):
+    def _run_inference(self, frame, seq=None, timestamp=None):
         """Internal method to run YOLO Tracking."""
-        zone_poly = np.array(config.RESTRICTED_ZONE, dtype=np.int32)
-        self.last_person_dets = []
+        if self.crop_mode:
+            self.run_crop_mode(frame, seq, timestamp)
+            return
+        infer_start = time.time()
+        self.scheduler.on_run_start(infer_start)
+        source, offset = self.prepare_input(frame)
 
         # ===================== CHANGE: Using .track() instead of .predict() =====================
-        # persist=True keeps the tracking history across frames
-        results = self.model.track(
-            frame,
-            conf=config.CONFIDENCE_THRESHOLD,
-            imgsz=config.INFER_IMGSZ,
-            device=config.DEVICE,
-            half=config.USE_HALF,
-            verbose=False,
-            persist=True 
+        # The shared service keeps a separate tracker per camera_id
+        dets = self.service.track(
+            self.camera_id,
+            source,
+            imgsz=self.camera["imgsz"],
+            conf=self.camera["conf"],
+        )
+
+        self.finish_inference(dets, offset, infer_start, time.time(), seq, timestamp)
+
+    def run_crop_mode(self, frame, seq=None, timestamp=None):
+        """
+        One scheduled frame in crop mode. Either a full-frame pass, or YOLO
+        on a crop around each tracked person's predicted box, all crops in
+        one detect_batch() call at CROP_IMGSZ. Track ids come from the Kalman
+        predictor in both cases: the service's tracker only ever sees full
+        frames and would lose people between the slow full passes.
+        """
+        infer_start = time.time()
+        self.scheduler.on_run_start(infer_start)
+        t = infer_start if timestamp is None else timestamp
+        tracks = self._crop_targets(frame, t)
+        lost = False
+        if tracks is not None:
+            regions = self.crop_regions(tracks[:, :4], frame.shape)
+            # Predicted off-frame: nothing to crop, the track counts as lost
+            on_frame = (regions[:, 2] > regions[:, 0]) & (regions[:, 3] > regions[:, 1])
+            lost = not on_frame.all()
+            tracks, regions = tracks[on_frame], regions[on_frame]
+            if not len(tracks):
+                tracks = None
+        if tracks is None:
+            source, offset = self.prepare_input(frame)
+            dets = self.service.detect_batch([source], self.camera["imgsz"], self.camera["conf"])[0]
+            self.last_full_time = t
+            self.track_lost = False
+            self.passes["full"] += 1
+            self.finish_inference(dets, offset, infer_start, time.time(), seq, timestamp)
+            return
+
+        self.frame_shape = frame.shape
+        crops = [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in regions.tolist()]
+        results = self.service.detect_batch(crops, config.CROP_IMGSZ, self.camera["conf"])
+        infer_end = time.time()
+        persons = self._match_crops(tracks, regions, results)
+        # Someone not found in their crop may have been occluded or
+        # mispredicted: look at the whole frame next time
+        self.track_lost = lost or len(persons) < len(tracks)
+        self.passes["crops"] += 1
+        self.passes["crop_images"] += len(crops)
+        self.finish_inference(persons, (0, 0), infer_start, infer_end, seq, timestamp)
+
+    def _crop_targets(self, frame, t):
+        """Predicted tracks (M, 7) to refresh with crops, or None when a full pass is due."""
+        if (self.last_full_time is None or self.track_lost
+                or t - self.last_full_time >= self.camera["crop_full_interval"]):
+            return None
+        tracks = self.predictor.predict(t)
+        if not len(tracks) or len(tracks) > config.CROP_MAX_TRACKS:
+            return None
+        # Motion in the zone away from everyone tracked (the crops also cover
+        # where they just were): probably a new entry
+        if (self.motion is not None and self.motion.untracked_motion(
+                self.crop_regions(tracks[:, :4], frame.shape), frame.shape) >= self.motion.threshold):
+            return None
+        return tracks
+
+    @staticmethod
+    def crop_regions(boxes, frame_shape):
+        """
+        (M, 4) int64 crops (x0, y0, x1, y1): boxes grown by CROP_MARGIN of
+        their larger side, clipped. A box predicted off-frame gives an empty
+        region (x1 <= x0 or y1 <= y0).
+        """
+        h, w = frame_shape[:2]
+        pad = config.CROP_MARGIN * np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+        regions = np.column_stack([boxes[:, :2] - pad[:, None], boxes[:, 2:4] + pad[:, None]])
+        return np.clip(np.round(regions), 0, [w, h, w, h]).astype(np.int64)
+
+    @staticmethod
+    def _match_crops(tracks, regions, results):
+        """
+        Picks each track's detection from its own crop (best IoU with the
+        prediction, each detection used once when crops overlap). Returns
+        full-frame (K, 7) rows carrying the track's id.
+        """
+        found, owner = [], []
+        for i, (dets, (x0, y0, _, _)) in enumerate(zip(results, regions.tolist())):
+            dets = dets[dets[:, 5] == 0]  # 0 is 'person'
+            found.append(np.column_stack([dets[:, :4] + np.array([x0, y0, x0, y0], dtype=dets.dtype),
+                                          dets[:, 4:]]))
+            owner.append(np.full(len(dets), i))
+        found = np.vstack(found) if found else np.zeros((0, 7), dtype=np.float32)
+        owner = np.concatenate(owner) if owner else np.zeros(0, dtype=np.int64)
+        iou = iou_matrix(tracks[:, :4], found[:, :4])
+        iou[owner[None, :] != np.arange(len(tracks))[:, None]] = 0.0
+        pairs = greedy_match(iou, config.CROP_MATCH_IOU)
+        persons = found[[c for _, c in pairs]].reshape(-1, 7)
+        persons[:, 6] = tracks[[r for r, _ in pairs], 6]
+        return persons
+
+    def finish_inference(self, dets, offset, infer_start, infer_end, seq=None, timestamp=None):
+        """
+        Turns the service's (N, 7) array (x1, y1, x2, y2, conf, cls, track_id)
+        into Detections for frame `seq` and updates the scheduler. Classes
+        are filtered by masking, and all box centers are tested against every
+        zone through the cached, grid-indexed zone mask.
+        """
+        ox, oy = offset
+        persons = dets[dets[:, 5] == 0]  # 0 is 'person'
+        # Back to full-frame coordinates
+        persons = np.column_stack([persons[:, :4] + np.array([ox, oy, ox, oy], dtype=persons.dtype),
+                                   persons[:, 4:]])
+        if self.predictor is not None:
+            persons = self.predictor.update(persons, infer_start if timestamp is None else timestamp)
+        person_dets = self._to_detections(persons, seq, timestamp)
+
+        zone_end = time.time()
+        self.last_person_dets = person_dets
+        self.last_timings = {"infer_start": infer_start, "infer_end": infer_end, "zone_end": zone_end}
+        self.scheduler.on_result(zone_end - infer_start, person_dets, zone_end)
+
+    def _to_detections(self, persons, seq, timestamp):
+        """(N, 7) full-frame person rows -> Detections, zones tested through the cached zone mask."""
+        boxes = persons[:, :4].astype(np.int64)
+        cx = (boxes[:, 0] + boxes[:, 2]) // 2
+        cy = (boxes[:, 1] + boxes[:, 3]) // 2
+        zones = self.get_zones()
+        mask = self.zone_mask.update([z["points"] for z in zones], self.get_zone_version(), self.frame_shape)
+        member = mask.membership(cx, cy)  # (people, zones)
+
+        # People in ignore zones are dropped; only restricted/counting zones are reported
+        types = np.array([z["type"] for z in zones])
+        keep = ~member[:, types == "ignore"].any(axis=1)
+        reported = types != "ignore"
+        return Detections(
+            boxes[keep],
+            persons[keep, 4],
+            persons[keep, 6].astype(np.int64),
+            member[keep][:, types == "restricted"].any(axis=1),
+            member[keep][:, reported],
+            [z["name"] for z in zones if z["type"] != "ignore"],
+            seq, timestamp,
         )
-        
-        r = results[0]
-        if r.boxes is not None and len(r.boxes) > 0:
-            boxes = r.boxes.xyxy.cpu().numpy()
-            clss = r.boxes.cls.cpu().numpy().astype(int)
-            confs = r.boxes.conf.cpu().numpy()
-            
-            # Extract track IDs. If tracking hasn't initialized yet, this might be None.
-            if r.boxes.id is not None:
-                track_ids = r.boxes.id.cpu().numpy().astype(int)
-            else:
-                track_ids = [-1] * len(boxes)
-
-            for (x1, y1, x2, y2), c, cf, t_id in zip(boxes, clss, confs, track_ids):
-                if c != 0: # 0 is 'person'
-                    continue
-
-                x1, y1, x2, y2 = map(int, [x1, y1, x2, y2])
-                cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
-
-                inside = cv2.pointPolygonTest(zone_poly, (cx, cy), False) >= 0
-                
-                # Pass the track_id (-1 if unknown) to the main loop
-                self.last_person_dets.append((x1, y1, x2, y2, float(cf), inside, cx, cy, t_id))
\ No newline at end of file
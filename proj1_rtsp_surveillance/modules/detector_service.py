@@ -0,0 +1,224 @@
+# modules/detector_service.py
+import threading
+import numpy as np
+from core import config
+from modules.tracker import IoUTracker
+
+def result_to_array(r):
+    """
+    Converts one ultralytics Result into the backend-neutral (N, 7) float32
+    array every DetectorService method returns: x1, y1, x2, y2, conf, cls,
+    track_id (-1 while the tracker has not assigned one).
+    """
+    if r.boxes is None or len(r.boxes) == 0:
+        return np.zeros((0, 7), dtype=np.float32)
+    # One device -> host transfer: x1, y1, x2, y2, [track_id,] conf, cls
+    data = r.boxes.data.cpu().numpy().astype(np.float32)
+
+    # Track IDs are missing until the tracker has initialized
+    if data.shape[1] == 7:
+        return data[:, [0, 1, 2, 3, 5, 6, 4]]
+    return np.column_stack([data, np.full(len(data), -1, dtype=np.float32)])
+
+# Events ultralytics' register_tracker() hooks into (see DetectorService._predict)
+_TRACKER_EVENTS = ("on_predict_start", "on_predict_postprocess_end")
+
+def _is_tracker_callback(callback):
+    # register_tracker() adds functools.partial objects of ultralytics.trackers.track functions
+    return getattr(getattr(callback, "func", callback), "__module__", "").startswith("ultralytics.trackers")
+
+class DetectorService:
+    """
+    Owns the one YOLO model shared by every camera in the process.
+    Calls are serialized with a lock, and each camera keeps its own
+    tracker state so track IDs never leak between cameras.
+
+    Backends (config.DETECTOR_BACKEND):
+      "ultralytics"             - PyTorch through ultralytics, model.track()
+      "onnxruntime"/"openvino"  - the model exported once next to the .pt file,
+                                  run on CPU without PyTorch; per-camera
+                                  IoUTracker for track IDs
+    """
+    def __init__(self, model_path=None, backend=None):
+        self.model_path = model_path or config.PERSON_MODEL_PATH
+        self.backend = backend or config.DETECTOR_BACKEND
+        self.lock = threading.Lock()
+        self._trackers = {}  # camera_id -> ultralytics tracker list / IoUTracker
+        self._batch_trackers = {}  # camera_id -> tracker used by track_batch()
+
+        if self.backend == "ultralytics":
+            self._load_ultralytics()
+        else:
+            self.model = None
+            self.engines = {}  # imgsz -> ExportedYOLO (exported models have a fixed input size)
+            config.DEVICE = "cpu"
+            config.USE_HALF = False
+            print(f"Using {self.backend} backend for {self.model_path}")
+
+    def _load_ultralytics(self):
+        # Imported here so capture processes (which import this package) don't load torch
+        import torch
+        from ultralytics import YOLO
+
+        print(f"Loading model: {self.model_path}...")
+        self.model = YOLO(self.model_path)
+
+        # Device configuration
+        if torch.cuda.is_available():
+            self.model.to("cuda")
+            print(f"✅ Using GPU: {torch.cuda.get_device_name(0)}")
+        else:
+            config.DEVICE = "cpu"
+            config.USE_HALF = False
+            print("⚠️ CUDA not available, using CPU")
+
+    def _predict(self, images, imgsz, conf):
+        """
+        model.predict() without tracking (track_batch, detect_batch). Once
+        model.track() has run, ultralytics keeps its tracker callbacks on the
+        model, so they are taken off for the call; the per-camera tracker
+        state on the predictor is left alone. Caller holds self.lock.
+        """
+        callbacks = self.model.callbacks
+        saved = {event: callbacks[event] for event in _TRACKER_EVENTS}
+        for event in _TRACKER_EVENTS:
+            callbacks[event] = [cb for cb in saved[event] if not _is_tracker_callback(cb)]
+        try:
+            return self.model.predict(
+                images,
+                conf=conf,
+                imgsz=imgsz,
+                device=config.DEVICE,
+                half=config.USE_HALF,
+                verbose=False,
+            )
+        finally:
+            callbacks.update(saved)
+
+    def _engine(self, imgsz):
+        engine = self.engines.get(imgsz)
+        if engine is None:
+            from modules.inference_backends import create_engine
+            engine = self.engines[imgsz] = create_engine(self.backend, self.model_path, imgsz)
+        return engine
+
+    def track(self, camera_id, frame, imgsz, conf):
+        """Detects and tracks for one camera. Returns an (N, 7) array (see result_to_array)."""
+        with self.lock:
+            if self.model is None:
+                return self._track_exported(self._trackers, camera_id, frame, imgsz, conf)
+            self._swap_in(camera_id)
+            # persist=True keeps the tracking history across frames
+            results = self.model.track(
+                frame,
+                conf=conf,
+                imgsz=imgsz,
+                device=config.DEVICE,
+                half=config.USE_HALF,
+                verbose=False,
+                persist=True
+            )
+            self._swap_out(camera_id)
+        return result_to_array(results[0])
+
+    def _track_exported(self, trackers, camera_id, frame, imgsz, conf):
+        # Caller holds self.lock
+        dets = self._engine(imgsz).detect(frame, conf)
+        tracker = trackers.get(camera_id)
+        if tracker is None:
+            tracker = trackers[camera_id] = IoUTracker()
+        return tracker.update(dets)
+
+    def track_batch(self, requests, imgsz, conf):
+        """
+        Runs one batched forward pass over frames from several cameras and
+        then each camera's own tracker on its result.
+        requests: list of (camera_id, frame). Returns one (N, 7) array per request.
+
+        (model.track() on a list would push the whole batch through a single
+        tracker, so tracking is done here, the way ultralytics does it.)
+        Exported backends have a fixed batch size of 1 and run the frames
+        one after another.
+        """
+        with self.lock:
+            if self.model is None:
+                return [self._track_exported(self._batch_trackers, camera_id, frame, imgsz, conf)
+                        for camera_id, frame in requests]
+            results = self._predict([frame for _, frame in requests], imgsz, conf)
+            return [result_to_array(self._update_tracker(camera_id, r))
+                    for (camera_id, _), r in zip(requests, results)]
+
+    def detect_batch(self, images, imgsz, conf):
+        """
+        Detection only, no tracker: one forward pass over several images
+        (e.g. the crops around a camera's tracked people). Returns one (N, 7)
+        array per image with track_id -1.
+        """
+        if not images:
+            return []
+        with self.lock:
+            if self.model is None:
+                engine = self._engine(imgsz)
+                return [np.column_stack([d, np.full(len(d), -1, dtype=np.float32)])
+                        for d in (engine.detect(image, conf) for image in images)]
+            results = self._predict(images, imgsz, conf)
+        return [result_to_array(r) for r in results]
+
+    def _update_tracker(self, camera_id, result):
+        import torch
+        tracker = self._batch_trackers.get(camera_id)
+        if tracker is None:
+            tracker = self._batch_trackers[camera_id] = self._new_tracker()
+        det = result.boxes.cpu().numpy()
+        if len(det) == 0:
+            return result
+        tracks = tracker.update(det, result.orig_img)
+        if len(tracks) == 0:
+            return result
+        idx = tracks[:, -1].astype(int)
+        result = result[idx]
+        result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+        return result
+
+    @staticmethod
+    def _new_tracker():
+        # Only the exported tracker classes (ultralytics.trackers) and check_yaml,
+        # not the private registry model.track() uses (see requirements.txt pin)
+        import yaml
+        from types import SimpleNamespace
+        from ultralytics.trackers import BOTSORT, BYTETracker
+        from ultralytics.utils.checks import check_yaml
+        with open(check_yaml(config.TRACKER_CONFIG)) as f:
+            cfg = SimpleNamespace(**yaml.safe_load(f))
+        trackers = {"bytetrack": BYTETracker, "botsort": BOTSORT}
+        if cfg.tracker_type not in trackers:
+            raise ValueError(f"Unsupported tracker_type '{cfg.tracker_type}' in {config.TRACKER_CONFIG}, "
+                             f"use one of {list(trackers)}")
+        return trackers[cfg.tracker_type](args=cfg, frame_rate=30)
+
+    def _swap_in(self, camera_id):
+        """Installs this camera's trackers on the predictor (a fresh one for a new camera)."""
+        predictor = self.model.predictor
+        if predictor is None:
+            return
+        trackers = self._trackers.get(camera_id)
+        if trackers is None and any(map(_is_tracker_callback, self.model.callbacks["on_predict_postprocess_end"])):
+            # New camera: with the attribute missing, model.track() would
+            # register its tracker callbacks on the model a second time
+            trackers = [self._new_tracker()]
+        if trackers is not None:
+            predictor.trackers = trackers
+        elif hasattr(predictor, "trackers"):
+            # Not tracking yet: model.track() registers the callbacks and creates the trackers
+            del predictor.trackers
+
+    def _swap_out(self, camera_id):
+        predictor = self.model.predictor
+        if predictor is not None and hasattr(predictor, "trackers"):
+            self._trackers[camera_id] = predictor.trackers
+
+    def forget(self, camera_id):
+        """Drops the tracker state of a removed camera."""
+        with self.lock:
+            self._trackers.pop(camera_id, None)
+            self._batch_trackers.pop(camera_id, None)
@@ -0,0 +1,125 @@
+# modules/evidence.py
+import threading
+import time
+import cv2
+from core import config
+from modules.capture_process import create_producer
+
+class EvidenceStream:
+    """
+    High-resolution main stream of a dual-stream camera.
+
+    The stream stays connected and every packet is grabbed (so it never
+    lags), but frames are only decoded when a clip asks for them
+    (decode_mode "request"), plus EVIDENCE_IDLE_FPS frames per second so a
+    snapshot can use the main-stream frame captured nearest the detections.
+    Detections from the inference substream are mapped into main-stream
+    coordinates before drawing.
+    """
+    def __init__(self, camera=None):
+        settings = config.camera_settings(camera)
+        self.camera_id = settings["id"]
+        self.producer = create_producer({
+            **settings,
+            "id": f"{settings['id']}-evidence",
+            "url": settings["evidence_url"],
+            "replay": None,
+            "fallback": None,
+            "decode_mode": "request",
+            "decode_fps": None,
+            "idle_decode_fps": config.EVIDENCE_IDLE_FPS,
+            # Decode at full resolution: this stream exists for detail
+            "width": None,
+            "height": None,
+            "fps": None,
+            "max_frame_bytes": 3840 * 2160 * 3,
+        })
+        self.clip_thread = None
+
+    def start(self):
+        self.producer.start()
+
+    def stop(self):
+        self.producer.stop()
+
+    def grab_frame(self, timeout=2.0):
+        """Decodes one fresh main-stream frame. Returns a FrameRef or None."""
+        return self.producer.get_next_frame(self.producer.ring.seq, timeout=timeout)
+
+    def frame_near(self, timestamp, timeout=2.0):
+        """
+        Private copy of the main-stream frame captured nearest `timestamp`
+        (a kept frame, or a fresh one if that is closer), or None.
+        """
+        ring = self.producer.ring
+        ref = None if timestamp is None else ring.nearest(timestamp)
+        out = None if ref is None else ref.copy()
+        if out is not None and not ring.is_valid(ref.seq):
+            ref = out = None  # overwritten while copying
+        if ref is None or ref.timestamp < timestamp:
+            fresh = self.grab_frame(timeout)
+            if fresh is not None and (ref is None or timestamp is None or
+                                      abs(fresh.timestamp - timestamp) < abs(ref.timestamp - timestamp)):
+                out = fresh.copy()
+        return out
+
+    def snapshot(self, detections, source_shape, timeout=2.0):
+        """
+        Returns a private main-stream frame with `detections` (made on a frame
+        of `source_shape`) drawn in main-stream coordinates, or None. The
+        frame is the one captured nearest the detections' timestamp.
+        """
+        out = self.frame_near(detections.timestamp, timeout)
+        if out is None:
+            return None
+        sx = out.shape[1] / source_shape[1]
+        sy = out.shape[0] / source_shape[0]
+        return detections.scaled(sx, sy).draw(out, thickness=3, font_scale=1.0, centers=False)
+
+    def save_snapshot(self, logger, detections, source_shape, fallback=None):
+        """
+        Picks, annotates and saves a main-stream snapshot on a background
+        thread so the render loop never waits for the decode. `fallback`
+        (e.g. the substream frame) is saved if the main stream is unavailable.
+        """
+        def work():
+            frame = self.snapshot(detections, source_shape)
+            if frame is None:
+                print(f"Evidence [{self.camera_id}]: ⚠️ Main stream unavailable, saving substream frame")
+                frame = fallback
+            if frame is not None:
+                logger.save_snapshot(frame)
+        threading.Thread(target=work, daemon=True).start()
+
+    def record_clip(self, path, seconds=None, fps=15):
+        """
+        Records `seconds` of main stream to `path` in the background.
+        Frames are only decoded while the clip is recording. Returns False if
+        a clip is already running.
+        """
+        if self.clip_thread is not None and self.clip_thread.is_alive():
+            return False
+        seconds = seconds or config.CLIP_SECONDS
+        self.clip_thread = threading.Thread(target=self._record, args=(path, seconds, fps), daemon=True)
+        self.clip_thread.start()
+        return True
+
+    def _record(self, path, seconds, fps):
+        writer = None
+        last_seq = self.producer.ring.seq
+        next_time = time.time()
+        for _ in range(int(seconds * fps)):
+            # Pace requests so only `fps` frames per second get decoded
+            time.sleep(max(0.0, next_time - time.time()))
+            next_time += 1.0 / fps
+            ref = self.producer.get_next_frame(last_seq, timeout=2.0)
+            if ref is None:
+                break
+            last_seq = ref.seq
+            if writer is None:
+                h, w = ref.image.shape[:2]
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+            writer.write(ref.image)
+        if writer is not None:
+            writer.release()
+            print(f"🎞️ Clip saved: {path}")
@@ -0,0 +1,148 @@
+# modules/inference_backends.py
+import os
+import shutil
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+from core import config
+
+def exported_path(model_path, backend, imgsz, int8=False):
+    """Cache location of an exported (or INT8-quantized) model, next to the .pt file."""
+    stem = os.path.splitext(model_path)[0] + f"_{imgsz}" + ("_int8" if int8 else "")
+    if backend == "onnxruntime":
+        return f"{stem}.onnx"
+    return f"{stem}_openvino_model"
+
+def export_model(model_path, backend, imgsz):
+    """
+    Exports the ultralytics model to ONNX / OpenVINO IR once (fixed input
+    size, which is what CPU runtimes are fastest with) and returns the cached
+    path. Needs ultralytics only the first time.
+    """
+    target = exported_path(model_path, backend, imgsz)
+    if os.path.exists(target):
+        return target
+    from ultralytics import YOLO
+    fmt = "onnx" if backend == "onnxruntime" else "openvino"
+    print(f"Exporting {model_path} to {fmt} (imgsz={imgsz}), one-time...")
+    produced = YOLO(model_path).export(format=fmt, imgsz=imgsz, half=False, dynamic=False)
+    shutil.move(str(produced), target)
+    print(f"✅ Exported model cached at {target}")
+    return target
+
+def letterbox(frame, imgsz):
+    """Resizes with unchanged aspect ratio and pads to imgsz x imgsz (like ultralytics)."""
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    nw, nh = int(round(w * scale)), int(round(h * scale))
+    pad_x, pad_y = (imgsz - nw) / 2, (imgsz - nh) / 2
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[top:top + nh, left:left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (left, top)
+
+def preprocess(frame, imgsz):
+    """
+    Model input for a BGR frame: (blob, scale, (left, top)) with the NCHW
+    float32 RGB blob and the letterbox transform to undo on the boxes.
+    INT8 calibration feeds the model through this too.
+    """
+    img, scale, pad = letterbox(frame, imgsz)
+    return cv2.dnn.blobFromImage(img, 1.0 / 255.0, swapRB=True), scale, pad
+
+class ExportedYOLO(ABC):
+    """
+    YOLOv8 detector on an exported model, without PyTorch.
+    detect() returns an (N, 6) float32 array: x1, y1, x2, y2, conf, cls in
+    frame coordinates. Subclasses implement _forward().
+    """
+    def __init__(self, imgsz):
+        self.imgsz = imgsz
+        self.threads = config.CPU_INFER_THREADS or os.cpu_count()
+
+    @abstractmethod
+    def _forward(self, blob):
+        """Raw model output for a (1, 3, imgsz, imgsz) blob."""
+
+    def detect(self, frame, conf):
+        blob, scale, (left, top) = preprocess(frame, self.imgsz)
+        pred = self._forward(blob)[0]  # (4 + num_classes, num_anchors)
+
+        scores = pred[4:]
+        cls = scores.argmax(0)
+        confs = scores[cls, np.arange(scores.shape[1])]
+        keep = confs >= conf
+        if not keep.any():
+            return np.zeros((0, 6), dtype=np.float32)
+        cx, cy, bw, bh = pred[:4, keep]
+        confs, cls = confs[keep], cls[keep]
+
+        # Class-aware NMS (offset boxes per class), like ultralytics
+        offset = cls * 4096.0
+        rects = np.stack([cx - bw / 2 + offset, cy - bh / 2, bw, bh], axis=1)
+        idx = cv2.dnn.NMSBoxes(rects.tolist(), confs.tolist(), conf, config.NMS_IOU)
+        idx = np.array(idx, dtype=np.int64).reshape(-1)
+
+        x1 = (cx[idx] - bw[idx] / 2 - left) / scale
+        y1 = (cy[idx] - bh[idx] / 2 - top) / scale
+        x2 = (cx[idx] + bw[idx] / 2 - left) / scale
+        y2 = (cy[idx] + bh[idx] / 2 - top) / scale
+        h, w = frame.shape[:2]
+        out = np.stack([np.clip(x1, 0, w), np.clip(y1, 0, h), np.clip(x2, 0, w), np.clip(y2, 0, h),
+                        confs[idx], cls[idx]], axis=1)
+        return out.astype(np.float32)
+
+class OnnxRuntimeYOLO(ExportedYOLO):
+    def __init__(self, path, imgsz):
+        super().__init__(imgsz)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        print(f"✅ ONNX Runtime backend: {path} ({self.threads} threads)")
+
+    def _forward(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+class OpenVINOYOLO(ExportedYOLO):
+    def __init__(self, path, imgsz):
+        super().__init__(imgsz)
+        import openvino as ov
+        core = ov.Core()
+        xml = path
+        if os.path.isdir(path):
+            xml = next(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".xml"))
+        self.compiled = core.compile_model(core.read_model(xml), "CPU", {
+            "INFERENCE_NUM_THREADS": self.threads,
+            "PERFORMANCE_HINT": "LATENCY",
+        })
+        self.request = self.compiled.create_infer_request()
+        print(f"✅ OpenVINO backend: {xml} ({self.threads} threads)")
+
+    def _forward(self, blob):
+        return self.request.infer({0: blob})[self.compiled.output(0)]
+
+def load_engine(backend, path, imgsz):
+    if backend == "onnxruntime":
+        return OnnxRuntimeYOLO(path, imgsz)
+    if backend == "openvino":
+        return OpenVINOYOLO(path, imgsz)
+    raise ValueError(f"Unknown detector backend: {backend}")
+
+def create_engine(backend, model_path, imgsz):
+    """
+    Builds the ExportedYOLO for `backend`, exporting the model first if
+    needed. With DETECTOR_INT8 the quantized artifact made by
+    core/quantize.py is used when it exists.
+    """
+    path = config.DETECTOR_MODEL_FILE
+    if path is None and config.DETECTOR_INT8:
+        path = exported_path(model_path, backend, imgsz, int8=True)
+        if not os.path.exists(path):
+            print(f"⚠️ No INT8 model at {path} (run core/quantize.py). Using FP32.")
+            path = None
+    return load_engine(backend, path or export_model(model_path, backend, imgsz), imgsz)
@@ -0,0 +1,422 @@
+# modules/inference_pool.py
+import bisect
+import os
+import queue
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from core import config
+from modules.consumer import AIConsumer
+from modules.tracker import IoUTracker
+
+_WORKER_CHECK_INTERVAL = 0.5  # seconds between worker liveness checks
+
+def _worker_main(index, cores, threads, backend, model_path, shm_name, slot_bytes, jobs, results):
+    """
+    Entry point of a pool worker: pins itself to `cores`, limits intra-op
+    threads and runs detection (no tracking) on frames in its shared slots.
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    # Before torch / onnxruntime / openvino are imported
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    config.CPU_INFER_THREADS = threads
+
+    if backend == "ultralytics":
+        import torch
+        from ultralytics import YOLO
+        from modules.detector_service import result_to_array
+        torch.set_num_threads(threads)
+        model = YOLO(model_path)
+
+        def detect(frame, imgsz, conf):
+            r = model.predict(frame, conf=conf, imgsz=imgsz, device="cpu", half=False, verbose=False)[0]
+            return result_to_array(r)[:, :6]
+    else:
+        from modules.inference_backends import create_engine
+        engines = {}
+
+        def detect(frame, imgsz, conf):
+            if imgsz not in engines:
+                engines[imgsz] = create_engine(backend, model_path, imgsz)
+            return engines[imgsz].detect(frame, conf)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    results.put(("ready", index))
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            job_id, slot, shape, imgsz, conf = job
+            frame = np.ndarray(shape, np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            start = time.time()
+            try:
+                dets = detect(frame, imgsz, conf)
+            except Exception as e:
+                print(f"❌ Pool worker {index}: {e}")
+                dets = np.zeros((0, 6), dtype=np.float32)
+            del frame
+            results.put((job_id, index, dets, start, time.time()))
+    finally:
+        shm.close()
+
+class _Job:
+    def __init__(self, job_id, camera_id, seq, callback, track=True):
+        self.job_id = job_id
+        self.camera_id = camera_id
+        self.seq = seq
+        self.callback = callback
+        self.track = track     # False: delivered as soon as done, no tracker
+        self.worker = None
+        self.slot = None
+        self.raw = None        # (N, 6) detections from the worker
+        self.result = None     # (N, 7) after tracking
+        self.infer_start = self.infer_end = None
+        self.done = threading.Event()
+
+    def __lt__(self, other):
+        # Frame order; jobs without a seq (track()) keep submission order
+        return ((self.job_id if self.seq is None else self.seq)
+                < (other.job_id if other.seq is None else other.seq))
+
+class _Worker:
+    def __init__(self, index, cores, threads, ctx, slots, slot_bytes, backend, model_path, results):
+        self.index = index
+        self.cores = cores
+        self.threads = threads
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.free_slots = list(range(slots))
+        self.in_flight = {}  # job_id -> _Job
+        self.jobs = ctx.Queue()
+        self.process = ctx.Process(target=_worker_main,
+                                   args=(index, cores, threads, backend, model_path,
+                                         self.shm.name, slot_bytes, self.jobs, results),
+                                   name=f"infer-{index}", daemon=True)
+        self.ready = False
+        self.alive = True
+        # Telemetry
+        self.completed = 0
+        self.busy_time = 0.0
+        self.last_infer_time = 0.0
+
+class InferencePool:
+    """
+    Detection in N worker processes for CPU-only boxes, where one PyTorch
+    process uses a fraction of the cores. Each worker loads its own model,
+    is pinned to its own core set and runs POOL_THREADS_PER_WORKER intra-op
+    threads. Frames go through per-worker shared-memory slots (one copy, no
+    pickling), to the least loaded worker or round-robin.
+
+    Workers only detect. Tracking stays here, one IoUTracker per camera,
+    and is fed in frame-sequence order: results that come back early wait
+    until the older frames of the same camera are done, so track IDs stay
+    continuous whichever worker served each frame.
+
+    Drop-in for DetectorService (track / track_batch / detect_batch /
+    forget, (N, 7) arrays), so PersonDetector, AIConsumer and BatchInferenceWorker use it
+    unchanged; PooledConsumer additionally keeps several frames of one
+    camera in flight.
+    """
+    def __init__(self, workers=None, dispatch=None, threads=None, backend=None, model_path=None):
+        self.backend = backend or config.DETECTOR_BACKEND
+        self.model_path = model_path or config.PERSON_MODEL_PATH
+        self.dispatch = dispatch or config.POOL_DISPATCH
+        num_workers = workers or config.POOL_WORKERS
+        core_sets = self._core_sets(num_workers)
+
+        ctx = mp.get_context(config.CAPTURE_PROCESS_START_METHOD)
+        self.results = ctx.Queue()
+        self.workers = []
+        for i, cores in enumerate(core_sets):
+            n_threads = (threads or config.POOL_THREADS_PER_WORKER
+                         or (len(cores) if cores else max(1, (os.cpu_count() or 1) // num_workers)))
+            self.workers.append(_Worker(i, cores, n_threads, ctx, config.POOL_SLOTS_PER_WORKER,
+                                        config.MAX_FRAME_BYTES, self.backend, self.model_path, self.results))
+        # Workers only run CPU inference
+        config.DEVICE = "cpu"
+        config.USE_HALF = False
+
+        self.cond = threading.Condition()
+        self.streams = {}  # camera_id -> {"pending": [_Job sorted by seq], "tracker": IoUTracker}
+        self.next_job_id = 0
+        self.next_worker = 0
+        self.reordered = 0  # results that had to wait for an older frame
+        self.is_running = True
+
+        for worker in self.workers:
+            worker.process.start()
+        self.collector = threading.Thread(target=self._collect, name="pool-collector", daemon=True)
+        self.collector.start()
+        print(f"✅ Inference pool: {num_workers} workers ({self.backend}, {self.dispatch}), "
+              f"cores {[w.cores for w in self.workers]}")
+
+    @staticmethod
+    def _core_sets(num_workers):
+        """Splits the usable cores into num_workers equal, disjoint sets."""
+        if not config.POOL_PIN_CORES or not hasattr(os, "sched_getaffinity"):
+            return [None] * num_workers
+        cores = sorted(os.sched_getaffinity(0))
+        if len(cores) < num_workers:
+            print(f"⚠️ {num_workers} pool workers but only {len(cores)} cores: not pinning")
+            return [None] * num_workers
+        per_worker = len(cores) // num_workers
+        return [cores[i * per_worker:(i + 1) * per_worker] for i in range(num_workers)]
+
+    # ===================== DISPATCH =====================
+    def _pick_worker(self):
+        # Caller holds self.cond. None if every live worker's slots are full.
+        candidates = [w for w in self.workers if w.alive and w.free_slots]
+        if not candidates:
+            return None
+        if self.dispatch == "round_robin":
+            n = len(self.workers)
+            for step in range(n):
+                worker = self.workers[(self.next_worker + step) % n]
+                if worker in candidates:
+                    self.next_worker = (worker.index + 1) % n
+                    return worker
+        # Least loaded: fewest frames queued, then the faster one
+        return min(candidates, key=lambda w: (len(w.in_flight), w.last_infer_time))
+
+    def submit(self, camera_id, seq, frame, imgsz, conf, callback=None, track=True):
+        """
+        Queues a frame and returns at once (blocks only while every worker
+        slot is taken). The returned job's `result` is the tracked (N, 7)
+        array once `done` is set; callback(job) runs first, on the
+        collector thread, in seq order per camera. With track=False the
+        result has track_id -1 and is delivered as soon as it is ready.
+        """
+        if frame.nbytes > config.MAX_FRAME_BYTES:
+            raise ValueError(f"Frame {frame.shape} exceeds pool slot size ({config.MAX_FRAME_BYTES} bytes)")
+        worker = None
+
+        def pick():
+            nonlocal worker
+            worker = self._pick_worker()
+            return worker is not None or not self.is_running or not any(w.alive for w in self.workers)
+
+        with self.cond:
+            self.cond.wait_for(pick)
+            if worker is None:
+                raise RuntimeError("InferencePool is stopped (or all workers died)")
+            slot = worker.free_slots.pop()
+            job = _Job(self.next_job_id, camera_id, seq, callback, track)
+            self.next_job_id += 1
+            job.worker, job.slot = worker, slot
+            worker.in_flight[job.job_id] = job
+            if track:
+                stream = self.streams.setdefault(camera_id, {"pending": [], "tracker": IoUTracker()})
+                bisect.insort(stream["pending"], job)
+
+        # Copy outside the lock: the slot is ours until the result comes back
+        view = np.ndarray(frame.shape, np.uint8, buffer=worker.shm.buf, offset=slot * worker.slot_bytes)
+        np.copyto(view, frame)
+        del view
+        worker.jobs.put((job.job_id, slot, frame.shape, imgsz, conf))
+        return job
+
+    # ===================== RESULTS =====================
+    def _collect(self):
+        last_check = time.time()
+        while self.is_running:
+            # On a timer, not only when idle: other workers can keep the
+            # queue busy while a dead one blocks its cameras' pending frames
+            if time.time() - last_check >= _WORKER_CHECK_INTERVAL:
+                self._check_workers()
+                last_check = time.time()
+            try:
+                msg = self.results.get(timeout=_WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            if msg[0] == "ready":
+                self.workers[msg[1]].ready = True
+                continue
+            job_id, index, dets, start, end = msg
+            worker = self.workers[index]
+            with self.cond:
+                job = worker.in_flight.pop(job_id, None)
+                if job is None:
+                    continue  # already failed: the worker died right after sending it
+                worker.free_slots.append(job.slot)
+                worker.completed += 1
+                worker.busy_time += end - start
+                worker.last_infer_time = end - start
+                self.cond.notify_all()
+            job.raw, job.infer_start, job.infer_end = dets, start, end
+            self._deliver(job)
+
+    def _deliver(self, finished):
+        """Tracks and hands out the finished jobs of a camera, oldest first."""
+        if not finished.track:
+            finished.result = np.column_stack([finished.raw, np.full(len(finished.raw), -1, dtype=np.float32)])
+            self._finish(finished)
+            return
+        with self.cond:
+            stream = self.streams[finished.camera_id]
+            pending = stream["pending"]
+            ready = []
+            while pending and pending[0].raw is not None:
+                ready.append(pending.pop(0))
+            if finished not in ready:
+                self.reordered += 1  # waits for an older frame on another worker
+            tracker = stream["tracker"]
+        for job in ready:
+            job.result = tracker.update(job.raw)
+            self._finish(job)
+
+    def _finish(self, job):
+        if job.callback is not None:
+            try:
+                job.callback(job)
+            except Exception as e:
+                print(f"❌ Inference pool callback ({job.camera_id}): {e}")
+        job.done.set()
+
+    def _check_workers(self):
+        """Fails the queued frames of a worker that died, so nobody waits forever."""
+        for worker in self.workers:
+            if self.is_running and worker.alive and not worker.process.is_alive():
+                worker.alive = False
+                print(f"❌ Inference pool worker {worker.index} died (exit code {worker.process.exitcode})")
+                with self.cond:
+                    jobs = list(worker.in_flight.values())
+                    worker.in_flight.clear()
+                    self.cond.notify_all()
+                for job in jobs:
+                    job.raw = np.zeros((0, 6), dtype=np.float32)
+                    job.infer_start = job.infer_end = time.time()
+                    self._deliver(job)
+
+    # ===================== DetectorService INTERFACE =====================
+    def track(self, camera_id, frame, imgsz, conf):
+        job = self.submit(camera_id, None, frame, imgsz, conf)
+        job.done.wait()
+        return job.result
+
+    def track_batch(self, requests, imgsz, conf):
+        """The frames of a batch run on different workers at the same time."""
+        jobs = [self.submit(camera_id, None, frame, imgsz, conf) for camera_id, frame in requests]
+        for job in jobs:
+            job.done.wait()
+        return [job.result for job in jobs]
+
+    def detect_batch(self, images, imgsz, conf):
+        """Detection only (track_id -1); the images run on different workers at the same time."""
+        jobs = [self.submit(None, None, image, imgsz, conf, track=False) for image in images]
+        for job in jobs:
+            job.done.wait()
+        return [job.result for job in jobs]
+
+    def forget(self, camera_id):
+        """Drops a camera's tracker (a new one starts with its next frame)."""
+        with self.cond:
+            stream = self.streams.get(camera_id)
+            if stream is not None:
+                stream["tracker"] = IoUTracker()
+
+    def get_stats(self):
+        with self.cond:
+            workers = [{
+                "cores": w.cores,
+                "threads": w.threads,
+                "ready": w.ready,
+                "alive": w.alive,
+                "in_flight": len(w.in_flight),
+                "completed": w.completed,
+                "avg_infer_ms": w.busy_time / w.completed * 1000.0 if w.completed else 0.0,
+            } for w in self.workers]
+        return {"dispatch": self.dispatch, "reordered": self.reordered, "workers": workers}
+
+    def stop(self):
+        with self.cond:
+            self.is_running = False
+            self.cond.notify_all()
+        for worker in self.workers:
+            worker.jobs.put(None)
+        for worker in self.workers:
+            worker.process.join(timeout=3.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.shm.close()
+            worker.shm.unlink()
+
+class PooledConsumer(AIConsumer):
+    """
+    AIConsumer that keeps up to POOL_MAX_IN_FLIGHT frames of its camera in
+    the InferencePool, so one camera can use several workers at once.
+    Results are published in frame order as the pool delivers them.
+    """
+    def __init__(self, producer, pool, detector=None, tracer=None, max_in_flight=None):
+        super().__init__(producer, detector=detector, tracer=tracer)
+        self.pool = pool
+        self.max_in_flight = max_in_flight or config.POOL_MAX_IN_FLIGHT
+        self.in_flight = threading.Semaphore(self.max_in_flight)
+        self.last_submitted_seq = 0
+        self.submit_errors = 0      # frames the pool refused (too big, pool down)
+        self.last_error_time = 0.0
+
+    def run(self):
+        detector = self.detector
+        while self.is_running:
+            ref = self.producer.get_next_frame(self.last_submitted_seq, timeout=0.5)
+            if ref is None:
+                continue
+            self.last_submitted_seq = ref.seq
+            self.keep_frame(ref)
+            if not detector.should_infer(ref.image, ref.seq):
+                # Not scheduled: previous detections, moved to this frame
+                self._store(ref, detector.predict(ref.seq, ref.timestamp))
+                continue
+            if detector.crop_mode:
+                # Each pass depends on the tracks of the previous one: run it
+                # here, its crops spread over the workers (detect_batch)
+                try:
+                    detector.run_crop_mode(ref.image, ref.seq, ref.timestamp)
+                except (ValueError, RuntimeError) as e:
+                    self._submit_failed(e)
+                    continue
+                self.publish(ref, detector.last_person_dets)
+                continue
+            if not self.in_flight.acquire(timeout=0.5):
+                continue  # pool saturated: skip to a newer frame
+
+            infer_start = time.time()
+            detector.scheduler.on_run_start(infer_start)
+
+            try:
+                source, offset = detector.prepare_input(ref.image)
+
+                def done(job, ref=ref, offset=offset, infer_start=infer_start):
+                    try:
+                        detector.finish_inference(job.result, offset, infer_start, job.infer_end,
+                                                  ref.seq, ref.timestamp)
+                        self.publish(ref, detector.last_person_dets)
+                    finally:
+                        self.in_flight.release()
+
+                self.pool.submit(detector.camera_id, ref.seq, source,
+                                 detector.camera["imgsz"], detector.camera["conf"], callback=done)
+            except (ValueError, RuntimeError) as e:
+                # Frame too big for a pool slot, or the pool is stopped / all workers died
+                self.in_flight.release()
+                self._submit_failed(e)
+
+    def _submit_failed(self, error):
+        self.submit_errors += 1
+        if self.submit_errors == 1 or time.time() - self.last_error_time >= 5.0:
+            print(f"❌ {self.detector.camera_id}: frame not sent to the inference pool: {error}")
+            self.last_error_time = time.time()
+        if isinstance(error, RuntimeError):
+            time.sleep(1.0)  # pool unusable: don't spin on every frame
+
+    def publish(self, ref, results):
+        # The pixels were copied into the pool at submit time, so the ring
+        # slot being reused since is harmless; every result is a YOLO run.
+        self._trace(ref)
+        if ref.seq >= self.last_seq:  # else a prediction for a newer frame is already shown
+            self._store(ref, results)
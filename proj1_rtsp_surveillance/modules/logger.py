@@ -10,10 +10,12 @@ class AlertLogger:
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.log_dir = os.path.join(base_dir, "logs")
         self.snapshots_dir = os.path.join(base_dir, "snapshots")
+        self.clips_dir = os.path.join(base_dir, "clips")
         
         # Create directories if they don't exist
         os.makedirs(self.log_dir, exist_ok=True)
         os.makedirs(self.snapshots_dir, exist_ok=True)
+        os.makedirs(self.clips_dir, exist_ok=True)
         
         # CSV File Path
         self.csv_path = os.path.join(self.log_dir, "intrusion_log.csv")
@@ -54,3 +56,10 @@ class AlertLogger:
         except Exception as e:
             print(f"Error saving snapshot: {e}")
             return None
+
+    def new_clip_path(self):
+        """
+        Returns a timestamped .mp4 path in clips/ for an evidence clip.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.clips_dir, f"alert_{timestamp}.mp4")
@@ -0,0 +1,151 @@
+# modules/motion.py
+import time
+import cv2
+import numpy as np
+from core import config
+
+class MotionGate:
+    """
+    Cheap pre-filter in front of YOLO.
+
+    observe() runs on every camera frame the detector sees: the frame is
+    shrunk to MOTION_WIDTH grayscale and compared with the previous one
+    (frame differencing) or fed to MOG2, so the reference is always one
+    frame old and the threshold means the same at any inference rate. When
+    the scheduler wants a YOLO run, check() says "skip" unless, on some frame
+    since the last check, enough of the zones (their union, grown by
+    MOTION_ZONE_MARGIN) was moving; the detector then keeps its previous results. YOLO still
+    runs at least every MOTION_KEEPALIVE seconds so the tracker stays fresh.
+
+    For tuning: `mask` is the last foreground mask, `zone_mask` the area
+    that counts, `motion_ratio` the moving share of it, stats() the skip ratio.
+    """
+    def __init__(self):
+        self.method = config.MOTION_METHOD
+        self.width = config.MOTION_WIDTH
+        self.threshold = config.MOTION_THRESHOLD
+        self.pixel_delta = config.MOTION_PIXEL_DELTA
+        self.margin = config.MOTION_ZONE_MARGIN
+        self.keepalive = config.MOTION_KEEPALIVE
+
+        self.subtractor = None
+        if self.method == "mog2":
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(history=300, varThreshold=16,
+                                                                 detectShadows=False)
+        self.prev = None
+        self.zone_key = None
+        self.zone_mask = None
+        self.mask = None
+        self.motion_ratio = 0.0
+        self.peak_ratio = 0.0  # highest motion_ratio since the last check()
+        self.checked = 0
+        self.skipped = 0
+        self.last_pass_time = 0.0
+
+    def _small_gray(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, int(round(h * self.width / w))))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _get_zone_mask(self, zones, frame_shape, small_shape):
+        key = (tuple(tuple(map(tuple, zone)) for zone in zones), frame_shape[:2], small_shape)
+        if key != self.zone_key:
+            scale = small_shape[1] / frame_shape[1]
+            mask = np.zeros(small_shape, dtype=np.uint8)
+            polys = [np.round(np.array(zone, dtype=np.float32) * scale).astype(np.int32)
+                     for zone in zones if len(zone) >= 3]
+            if polys:
+                cv2.fillPoly(mask, polys, 255)
+            grow = int(round(self.margin * scale))
+            if grow > 0:
+                kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * grow + 1, 2 * grow + 1))
+                mask = cv2.dilate(mask, kernel)
+            self.zone_key = key
+            self.zone_mask = mask
+        return self.zone_mask
+
+    def _foreground(self, small):
+        if self.subtractor is not None:
+            return self.subtractor.apply(small)
+        prev, self.prev = self.prev, small
+        if prev is None or prev.shape != small.shape:
+            return np.full(small.shape, 255, dtype=np.uint8)
+        _, fg = cv2.threshold(cv2.absdiff(prev, small), self.pixel_delta, 255, cv2.THRESH_BINARY)
+        return fg
+
+    def observe(self, frame, zones):
+        """
+        Updates the reference / background with a camera frame and measures
+        motion inside the union of `zones` (lists of points). Returns its motion_ratio.
+        """
+        small = self._small_gray(frame)
+        fg = self._foreground(small)
+        zone_mask = self._get_zone_mask(zones, frame.shape, small.shape)
+
+        area = cv2.countNonZero(zone_mask)
+        if area:
+            moving = cv2.countNonZero(cv2.bitwise_and(fg, zone_mask))
+        else:
+            # No zones, or all outside this frame (e.g. drawn for another resolution): use the whole frame
+            area = fg.size
+            moving = cv2.countNonZero(fg)
+        self.mask = fg
+        self.motion_ratio = moving / area
+        self.peak_ratio = max(self.peak_ratio, self.motion_ratio)
+        return self.motion_ratio
+
+    def check(self, now=None):
+        """True if YOLO should run: motion on a frame observed since the last check, or keepalive."""
+        now = time.time() if now is None else now
+        moved, self.peak_ratio = self.peak_ratio >= self.threshold, 0.0
+        self.checked += 1
+
+        if moved or now - self.last_pass_time >= self.keepalive:
+            self.last_pass_time = now
+            return True
+        self.skipped += 1
+        return False
+
+    def untracked_motion(self, boxes, frame_shape):
+        """
+        Share of the zone area (last observe()) that moves outside the given
+        full-frame boxes: someone the tracker does not know about yet.
+        """
+        if self.mask is None or self.zone_mask is None or self.zone_mask.shape != self.mask.shape:
+            return 0.0
+        fg = cv2.bitwise_and(self.mask, self.zone_mask)
+        scale = self.mask.shape[1] / frame_shape[1]
+        for x1, y1, x2, y2 in np.round(np.asarray(boxes, dtype=np.float64) * scale).astype(np.int64).tolist():
+            fg[max(0, y1):max(0, y2), max(0, x1):max(0, x2)] = 0
+        area = cv2.countNonZero(self.zone_mask)
+        return cv2.countNonZero(fg) / area if area else 0.0
+
+    def stats(self):
+        return {
+            "method": self.method,
+            "motion_ratio": self.motion_ratio,
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / self.checked if self.checked else 0.0,
+        }
+
+    def draw(self, frame, position=None, color=(0, 255, 255)):
+        """Insets the last motion mask (zone area outlined) into a corner of the frame."""
+        if self.mask is None:
+            return
+        inset = cv2.cvtColor(self.mask, cv2.COLOR_GRAY2BGR)
+        if self.zone_mask is not None and self.zone_mask.shape == self.mask.shape:
+            contours, _ = cv2.findContours(self.zone_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            cv2.drawContours(inset, contours, -1, color, 1)
+        h, w = inset.shape[:2]
+        if position is None:
+            position = (frame.shape[1] - w - 20, 110)
+        x, y = position
+        if y + h > frame.shape[0] or x + w > frame.shape[1]:
+            return
+        frame[y:y + h, x:x + w] = inset
+        s = self.stats()
+        cv2.putText(frame, f"motion {s['motion_ratio'] * 100:.1f}%  skip {s['skip_ratio'] * 100:.0f}%",
+                    (x, y + h + 18), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
@@ -1,68 +1,184 @@
 # modules/producer.py
-import cv2
 import time
 import threading
 from core import config
+from utils import FPSCounter, FrameRing
+from modules.connector import SourceConnector
 
 class CameraProducer(threading.Thread):
-    def __init__(self):
+    def __init__(self, camera=None, ring=None):
         super().__init__()
         self.daemon = True  # Thread will die when main program exits
+        self.camera = config.camera_settings(camera)
+        self.camera_id = self.camera["id"]
         self.cap = None
-        self.last_frame = None
+        # Frames are decoded straight into a preallocated ring; readers borrow views.
+        # (The capture process passes in a shared-memory ring instead.)
+        self.ring = ring or FrameRing(config.FRAME_RING_SLOTS)
         self.is_running = True
-        
-        # Connect immediately
-        self.connect()
+        self.fps_counter = FPSCounter()  # decoded frames per second
+
+        # Decode-on-demand: every packet is grab()bed, only some are retrieve()d
+        self.decode_mode = self.camera["decode_mode"]
+        self.decode_interval = 1.0 / self.camera["decode_fps"] if self.camera["decode_fps"] else 0.0
+        idle_fps = self.camera["idle_decode_fps"]
+        self.idle_interval = 1.0 / idle_fps if idle_fps else None  # "request": decode this often anyway
+        self.last_decode_time = 0.0
+        self.grab_count = 0
+        self.decode_count = 0
+
+        # Connection management happens in run() (background), never in __init__
+        self.connector = SourceConnector(self.camera)
+        self.on_fallback = False
+        self.reconnects = 0
+        self.start_time = time.time()
+        self.time_to_first_frame = None  # seconds from creation to first frame
+        self.outage_start = None         # when the current outage began
+        self.last_recovery_time = None   # seconds from failure to first frame again
+        self.error = None                # why run() gave up, if it did
 
     def connect(self):
-        """Attempts RTSP connection first, falls back to Local Webcam."""
-        # 1. Attempt RTSP Connection
-        print(f"Producer: Connecting to RTSP: {config.RTSP_URL}")
-        self.cap = cv2.VideoCapture(config.RTSP_URL, cv2.CAP_FFMPEG)
-        
-        if self.cap.isOpened():
-            print("Producer: ✅ Connected to RTSP Stream.")
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        """
+        Opens RTSP or the webcam fallback (probed in parallel, with backoff).
+        Blocks the calling thread; run() calls it from the capture thread.
+        """
+        should_stop = lambda: not self.is_running
+        self.cap, is_primary = self.connector.connect(should_stop)
+        self.on_fallback = self.cap is not None and not is_primary
+        if self.on_fallback:
+            # Keep trying RTSP in the background and switch back when it returns
+            self.connector.watch_primary(lambda: not self.is_running or not self.on_fallback)
+        return self.cap is not None
+
+    def _switch_to_recovered_primary(self):
+        cap = self.connector.take_recovered()
+        if cap is None:
             return
+        self.cap.release()
+        self.cap = cap
+        self.on_fallback = False
+
+    def _on_read_failure(self):
+        print(f"Producer [{self.camera_id}]: Frame read failed. Reconnecting...")
+        self.cap.release()
+        self.cap = None
+        self.reconnects += 1
+        if self.outage_start is None:
+            self.outage_start = time.time()
 
-        # 2. Fallback to Local Webcam
-        print(f"Producer: ⚠️ RTSP failed. Switching to Webcam ({config.FALLBACK_CAM_INDEX})...")
-        self.cap = cv2.VideoCapture(config.FALLBACK_CAM_INDEX)
-        
-        if self.cap.isOpened():
-            print("Producer: ✅ Connected to Webcam.")
-        else:
-            print("Producer: ❌ Failed to connect to any camera.")
+    def _on_first_frame(self, now):
+        self.connector.mark_streaming()
+        if self.time_to_first_frame is None:
+            self.time_to_first_frame = now - self.start_time
+            print(f"Producer [{self.camera_id}]: ⏱️ First frame after {self.time_to_first_frame:.2f}s")
+        if self.outage_start is not None:
+            self.last_recovery_time = now - self.outage_start
+            self.outage_start = None
+            print(f"Producer [{self.camera_id}]: ⏱️ Recovered after {self.last_recovery_time:.2f}s")
 
     def run(self):
         """The loop that runs in the background thread."""
         while self.is_running:
             if self.cap is None:
-                time.sleep(1)
+                self.connect()
                 continue
 
-            ok, frame = self.cap.read()
+            if self.on_fallback:
+                self._switch_to_recovered_primary()
+
+            # grab() every packet so the stream never backs up (no colour conversion/copy)
+            ok = self.cap.grab()
+            grab_time = time.time()
+            if ok:
+                self.grab_count += 1
+                if self.time_to_first_frame is None or self.outage_start is not None:
+                    self._on_first_frame(grab_time)
+                if not self._should_decode(grab_time):
+                    continue
+
+                # Decode directly into the next ring slot (no per-frame allocation/copy)
+                buf = self.ring.begin_write()
+                ok, frame = self.cap.retrieve(buf) if buf is not None else self.cap.retrieve()
 
             if not ok or frame is None:
-                print("Producer: Frame read failed. Reconnecting...")
-                self.cap.release()
-                time.sleep(0.5)
-                self.connect()
+                self._on_read_failure()
                 continue
             
-            # Store the frame. 
-            # We make a copy to ensure the Consumer/Main thread doesn't read 
-            # this exact memory address while we overwrite it next loop.
-            self.last_frame = frame.copy()
+            # Publish the slot. Readers never see this buffer until it is complete,
+            # and the next read goes into a different slot.
+            try:
+                self.ring.commit(frame, grab_time)
+            except ValueError as e:
+                # Frame does not fit a shared-memory slot: stop instead of dying silently
+                print(f"Producer [{self.camera_id}]: ❌ {e}. Raise the camera's max_frame_bytes "
+                      f"(MAX_FRAME_BYTES) or set a capture width/height. Capture stopped.")
+                self.error = str(e)
+                self.is_running = False
+                break
+            self.last_decode_time = grab_time
+            self.decode_count += 1
+            self.fps_counter.update()
+
+    def _should_decode(self, now):
+        """Decides whether the packet just grabbed is worth decoding."""
+        if self.decode_mode == "all" or self.ring.seq == 0:
+            return True
+        if self.decode_mode == "target":
+            return now - self.last_decode_time >= self.decode_interval
+        # "demand": someone is waiting, or the last decoded frame has been read
+        # (decode_fps, if set, still caps the rate)
+        if now - self.last_decode_time < self.decode_interval:
+            return False
+        if self.decode_mode == "request":
+            if self.idle_interval is not None and now - self.last_decode_time >= self.idle_interval:
+                return True  # keeps recent frames in the ring to pick from by timestamp
+            return self.ring.has_waiters()
+        return self.ring.has_demand()
+
+    def borrow_frame(self):
+        """
+        Returns a read-only FrameRef to the latest frame without copying
+        (or None). Use is_frame_valid(ref.seq) afterwards to check the slot
+        was not overwritten while you were using it.
+        """
+        return self.ring.borrow()
+
+    def get_next_frame(self, after_seq=0, timeout=None):
+        """
+        Blocks until a frame with seq > after_seq has been captured.
+        Returns a read-only FrameRef (seq, timestamp, image) or None on timeout.
+        """
+        return self.ring.wait_next(after_seq, timeout)
+
+    def wait_frame_seq(self, after_seq=0, timeout=None):
+        """
+        Blocks until a frame with seq > after_seq exists and returns its seq
+        (None on timeout) without reading it: for watchers that only need to
+        know a frame arrived, and should not make the producer decode more.
+        """
+        return self.ring.wait_seq(after_seq, timeout)
+
+    def is_frame_valid(self, seq):
+        return self.ring.is_valid(seq)
 
     def get_frame(self):
-        """Returns the latest available frame."""
-        if self.last_frame is not None:
-            return self.last_frame.copy()
-        return None
+        """Returns a private, writable copy of the latest frame (for drawing)."""
+        return self.ring.copy_latest()
+
+    def get_stats(self):
+        return {
+            "capture_fps": self.fps_counter.fps,
+            "grabbed": self.grab_count,
+            "decoded": self.decode_count,
+            "connected": self.cap is not None,
+            "on_fallback": self.on_fallback,
+            "reconnects": self.reconnects,
+            "time_to_first_frame": self.time_to_first_frame,
+            "last_recovery_time": self.last_recovery_time,
+        }
 
     def stop(self):
         self.is_running = False
+        self.connector.release_recovered()
         if self.cap:
             self.cap.release()
\ No newline at end of file
@@ -0,0 +1,98 @@
+# modules/replay.py
+import time
+from utils import ReplayReader
+from modules.producer import CameraProducer
+
+class ReplayProducer(CameraProducer):
+    """
+    Drop-in CameraProducer that plays a recording (camera["replay"]) into
+    the frame ring, so detection, zones and UI can be tested and benchmarked
+    on identical footage.
+
+    - "realtime": frames are published at their recorded timestamps (scaled
+      by replay_speed). If the capture side falls behind, late frames are
+      skipped without being converted, like packets a live camera drops.
+    - "fast": no clock; the next frame is published as soon as a reader has
+      taken the previous one, so nothing is dropped and the pipeline runs at
+      its maximum throughput.
+    """
+    def __init__(self, camera=None):
+        super().__init__(camera)
+        self.source = self.camera["replay"]
+        self.pacing = self.camera["replay_pacing"]
+        self.speed = self.camera["replay_speed"] or 1.0
+        self.reader = ReplayReader(self.source, fps=self.camera["replay_fps"],
+                                   loop=self.camera["replay_loop"])
+        self.reader.seek(self.camera["replay_start_frame"])
+        self.dropped = 0
+        self.finished = False
+        self.clock_start = None  # (wall time, pts) of the first published frame
+
+    def connect(self):
+        if not self.reader.isOpened():
+            print(f"Replay [{self.camera_id}]: ❌ Could not open {self.source}")
+            return False
+        print(f"Replay [{self.camera_id}]: ▶️ Playing {self.source} ({self.pacing})")
+        self.cap = self.reader
+        return True
+
+    def run(self):
+        try:
+            if self.connect():
+                self._play()
+        finally:
+            # Released here, not in stop(): the reader belongs to this thread
+            self.reader.release()
+
+    def _play(self):
+        frame_interval = 1.0 / self.reader.fps / self.speed
+        while self.is_running:
+            if self.pacing == "fast" and self.ring.seq > 0:
+                # Back-pressure instead of a clock: wait for the frame to be taken
+                if not self.ring.wait_demand(timeout=0.1):
+                    continue
+
+            if not self.reader.grab():
+                print(f"Replay [{self.camera_id}]: ⏹️ End of {self.source}")
+                self.finished = True
+                break
+            self.grab_count += 1
+
+            if self.pacing == "realtime":
+                now = time.time()
+                if self.clock_start is None:
+                    self.clock_start = (now, self.reader.pts)
+                due = self.clock_start[0] + (self.reader.pts - self.clock_start[1]) / self.speed
+                if now - due > frame_interval:
+                    self.dropped += 1
+                    continue
+                if due > now:
+                    time.sleep(due - now)
+
+            buf = self.ring.begin_write()
+            ok, frame = self.reader.retrieve(buf) if buf is not None else self.reader.retrieve()
+            if not ok or frame is None:
+                self.dropped += 1
+                continue
+            stamp = time.time()
+            if self.time_to_first_frame is None:
+                self._on_first_frame(stamp)
+            self.ring.commit(frame, stamp)
+            self.last_decode_time = stamp
+            self.decode_count += 1
+            self.fps_counter.update()
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats.update({
+            "replay_frame": self.reader.index,
+            "replay_loops": self.reader.loops,
+            "dropped": self.dropped,
+            "finished": self.finished,
+        })
+        return stats
+
+    def stop(self):
+        self.is_running = False
+        if not self.is_alive():
+            self.reader.release()
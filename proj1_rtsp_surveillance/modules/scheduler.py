@@ -0,0 +1,98 @@
+# modules/scheduler.py
+import time
+from core import config
+
+class InferenceScheduler:
+    """
+    Decides which frames PersonDetector runs YOLO on.
+
+    "fixed" mode is the old behaviour (every skip_every_n-th camera frame).
+    "adaptive" mode picks a minimum interval between inference runs from:
+      - a rolling average of the measured inference time,
+      - SCHED_MAX_DUTY: YOLO never takes more than this share of wall time,
+        so capture and rendering keep their CPU,
+      - the camera's latency budget: while people are in view, detections
+        should never be older than `latency_budget`,
+      - scene activity: someone inside the zone -> run as often as the duty
+        limit allows; nobody seen for SCHED_IDLE_AFTER seconds -> slow down
+        to SCHED_IDLE_INTERVAL.
+    telemetry() reports the current decision.
+    """
+    def __init__(self, camera):
+        self.mode = camera["scheduler"]
+        self.skip_every_n = camera["skip_every_n"]
+        self.latency_budget = camera["latency_budget"]
+        self.max_duty = config.SCHED_MAX_DUTY
+        self.idle_interval = config.SCHED_IDLE_INTERVAL
+        self.idle_after = config.SCHED_IDLE_AFTER
+
+        self.avg_infer_time = None     # rolling (EWMA) seconds per inference
+        self.last_run_time = 0.0       # when the last inference started
+        self.last_activity_time = time.time()  # last time anyone was detected
+        self.people = 0
+        self.inside = 0
+        self.state = "active"
+        self.interval = 0.0            # current minimum seconds between runs
+        self.over_budget = False       # inference alone cannot meet the budget
+
+    def should_run(self, frames_since_last, now=None):
+        """True if the current frame should go through YOLO."""
+        if self.mode == "fixed":
+            return frames_since_last >= self.skip_every_n
+        now = time.time() if now is None else now
+        self.interval = self._decide(now)
+        return now - self.last_run_time >= self.interval
+
+    def _decide(self, now):
+        if self.avg_infer_time is None:
+            self.state = "warmup"
+            return 0.0
+        min_interval = self.avg_infer_time / self.max_duty
+        # Detection age is roughly interval + inference time
+        budget_interval = self.latency_budget - self.avg_infer_time
+        self.over_budget = budget_interval < min_interval
+
+        if self.inside > 0:
+            self.state = "alert"
+            return min_interval
+        if self.people > 0 or now - self.last_activity_time < self.idle_after:
+            self.state = "active"
+            return max(min_interval, budget_interval)
+        self.state = "idle"
+        return max(min_interval, self.idle_interval)
+
+    def on_run_start(self, now):
+        self.last_run_time = now
+
+    def on_result(self, infer_time, detections, now=None):
+        """Feeds back the measured inference time and what was seen."""
+        now = time.time() if now is None else now
+        if self.avg_infer_time is None:
+            self.avg_infer_time = infer_time
+        else:
+            self.avg_infer_time += 0.2 * (infer_time - self.avg_infer_time)
+        self.people = len(detections)
+        self.inside = int(detections.inside.sum())
+        if self.people:
+            self.last_activity_time = now
+
+    def telemetry(self):
+        return {
+            "mode": self.mode,
+            "state": self.state if self.mode == "adaptive" else "fixed",
+            "interval": self.interval,
+            "target_hz": 1.0 / self.interval if self.interval > 0 else None,
+            "infer_ms": None if self.avg_infer_time is None else self.avg_infer_time * 1000.0,
+            "over_budget": self.over_budget,
+            "people": self.people,
+            "inside": self.inside,
+        }
+
+    def describe(self):
+        """One-line HUD summary."""
+        t = self.telemetry()
+        if self.mode == "fixed":
+            return f"AI: every {self.skip_every_n} frames"
+        rate = f"{t['target_hz']:.1f}Hz" if t["target_hz"] else "max"
+        infer = f"{t['infer_ms']:.0f}ms" if t["infer_ms"] is not None else "-"
+        return f"AI: {t['state']} {rate} (infer {infer})" + ("  OVER BUDGET" if t["over_budget"] else "")
@@ -2,6 +2,7 @@
 import cv2
 import time
 from core import config
+from utils import open_capture
 
 class RTSPStreamer:
     def __init__(self):
@@ -14,7 +15,7 @@ class RTSPStreamer:
         
         # 1. Attempt RTSP Connection
         print(f"Attempting connection to RTSP: {config.RTSP_URL}")
-        self.cap = cv2.VideoCapture(config.RTSP_URL, cv2.CAP_FFMPEG)
+        self.cap = open_capture(config.RTSP_URL, **config.capture_options(config.camera_settings()))
         
         if self.cap.isOpened():
             print("✅ Connected to RTSP Stream.")
@@ -25,7 +26,7 @@ class RTSPStreamer:
         print(f"⚠️ RTSP connection failed.")
         print(f"🔄 Switching to Local Webcam (Index {config.FALLBACK_CAM_INDEX})...")
         
-        self.cap = cv2.VideoCapture(config.FALLBACK_CAM_INDEX)
+        self.cap = open_capture(config.FALLBACK_CAM_INDEX)
         
         if self.cap.isOpened():
             print("✅ Connected to Local Webcam.")
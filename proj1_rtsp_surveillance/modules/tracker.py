@@ -0,0 +1,224 @@
+# modules/tracker.py
+import threading
+import time
+import numpy as np
+
+def iou_matrix(a, b):
+    """Pairwise IoU of two (N, 4) / (M, 4) xyxy box arrays -> (N, M)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+def greedy_match(iou, threshold):
+    """Pairs (row, col) by descending IoU, each row/col used once, IoU >= threshold."""
+    pairs, used_rows, used_cols = [], set(), set()
+    if iou.size:
+        for flat in np.argsort(-iou, axis=None):
+            r, c = np.unravel_index(flat, iou.shape)
+            if iou[r, c] < threshold:
+                break
+            if r in used_rows or c in used_cols:
+                continue
+            used_rows.add(r)
+            used_cols.add(c)
+            pairs.append((int(r), int(c)))
+    return pairs
+
+class IoUTracker:
+    """
+    Minimal tracker for detector backends without ultralytics' trackers.
+    Detections are matched greedily to the previous boxes of live tracks by
+    IoU; unmatched detections start new tracks, tracks unseen for max_age
+    updates are dropped.
+    """
+    def __init__(self, iou_threshold=0.3, max_age=30):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.boxes = np.zeros((0, 4), dtype=np.float32)  # last box per live track
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.ages = np.zeros(0, dtype=np.int64)          # updates since last match
+        self.next_id = 1
+
+    def update(self, dets):
+        """
+        dets: (N, 6) array x1, y1, x2, y2, conf, cls.
+        Returns (N, 7): the same rows with the track id appended.
+        """
+        ids = np.full(len(dets), -1, dtype=np.int64)
+        matched_tracks = set()
+        # Greedy: best overlaps first
+        for t, d in greedy_match(iou_matrix(self.boxes, dets[:, :4]), self.iou_threshold):
+            matched_tracks.add(t)
+            ids[d] = self.ids[t]
+            self.boxes[t] = dets[d, :4]
+            self.ages[t] = 0
+
+        unmatched = np.ones(len(self.ids), dtype=bool)
+        unmatched[list(matched_tracks)] = False
+        self.ages[unmatched] += 1
+
+        new = ids == -1
+        if new.any():
+            ids[new] = np.arange(self.next_id, self.next_id + new.sum())
+            self.next_id += int(new.sum())
+            self.boxes = np.vstack([self.boxes, dets[new, :4]]).astype(np.float32)
+            self.ids = np.concatenate([self.ids, ids[new]])
+            self.ages = np.concatenate([self.ages, np.zeros(int(new.sum()), dtype=np.int64)])
+
+        alive = self.ages <= self.max_age
+        self.boxes, self.ids, self.ages = self.boxes[alive], self.ids[alive], self.ages[alive]
+        return np.hstack([dets[:, :6], ids[:, None].astype(dets.dtype)])
+
+def _to_cxcywh(boxes):
+    return np.column_stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+                            boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]])
+
+def _to_xyxy(cxcywh):
+    cx, cy, w, h = cxcywh.T
+    return np.column_stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+# Kalman noise, relative to the box height (in seconds for the rates)
+_STD_POS = 0.05     # measurement noise of x, y, w, h
+_STD_PROC_POS = 0.1 # process noise of the position, per second
+_STD_PROC_VEL = 1.0 # process noise of the velocity, per second
+_STD_INIT_VEL = 2.0 # initial velocity uncertainty
+
+class KalmanTracker:
+    """
+    Constant-velocity Kalman filter per track on (cx, cy, w, h), with IoU
+    matching against the predicted boxes (center distance as a fallback
+    when they no longer overlap). It fills the frames between
+    detector runs: update() on every detection result, predict(t) on any
+    frame in between gives the boxes where the people are now.
+
+    Time is in seconds (capture timestamps), so irregular detector cadence
+    is handled. Detections that already carry a track id (ultralytics or
+    the service's tracker) are matched to the track with that id first;
+    the rest by IoU with the predictions. All tracks are filtered together
+    with batched numpy matrices.
+    """
+    def __init__(self, iou_threshold=0.3, max_age=30, max_ahead=1.0):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age        # updates without a match before a track is dropped
+        self.max_ahead = max_ahead    # s; predictions never extrapolate further than this
+        self.x = np.zeros((0, 8))     # cx, cy, w, h, vx, vy, vw, vh (px, px/s)
+        self.P = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.ages = np.zeros(0, dtype=np.int64)
+        self.last = np.zeros((0, 2), dtype=np.float32)  # conf, cls of the last match
+        self.t = None                 # time the state refers to
+        self.next_id = 1
+        self.lock = threading.Lock()  # update() and predict() may run on different threads
+
+    def _predict_state(self, dt):
+        if dt <= 0 or not len(self.x):
+            return
+        self.x[:, :4] += dt * self.x[:, 4:]
+        F = np.eye(8)
+        F[:4, 4:] = dt * np.eye(4)
+        h = np.maximum(self.x[:, 3], 1.0)
+        q = np.concatenate([np.tile((_STD_PROC_POS * h)[:, None], 4),
+                            np.tile((_STD_PROC_VEL * h)[:, None], 4)], axis=1) ** 2 * dt
+        self.P = F @ self.P @ F.T + q[:, :, None] * np.eye(8)
+        # Boxes don't shrink to nothing when extrapolated
+        self.x[:, 2:4] = np.maximum(self.x[:, 2:4], 1.0)
+
+    def _correct(self, idx, z):
+        """Kalman update of tracks idx with measurements z (cx, cy, w, h)."""
+        P = self.P[idx]
+        R = (_STD_POS * np.maximum(z[:, 3], 1.0))[:, None, None] ** 2 * np.eye(4)
+        S = P[:, :4, :4] + R
+        K = P[:, :, :4] @ np.linalg.inv(S)            # (n, 8, 4)
+        y = z - self.x[idx, :4]
+        self.x[idx] += (K @ y[:, :, None])[:, :, 0]
+        self.P[idx] = P - K @ P[:, :4, :]
+
+    def update(self, dets, t=None):
+        """
+        dets: (N, 7) x1, y1, x2, y2, conf, cls, track_id (-1 = none) or (N, 6).
+        Returns (N, 7): the same rows with track ids filled in.
+        """
+        t = time.time() if t is None else t
+        given = dets[:, 6].astype(np.int64) if dets.shape[1] > 6 else np.full(len(dets), -1, dtype=np.int64)
+        with self.lock:
+            if self.t is not None:
+                self._predict_state(t - self.t)
+            self.t = t
+
+            ids = np.full(len(dets), -1, dtype=np.int64)
+            track_of = np.full(len(dets), -1, dtype=np.int64)  # matched track index
+            index = {tid: i for i, tid in enumerate(self.ids.tolist())}
+            for d, tid in enumerate(given.tolist()):
+                if tid != -1 and tid in index:
+                    track_of[d] = index[tid]
+            # Everything else by IoU against the predicted boxes
+            free_dets = np.flatnonzero((track_of == -1) & (given == -1))
+            free_tracks = np.setdiff1d(np.arange(len(self.ids)), track_of[track_of >= 0])
+            iou = iou_matrix(_to_xyxy(self.x[free_tracks, :4]), dets[free_dets, :4])
+            for r, c in greedy_match(iou, self.iou_threshold):
+                track_of[free_dets[c]] = free_tracks[r]
+            # Fast movers between sparse detections may no longer overlap their
+            # prediction: fall back to center distance (within a box height)
+            free_dets = free_dets[track_of[free_dets] == -1]
+            free_tracks = np.setdiff1d(free_tracks, track_of[track_of >= 0])
+            if len(free_dets) and len(free_tracks):
+                pred = self.x[free_tracks, :4]
+                z = _to_cxcywh(dets[free_dets, :4].astype(np.float64))
+                dist = np.linalg.norm(pred[:, None, :2] - z[None, :, :2], axis=2)
+                closeness = 1.0 - dist / np.maximum(pred[:, None, 3], z[None, :, 3])
+                for r, c in greedy_match(closeness, 1e-6):
+                    track_of[free_dets[c]] = free_tracks[r]
+
+            matched = track_of >= 0
+            z = _to_cxcywh(dets[:, :4].astype(np.float64))
+            if matched.any():
+                self._correct(track_of[matched], z[matched])
+                ids[matched] = self.ids[track_of[matched]]
+                self.last[track_of[matched]] = dets[matched, 4:6]
+            self.ages += 1
+            self.ages[track_of[matched]] = 0
+
+            new = ~matched
+            if new.any():
+                new_ids = given[new].copy()
+                own = new_ids == -1
+                new_ids[own] = np.arange(self.next_id, self.next_id + own.sum())
+                ids[new] = new_ids
+                self.next_id = max(self.next_id + int(own.sum()), int(new_ids.max()) + 1)
+                x = np.zeros((int(new.sum()), 8))
+                x[:, :4] = z[new]
+                h = np.maximum(z[new, 3], 1.0)
+                std = np.concatenate([np.tile((2 * _STD_POS * h)[:, None], 4),
+                                      np.tile((_STD_INIT_VEL * h)[:, None], 4)], axis=1)
+                self.x = np.vstack([self.x, x])
+                self.P = np.concatenate([self.P, std[:, :, None] ** 2 * np.eye(8)])
+                self.ids = np.concatenate([self.ids, new_ids])
+                self.ages = np.concatenate([self.ages, np.zeros(len(new_ids), dtype=np.int64)])
+                self.last = np.vstack([self.last, dets[new, 4:6]]).astype(np.float32)
+
+            alive = self.ages <= self.max_age
+            self.x, self.P, self.ids = self.x[alive], self.P[alive], self.ids[alive]
+            self.ages, self.last = self.ages[alive], self.last[alive]
+        return np.column_stack([dets[:, :6], ids.astype(dets.dtype)])
+
+    def predict(self, t):
+        """
+        (M, 7) x1, y1, x2, y2, conf, cls, track_id of the tracks matched in
+        the last update, moved to time t (state is not changed).
+        """
+        with self.lock:
+            live = self.ages == 0
+            if self.t is None or not live.any():
+                return np.zeros((0, 7), dtype=np.float32)
+            dt = min(max(t - self.t, 0.0), self.max_ahead)
+            x = self.x[live]
+            cxcywh = x[:, :4] + dt * x[:, 4:]
+            cxcywh[:, 2:] = np.maximum(cxcywh[:, 2:], 1.0)
+            return np.column_stack([_to_xyxy(cxcywh), self.last[live], self.ids[live]]).astype(np.float32)
@@ -0,0 +1,40 @@
+# tests/test_detections.py
+import numpy as np
+from modules.detections import Detections
+
+def _detections():
+    boxes = np.array([[0, 0, 10, 20], [100, 100, 120, 140], [50, 50, 60, 60]], dtype=np.int64)
+    zones = np.array([[True, False], [False, True], [True, True]])
+    return Detections(boxes, np.array([0.9, 0.8, 0.7], dtype=np.float32), np.array([1, -1, 3]),
+                      np.array([True, False, True]), zones, ["door", "hall"], seq=5, timestamp=1.5)
+
+def test_empty():
+    empty = Detections.empty(["door"], seq=2)
+    assert len(empty) == 0
+    assert empty.zones.shape == (0, 1)
+    assert empty.occupancy() == {"door": 0}
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    assert empty.draw(frame) is frame
+
+def test_centers_occupancy_and_zone_names():
+    d = _detections()
+    assert d.centers.tolist() == [[5, 10], [110, 120], [55, 55]]
+    assert d.occupancy() == {"door": 2, "hall": 2}
+    assert d.zones_of(2) == ["door", "hall"]
+
+def test_subset_keeps_frame_and_zones():
+    d = _detections()[np.array([False, True, True])]
+    assert len(d) == 2
+    assert d.track_id.tolist() == [-1, 3]
+    assert (d.seq, d.timestamp, d.zone_names) == (5, 1.5, ["door", "hall"])
+
+def test_scaled_maps_boxes_only():
+    d = _detections().scaled(2.0, 0.5)
+    assert d.boxes[1].tolist() == [200, 50, 240, 70]
+    assert d.inside.tolist() == [True, False, True]
+    assert d.seq == 5
+
+def test_draw_marks_the_frame():
+    frame = np.zeros((200, 200, 3), dtype=np.uint8)
+    _detections().draw(frame)
+    assert frame.any()
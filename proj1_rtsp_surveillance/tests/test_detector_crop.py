@@ -0,0 +1,51 @@
+# tests/test_detector_crop.py
+import numpy as np
+import pytest
+from modules.detector import PersonDetector
+
+FRAME_SHAPE = (360, 640, 3)
+
+class CropService:
+    """Detector service stand-in: records detect_batch() calls, finds nobody."""
+    def __init__(self):
+        self.calls = []
+
+    def detect_batch(self, images, imgsz, conf):
+        for image in images:
+            if image.shape[0] == 0 or image.shape[1] == 0:
+                raise ZeroDivisionError(f"empty crop {image.shape}")
+        self.calls.append([image.shape for image in images])
+        return [np.zeros((0, 7), dtype=np.float32) for _ in images]
+
+@pytest.fixture
+def detector(monkeypatch):
+    service = CropService()
+    detector = PersonDetector(service=service, camera={"id": "crop", "crop_inference": True})
+    detector.last_full_time = 0.0  # a full pass just ran: the next one uses crops
+
+    def tracks(boxes):
+        rows = np.array([[*box, 0.9, 0, i + 1] for i, box in enumerate(boxes)], dtype=np.float32)
+        monkeypatch.setattr(detector.predictor, "predict", lambda t: rows)
+    return detector, service, tracks
+
+def test_crop_regions_off_frame_are_empty():
+    boxes = np.array([[700, 100, 800, 300], [100, 40, 200, 300]], dtype=np.float32)
+    regions = PersonDetector.crop_regions(boxes, FRAME_SHAPE)
+    assert regions[0, 2] <= regions[0, 0]
+    assert (regions[1, 2:] > regions[1, :2]).all()
+
+def test_off_frame_track_is_dropped_and_marks_the_pass_lost(detector):
+    detector, service, tracks = detector
+    tracks([[700, 100, 800, 300], [100, 40, 200, 300]])
+    detector.run_crop_mode(np.zeros(FRAME_SHAPE, dtype=np.uint8), seq=1, timestamp=0.1)
+    assert len(service.calls) == 1 and len(service.calls[0]) == 1  # only the on-frame crop
+    assert detector.passes["crops"] == 1
+    assert detector.track_lost  # the next pass looks at the whole frame
+
+def test_only_off_frame_tracks_fall_back_to_a_full_pass(detector):
+    detector, service, tracks = detector
+    tracks([[700, 100, 800, 300]])
+    detector.run_crop_mode(np.zeros(FRAME_SHAPE, dtype=np.uint8), seq=1, timestamp=0.1)
+    assert service.calls == [[FRAME_SHAPE]]
+    assert detector.passes == {"full": 1, "crops": 0, "crop_images": 0}
+    assert not detector.track_lost
@@ -0,0 +1,40 @@
+# tests/test_ffmpeg_capture.py
+import sys
+import numpy as np
+import pytest
+from rtsp_common import FFmpegCapture
+
+W, H, FRAMES = 16, 8, 6
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    """Stands in for ffmpeg: writes FRAMES raw BGR frames (value 10 * i), split over two writes."""
+    script = tmp_path / "ffmpeg"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "out = sys.stdout.buffer\n"
+        f"for i in range({FRAMES}):\n"
+        f"    frame = bytes([10 * i]) * {W * H * 3}\n"
+        "    out.write(frame[:100]); out.flush()\n"
+        "    out.write(frame[100:]); out.flush()\n")
+    script.chmod(0o755)
+    return str(script)
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake ffmpeg is a shebang script")
+def test_retrieve_reads_straight_into_the_given_buffer(fake_ffmpeg):
+    cap = FFmpegCapture("clip.mp4", width=W, height=H, ffmpeg_bin=fake_ffmpeg)
+    try:
+        buf = np.zeros((H, W, 3), dtype=np.uint8)
+        seen = []
+        for i in range(FRAMES):
+            assert cap.grab()
+            if i % 2 == 0:  # frames that are grabbed but not retrieved are skipped
+                ok, frame = cap.retrieve(buf)
+                assert ok and frame is buf
+                seen.append(int(frame[0, 0, 0]) if (frame == frame[0, 0, 0]).all() else None)
+        assert seen == [0, 20, 40]
+        assert not cap.grab()  # EOF
+        assert cap.retrieve(buf) == (False, None)
+    finally:
+        cap.release()
@@ -0,0 +1,42 @@
+# tests/test_frame_history.py
+import numpy as np
+import pytest
+from utils import FrameHistory, FrameRef
+
+def _ref(seq, value=None):
+    return FrameRef(seq, float(seq), np.full((2, 2, 3), seq if value is None else value, dtype=np.uint8))
+
+def test_keeps_the_last_size_frames_whatever_their_seqs():
+    history = FrameHistory(size=4)
+    # Sparse seqs whose gaps are multiples of the size
+    for seq in (4, 8, 12, 16, 20):
+        history.add(_ref(seq))
+    assert history.get(4) is None
+    assert [history.get(seq).seq for seq in (8, 12, 16, 20)] == [8, 12, 16, 20]
+
+def test_stored_frames_are_private_copies():
+    history = FrameHistory(size=2)
+    source = _ref(1)
+    stored = history.add(source)
+    source.image[:] = 99
+    assert stored.image[0, 0, 0] == 1
+
+def test_a_returned_frame_never_changes():
+    history = FrameHistory(size=2)
+    first = history.add(_ref(1))
+    for seq in range(2, 6):
+        history.add(_ref(seq))
+    assert history.get(1) is None
+    assert first.seq == 1 and first.image[0, 0, 0] == 1
+
+def test_add_is_once_per_seq_and_discard_forgets():
+    history = FrameHistory(size=2)
+    stored = history.add(_ref(1))
+    assert history.add(_ref(1, value=50)) is stored
+    history.discard(1)
+    assert history.get(1) is None
+    assert history.get(None) is None
+
+def test_needs_two_slots():
+    with pytest.raises(ValueError):
+        FrameHistory(size=1)
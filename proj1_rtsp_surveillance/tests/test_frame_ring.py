@@ -0,0 +1,99 @@
+# tests/test_frame_ring.py
+import multiprocessing as mp
+import threading
+import time
+import numpy as np
+import pytest
+from utils import FrameRing, SharedFrameRing
+
+def _frame(value, shape=(4, 6, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+@pytest.fixture(params=["local", "shared"])
+def ring(request):
+    if request.param == "local":
+        yield FrameRing(4)
+    else:
+        shared = SharedFrameRing(mp.get_context("spawn").Condition(), num_slots=4, max_frame_bytes=4 * 6 * 3)
+        yield shared
+        shared.close()
+
+def _write(ring, value, timestamp=None):
+    buf = ring.begin_write()
+    frame = _frame(value)
+    if buf is not None:
+        buf[:] = frame
+        frame = buf
+    return ring.commit(frame, timestamp)
+
+def test_empty_ring_has_nothing_to_borrow(ring):
+    assert ring.borrow() is None
+    assert ring.nearest(0.0) is None
+    assert ring.wait_next(0, timeout=0.01) is None
+
+def test_borrow_returns_newest_read_only_view(ring):
+    for i in range(1, 4):
+        _write(ring, i, timestamp=10.0 + i)
+    ref = ring.borrow()
+    assert (ref.seq, ref.timestamp) == (3, 13.0)
+    assert ref.image[0, 0, 0] == 3
+    assert not ref.image.flags.writeable
+    assert ref.decoded is not None
+
+def test_slot_is_invalid_once_overwritten(ring):
+    _write(ring, 1)
+    ref = ring.borrow()
+    assert ring.is_valid(ref.seq)
+    for i in range(2, 6):
+        _write(ring, i)
+    assert not ring.is_valid(ref.seq)
+    assert ring.is_valid(5)
+
+def test_wait_next_wakes_on_commit(ring):
+    _write(ring, 1)
+    threading.Timer(0.05, _write, args=(ring, 2)).start()
+    ref = ring.wait_next(1, timeout=2.0)
+    assert ref is not None and ref.seq == 2
+
+def test_wait_seq_is_not_demand(ring):
+    _write(ring, 1)
+    ring.wait_seq(0, timeout=0.01)
+    assert not ring.has_demand()
+    ring.borrow()
+    assert ring.has_demand()
+
+def test_nearest_picks_closest_capture_time(ring):
+    for i in range(1, 7):
+        _write(ring, i, timestamp=10.0 + i)
+    # Slots hold seq 3..6 (t = 13..16)
+    assert ring.nearest(14.4).seq == 4
+    assert ring.nearest(0.0).seq == 3
+    assert ring.nearest(99.0).seq == 6
+
+def test_shared_ring_rejects_frames_larger_than_a_slot():
+    ring = SharedFrameRing(mp.get_context("spawn").Condition(), num_slots=2, max_frame_bytes=10)
+    try:
+        with pytest.raises(ValueError):
+            ring.commit(_frame(1))
+        assert ring.seq == 0
+    finally:
+        ring.close()
+
+def test_ring_needs_two_slots():
+    with pytest.raises(ValueError):
+        FrameRing(1)
+
+def test_closing_shared_ring_releases_blocked_readers():
+    ring = SharedFrameRing(mp.get_context("spawn").Condition(), num_slots=2, max_frame_bytes=4 * 6 * 3)
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(ring.wait_next(0, timeout=5.0))),
+               threading.Thread(target=lambda: results.append(ring.wait_seq(0, timeout=5.0)))]
+    for reader in readers:
+        reader.start()
+    time.sleep(0.1)
+    ring.close()
+    for reader in readers:
+        reader.join(timeout=2.0)
+    assert not any(reader.is_alive() for reader in readers)
+    assert results == [None, None]
+    assert ring.borrow() is None and not ring.is_valid(1) and not ring.has_demand()
@@ -0,0 +1,103 @@
+# tests/test_inference_pool.py
+import sys
+import threading
+import time
+import numpy as np
+import pytest
+from core import config
+from modules import inference_backends
+from modules.detector import PersonDetector
+from modules.inference_pool import InferencePool, PooledConsumer
+from utils import FrameRing
+
+HANG = 255  # frames of this value never finish on a pool worker
+
+class FakeEngine:
+    """Stand-in model for the pool workers: one box per frame, or hangs."""
+    def detect(self, frame, conf):
+        value = float(frame[0, 0, 0])
+        if value == HANG:
+            time.sleep(60)
+        return np.array([[value, 10, value + 50, 100, 0.9, 0]], dtype=np.float32)
+
+@pytest.fixture
+def pool(monkeypatch):
+    if not sys.platform.startswith("linux"):
+        pytest.skip("needs fork to hand the fake engine to the workers")
+    monkeypatch.setattr(config, "CAPTURE_PROCESS_START_METHOD", "fork")
+    monkeypatch.setattr(config, "POOL_PIN_CORES", False)
+    monkeypatch.setattr(config, "POOL_SLOTS_PER_WORKER", 2)
+    monkeypatch.setattr(config, "MAX_FRAME_BYTES", 120 * 160 * 3)
+    monkeypatch.setattr(inference_backends, "create_engine", lambda backend, path, imgsz: FakeEngine())
+    pool = InferencePool(workers=2, dispatch="round_robin", threads=1, backend="onnxruntime")
+    yield pool
+    pool.stop()
+
+def _frame(value):
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+def test_results_come_back_in_frame_order(pool):
+    delivered = []
+    jobs = [pool.submit("cam", seq, _frame(seq), 320, 0.3, callback=lambda job: delivered.append(job.seq))
+            for seq in range(1, 21)]
+    for job in jobs:
+        assert job.done.wait(10)
+    assert delivered == list(range(1, 21))
+    assert len({job.result[0, 6] for job in jobs}) == 1  # one track across workers
+
+def test_dead_worker_does_not_freeze_its_camera_while_others_are_busy(pool):
+    delivered = []
+    callback = lambda job: delivered.append(job.seq)
+    # Round robin: frames 2 and 4 go to worker 1, which hangs on frame 2
+    jobs = [pool.submit("cam", seq, _frame(HANG if seq == 2 else seq), 320, 0.3, callback=callback)
+            for seq in range(1, 5)]
+    pool.workers[1].process.kill()
+    pool.workers[1].process.join(5)
+    # Keep the results queue busy with frames on the live worker
+    for seq in range(5, 80):
+        jobs.append(pool.submit("cam", seq, _frame(seq), 320, 0.3, callback=callback))
+        time.sleep(0.02)
+    # The camera got going again while the queue was still busy
+    assert len(delivered) > 40
+    for job in jobs:
+        assert job.done.wait(10)
+    assert delivered == list(range(1, 80))
+    assert len(jobs[1].result) == 0 and len(jobs[3].result) == 0  # failed, not detected
+    assert not pool.get_stats()["workers"][1]["alive"]
+
+class FailingPool:
+    def __init__(self, error):
+        self.error = error
+
+    def submit(self, *args, **kwargs):
+        raise self.error
+
+class RingProducer:
+    def __init__(self):
+        self.ring = FrameRing(4)
+
+    def get_next_frame(self, after_seq=0, timeout=None):
+        return self.ring.wait_next(after_seq, timeout)
+
+    def is_frame_valid(self, seq):
+        return self.ring.is_valid(seq)
+
+@pytest.mark.parametrize("error", [ValueError("frame too big"), RuntimeError("pool stopped")])
+def test_pooled_consumer_survives_submit_errors(monkeypatch, error):
+    monkeypatch.setattr(time, "sleep", lambda seconds: threading.Event().wait(0.01))
+    pool = FailingPool(error)
+    producer = RingProducer()
+    detector = PersonDetector(service=pool, camera={"id": "pooled", "scheduler": "fixed", "skip_every_n": 1})
+    consumer = PooledConsumer(producer, pool, detector=detector, max_in_flight=2)
+    consumer.start()
+    try:
+        for _ in range(4):
+            producer.ring.commit(_frame(1))
+            threading.Event().wait(0.05)
+        threading.Event().wait(0.1)
+        assert consumer.is_alive()
+        assert consumer.submit_errors >= 3
+        # Every slot was given back
+        assert consumer.in_flight.acquire(timeout=0.1) and consumer.in_flight.acquire(timeout=0.1)
+    finally:
+        consumer.stop()
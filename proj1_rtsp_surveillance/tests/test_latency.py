@@ -0,0 +1,33 @@
+# tests/test_latency.py
+import pytest
+from utils import LatencyHistogram, LatencyTracer
+
+def test_percentiles_are_accurate_to_one_bucket():
+    hist = LatencyHistogram()
+    for ms in range(1, 101):
+        hist.record(ms / 1000.0)
+    width = 10 ** (1 / hist.buckets_per_decade)  # ratio between bucket edges
+    assert 50 <= hist.percentile(50) <= 50 * width
+    assert 95 <= hist.percentile(95) <= 95 * width
+    assert hist.percentile(100) == pytest.approx(100.0)
+    summary = hist.summary()
+    assert summary["count"] == 100
+    assert summary["mean_ms"] == pytest.approx(50.5)
+    assert summary["max_ms"] == pytest.approx(100.0)
+    assert summary["last_ms"] == pytest.approx(100.0)
+
+def test_extremes_are_clamped_to_the_edge_buckets():
+    hist = LatencyHistogram()
+    hist.record(0.0)
+    hist.record(1e6)
+    assert hist.counts[0] == 1 and hist.counts[-1] == 1
+    assert LatencyHistogram().percentile(99) == 0.0
+
+def test_tracer_orders_known_stages_first():
+    tracer = LatencyTracer()
+    tracer.record("custom", 0.001)
+    tracer.record_span("render", 1.0, 1.002)
+    tracer.record_span("decode", 1.0, 1.001)
+    tracer.record_span("zone", None, 1.0)  # unknown start: ignored
+    assert tracer.stages() == ["decode", "render", "custom"]
+    assert tracer.summary()["render"]["count"] == 1
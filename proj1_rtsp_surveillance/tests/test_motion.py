@@ -0,0 +1,29 @@
+# tests/test_motion.py
+import numpy as np
+from core import config
+from modules.motion import MotionGate
+
+ZONES = [[[0, 0], [100, 0], [100, 100], [0, 100]],        # top left
+         [[300, 300], [400, 300], [400, 400], [300, 400]]]  # bottom right
+
+def _gate(monkeypatch):
+    monkeypatch.setattr(config, "MOTION_METHOD", "diff")
+    monkeypatch.setattr(config, "MOTION_ZONE_MARGIN", 0)
+    gate = MotionGate()
+    gate.observe(np.zeros((400, 400, 3), dtype=np.uint8), ZONES)
+    gate.check(now=0.0)  # first check passes (keepalive)
+    return gate
+
+def test_motion_in_any_zone_counts(monkeypatch):
+    gate = _gate(monkeypatch)
+    frame = np.zeros((400, 400, 3), dtype=np.uint8)
+    frame[320:380, 320:380] = 255  # only the second zone changes
+    assert gate.observe(frame, ZONES) > 0
+    assert gate.check(now=1.0)
+
+def test_motion_outside_all_zones_is_skipped(monkeypatch):
+    gate = _gate(monkeypatch)
+    frame = np.zeros((400, 400, 3), dtype=np.uint8)
+    frame[150:250, 150:250] = 255  # between the zones
+    assert gate.observe(frame, ZONES) == 0
+    assert not gate.check(now=1.0)
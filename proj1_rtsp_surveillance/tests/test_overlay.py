@@ -0,0 +1,42 @@
+# tests/test_overlay.py
+import cv2
+import numpy as np
+from utils.overlay import OverlayCompositor
+
+def _frame():
+    return np.full((60, 80, 3), 40, dtype=np.uint8)
+
+def _draw(frame, compositor, layers):
+    compositor.begin(frame.shape)
+    for name, key, render in layers:
+        compositor.layer(name, key, render)
+    return compositor.apply(frame)
+
+def test_cached_layers_match_direct_drawing():
+    box = lambda img: cv2.rectangle(img, (5, 5), (30, 20), (0, 0, 255), -1)
+    text = lambda img: cv2.rectangle(img, (50, 40), (70, 55), (255, 255, 0), -1)
+    expected = text(box(_frame()))
+    compositor = OverlayCompositor()
+    for _ in range(3):
+        out = _draw(_frame(), compositor, [("box", 1, box), ("text", 1, text)])
+        assert np.array_equal(out, expected)
+    assert compositor.renders == 2
+
+def test_anti_aliased_edges_are_blended_not_cut():
+    line = lambda img: cv2.line(img, (5, 5), (70, 50), (255, 255, 255), 1, cv2.LINE_AA)
+    out = _draw(_frame(), OverlayCompositor(), [("line", 1, line)])
+    expected = line(_frame())
+    assert np.abs(out.astype(int) - expected).max() <= 2
+
+def test_only_changed_layers_are_re_rasterized():
+    compositor = OverlayCompositor()
+    calls = []
+    def layer(tag):
+        def render(img):
+            calls.append(tag)
+            cv2.circle(img, (40, 30), 5, (0, 255, 0), -1)
+        return render
+    _draw(_frame(), compositor, [("a", 1, layer("a")), ("b", 1, layer("b"))])
+    calls.clear()
+    _draw(_frame(), compositor, [("a", 1, layer("a")), ("b", 2, layer("b"))])
+    assert set(calls) == {"b"}
@@ -0,0 +1,71 @@
+# tests/test_replay_reader.py
+import cv2
+import numpy as np
+import pytest
+from rtsp_common import ReplayReader
+
+def _frame(i):
+    return np.full((24, 32, 3), i * 20, dtype=np.uint8)
+
+@pytest.fixture
+def image_dir(tmp_path):
+    for i in range(5):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), _frame(i))
+    (tmp_path / "notes.txt").write_text("not a frame")
+    return str(tmp_path)
+
+@pytest.fixture
+def video_file(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24))
+    if not writer.isOpened():
+        pytest.skip("no video encoder available")
+    for i in range(8):
+        writer.write(_frame(i))
+    writer.release()
+    return path
+
+def test_image_directory_in_name_order(image_dir):
+    reader = ReplayReader(image_dir, fps=10, loop=False)
+    assert reader.isOpened() and reader.frame_count == 5
+    values, stamps = [], []
+    while True:
+        ok, frame = reader.read()
+        if not ok:
+            break
+        values.append(int(frame[0, 0, 0]))
+        stamps.append(reader.pts)
+    assert values == [0, 20, 40, 60, 80]
+    assert stamps == pytest.approx([0.0, 0.1, 0.2, 0.3, 0.4])
+
+def test_looping_keeps_timestamps_increasing(image_dir):
+    reader = ReplayReader(image_dir, fps=10, loop=True)
+    stamps = []
+    for _ in range(12):
+        assert reader.grab()
+        stamps.append(reader.pts)
+    assert reader.loops == 2
+    assert all(b > a for a, b in zip(stamps, stamps[1:]))
+    assert stamps[5] == pytest.approx(0.5)
+
+def test_seek_is_exact(image_dir, video_file):
+    for source in (image_dir, video_file):
+        reader = ReplayReader(source, loop=False)
+        reader.seek(3)
+        ok, frame = reader.read()
+        assert ok and reader.index == 3
+        assert abs(int(frame[0, 0, 0]) - 60) <= 4  # MJPG is lossy
+        assert reader.get(cv2.CAP_PROP_POS_FRAMES) == 4.0
+
+def test_video_file_fps_and_end(video_file):
+    reader = ReplayReader(video_file, loop=False)
+    assert reader.get(cv2.CAP_PROP_FPS) == pytest.approx(10.0)
+    frames = 0
+    while reader.grab():
+        frames += 1
+    assert frames == 8
+    reader.release()
+
+def test_directory_without_images_is_not_opened(tmp_path):
+    (tmp_path / "notes.txt").write_text("not a frame")
+    assert not ReplayReader(str(tmp_path)).isOpened()
@@ -0,0 +1,53 @@
+# tests/test_scheduler.py
+import numpy as np
+import pytest
+from core import config
+from modules.detections import Detections
+from modules.scheduler import InferenceScheduler
+
+def _people(inside):
+    n = len(inside)
+    return Detections(np.zeros((n, 4), dtype=np.int64), np.zeros(n, dtype=np.float32),
+                      np.full(n, -1), np.array(inside, dtype=bool), np.zeros((n, 0), dtype=bool))
+
+def _adaptive(**overrides):
+    return InferenceScheduler(config.camera_settings({"scheduler": "adaptive", "latency_budget": 0.3, **overrides}))
+
+def test_fixed_runs_every_nth_frame():
+    scheduler = InferenceScheduler(config.camera_settings({"scheduler": "fixed", "skip_every_n": 3}))
+    assert [scheduler.should_run(n) for n in range(1, 5)] == [False, False, True, True]
+    assert scheduler.telemetry()["state"] == "fixed"
+
+def test_explicit_skip_every_n_selects_fixed():
+    assert config.camera_settings({"skip_every_n": 4})["scheduler"] == "fixed"
+    assert config.camera_settings({"skip_every_n": 4, "scheduler": "adaptive"})["scheduler"] == "adaptive"
+
+def test_adaptive_runs_every_frame_until_it_has_a_measurement():
+    scheduler = _adaptive()
+    assert scheduler.should_run(1, now=100.0)
+    assert scheduler.state == "warmup"
+
+def test_adaptive_alert_active_and_idle_intervals():
+    scheduler = _adaptive()
+    infer = 0.08
+    scheduler.on_run_start(100.0)
+    scheduler.on_result(infer, _people([True]), now=100.0)
+    assert not scheduler.should_run(1, now=100.05)
+    assert scheduler.state == "alert"
+    assert scheduler.interval == pytest.approx(infer / config.SCHED_MAX_DUTY)
+
+    scheduler.on_result(infer, _people([False]), now=100.1)
+    scheduler.should_run(1, now=100.1)
+    assert scheduler.state == "active"
+    assert scheduler.interval == pytest.approx(max(infer / config.SCHED_MAX_DUTY, 0.3 - infer))
+
+    scheduler.on_result(infer, _people([]), now=100.2)
+    assert scheduler.should_run(1, now=100.2 + config.SCHED_IDLE_AFTER + 1.0)
+    assert scheduler.state == "idle"
+    assert scheduler.interval == pytest.approx(max(infer / config.SCHED_MAX_DUTY, config.SCHED_IDLE_INTERVAL))
+
+def test_adaptive_reports_an_unreachable_budget():
+    scheduler = _adaptive(latency_budget=0.1)
+    scheduler.on_result(0.2, _people([False]), now=0.0)
+    scheduler.should_run(1, now=0.0)
+    assert scheduler.telemetry()["over_budget"]
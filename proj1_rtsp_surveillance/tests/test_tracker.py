@@ -0,0 +1,65 @@
+# tests/test_tracker.py
+import numpy as np
+import pytest
+from modules.tracker import IoUTracker, KalmanTracker, greedy_match, iou_matrix
+
+def _dets(*boxes, conf=0.9):
+    """(N, 6) rows x1, y1, x2, y2, conf, cls=person."""
+    return np.array([[*box, conf, 0] for box in boxes], dtype=np.float32).reshape(-1, 6)
+
+def test_iou_matrix_and_greedy_match():
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    b = np.array([[20, 20, 30, 30], [0, 0, 10, 5]], dtype=np.float32)
+    iou = iou_matrix(a, b)
+    assert iou.shape == (2, 2)
+    assert iou[1, 0] == pytest.approx(1.0)
+    assert iou[0, 1] == pytest.approx(0.5)
+    assert sorted(greedy_match(iou, 0.3)) == [(0, 1), (1, 0)]
+    assert greedy_match(iou, 0.9) == [(1, 0)]
+    assert iou_matrix(a, np.zeros((0, 4))).shape == (2, 0)
+
+def test_iou_tracker_keeps_ids_of_overlapping_boxes():
+    tracker = IoUTracker()
+    first = tracker.update(_dets([0, 0, 10, 20], [50, 50, 60, 70]))
+    second = tracker.update(_dets([52, 51, 62, 71], [1, 0, 11, 20]))
+    assert first[:, 6].tolist() == [1, 2]
+    assert second[:, 6].tolist() == [2, 1]
+
+def test_iou_tracker_new_ids_and_expiry():
+    tracker = IoUTracker(max_age=1)
+    tracker.update(_dets([0, 0, 10, 20]))
+    tracker.update(_dets())
+    tracker.update(_dets())  # unseen for 2 updates: dropped
+    out = tracker.update(_dets([0, 0, 10, 20]))
+    assert out[0, 6] == 2
+
+def test_kalman_tracker_predicts_constant_velocity():
+    tracker = KalmanTracker(max_ahead=1.0)
+    # 100 px/s to the right, detected every 0.1 s
+    for i in range(10):
+        x = 10.0 * i
+        out = tracker.update(_dets([x, 0, x + 20, 40]), t=0.1 * i)
+    assert out[0, 6] == 1
+    predicted = tracker.predict(0.9 + 0.3)
+    assert predicted.shape == (1, 7)
+    assert predicted[0, 0] == pytest.approx(120.0, abs=3.0)
+    assert predicted[0, 6] == 1
+    # Never further ahead than max_ahead
+    far = tracker.predict(100.0)
+    assert far[0, 0] == pytest.approx(190.0, abs=5.0)
+
+def test_kalman_tracker_keeps_given_track_ids():
+    tracker = KalmanTracker()
+    dets = np.array([[0, 0, 10, 20, 0.9, 0, 7]], dtype=np.float32)
+    assert tracker.update(dets, t=0.0)[0, 6] == 7
+    # Same id far away still belongs to track 7
+    moved = np.array([[300, 0, 310, 20, 0.9, 0, 7]], dtype=np.float32)
+    assert tracker.update(moved, t=0.1)[0, 6] == 7
+    assert tracker.update(_dets([0, 0, 10, 20]), t=0.2)[0, 6] == 8
+
+def test_kalman_tracker_only_predicts_matched_tracks():
+    tracker = KalmanTracker()
+    tracker.update(_dets([0, 0, 10, 20]), t=0.0)
+    tracker.update(_dets(), t=0.1)
+    assert len(tracker.predict(0.2)) == 0
+    assert KalmanTracker().predict(1.0).shape == (0, 7)
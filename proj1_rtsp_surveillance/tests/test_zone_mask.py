@@ -0,0 +1,38 @@
+# tests/test_zone_mask.py
+import numpy as np
+from utils import ZoneMask
+
+SQUARE = [[10, 10], [100, 10], [100, 100], [10, 100]]
+TRIANGLE = [[200, 10], [300, 10], [200, 110]]
+OFF_FRAME = [[1000, 1000], [1100, 1000], [1100, 1100]]
+SHAPE = (240, 320, 3)
+
+def test_membership_per_zone():
+    mask = ZoneMask(cell=32).update([SQUARE, TRIANGLE, OFF_FRAME], 0, SHAPE)
+    xs = [50, 210, 290, 5, 50, -3, 400]
+    ys = [50, 20, 100, 5, 150, 50, 50]
+    out = mask.membership(xs, ys)
+    assert out.shape == (7, 3)
+    assert out[:, 0].tolist() == [True, False, False, False, False, False, False]
+    assert out[:, 1].tolist() == [False, True, False, False, False, False, False]
+    assert not out[:, 2].any()
+
+def test_contains_matches_membership():
+    mask = ZoneMask().update([SQUARE, TRIANGLE], 0, SHAPE)
+    xs, ys = np.random.RandomState(0).randint(0, 320, 200), np.random.RandomState(1).randint(0, 240, 200)
+    member = mask.membership(xs, ys)
+    for i in range(2):
+        assert (mask.contains(xs, ys, i) == member[:, i]).all()
+
+def test_rebuilt_only_for_a_new_version_or_frame_size():
+    mask = ZoneMask().update([SQUARE], 0, SHAPE)
+    # Same version: the edit is not picked up
+    mask.update([TRIANGLE], 0, SHAPE)
+    assert mask.contains([50], [50])[0]
+    mask.update([TRIANGLE], 1, SHAPE)
+    assert not mask.contains([50], [50])[0]
+    assert mask.contains([210], [20])[0]
+
+def test_degenerate_zone_contains_nothing():
+    mask = ZoneMask().update([[[0, 0], [50, 50]]], 0, SHAPE)
+    assert not mask.membership([10, 25], [10, 25]).any()
@@ -1 +1,17 @@
-from .fps_counter import FPSCounter
\ No newline at end of file
+import os
+import sys
+
+# ffmpeg_capture / replay_reader live in rtsp_common/ at the repo root, shared by all projects
+_repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _repo_root not in sys.path:
+    sys.path.append(_repo_root)
+
+from .fps_counter import FPSCounter
+from .frame_ring import FrameRing, FrameRef
+from .frame_history import FrameHistory
+from .shared_frame_ring import SharedFrameRing
+from rtsp_common import FFmpegCapture, open_capture, ReplayReader
+from .latency import LatencyHistogram, LatencyTracer
+from .zone_mask import ZoneMask
+from .overlay import OverlayCompositor
+from .render_trigger import RenderTrigger
\ No newline at end of file
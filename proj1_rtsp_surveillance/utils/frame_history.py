@@ -0,0 +1,41 @@
+# utils/frame_history.py
+from utils.frame_ring import FrameRef
+
+class FrameHistory:
+    """
+    Private copies of the last `size` analysed frames, looked up by sequence
+    number, so results can be drawn on (and saved with) the exact frame they
+    were computed from instead of whatever the camera delivered since.
+
+    Written by one thread (the consumer), read by others. Frames are kept in
+    arrival order (the consumer only takes some sequence numbers, so slots
+    are not picked by seq), and every copy gets its own buffer: a FrameRef
+    from get() never changes under its reader, it just drops out of the
+    history once `size` newer frames were added.
+    """
+    def __init__(self, size=8):
+        if size < 2:
+            raise ValueError("FrameHistory needs at least 2 slots")
+        self.size = size
+        self.frames = {}  # seq -> FrameRef with its own pixels, oldest first
+
+    def add(self, ref):
+        """Copies ref's pixels into the history (once per seq). Returns the stored FrameRef."""
+        stored = self.frames.get(ref.seq)
+        if stored is not None:
+            return stored
+        stored = FrameRef(ref.seq, ref.timestamp, ref.image.copy(), ref.decoded)
+        self.frames[ref.seq] = stored
+        while len(self.frames) > self.size:
+            self.frames.pop(next(iter(self.frames)), None)
+        return stored
+
+    def get(self, seq):
+        """FrameRef of frame `seq`, or None if it is not (or no longer) kept."""
+        if seq is None:
+            return None
+        return self.frames.get(seq)
+
+    def discard(self, seq):
+        """Forgets frame `seq` (e.g. its pixels were overwritten while being copied)."""
+        self.frames.pop(seq, None)
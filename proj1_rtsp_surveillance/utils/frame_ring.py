@@ -0,0 +1,152 @@
+# utils/frame_ring.py
+import threading
+import time
+
+class FrameRef:
+    """
+    A borrowed, read-only view of one ring slot plus its metadata:
+    `timestamp` is when the frame was captured (grabbed), `decoded` when it
+    was published to the ring.
+    """
+    __slots__ = ("seq", "timestamp", "image", "decoded")
+
+    def __init__(self, seq, timestamp, image, decoded=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+        self.decoded = decoded
+
+    def copy(self):
+        """Private, writable copy of the pixels (take this before drawing)."""
+        return self.image.copy()
+
+class FrameRing:
+    """
+    Preallocated ring of frame buffers shared by one writer and many readers.
+
+    The writer decodes straight into the oldest slot (begin_write / commit),
+    readers borrow the newest slot without copying (borrow) or block until
+    a newer one arrives (wait_next). Every slot remembers the sequence number
+    and capture timestamp it holds, so a reader can check with is_valid(seq)
+    whether its borrowed slot was overwritten in the meantime.
+    """
+    def __init__(self, num_slots=4):
+        if num_slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        self.num_slots = num_slots
+        self.slots = [None] * num_slots
+        self.slot_seqs = [0] * num_slots   # 0 = empty, -1 = being written
+        self.slot_stamps = [0.0] * num_slots
+        self.slot_decoded = [0.0] * num_slots  # commit (decode done) times
+        self.seq = 0                       # last committed sequence number
+        self.read_seq = 0                  # newest seq handed to any reader
+        self.waiters = 0                   # readers blocked in wait_next()
+        self.cond = threading.Condition()
+
+    # ===================== WRITER SIDE =====================
+    def begin_write(self):
+        """
+        Claims the slot for the next frame and returns its buffer, or None
+        if the slot has not been allocated yet. Decode into it with
+        cap.read(buf) so no extra copy is needed.
+        """
+        with self.cond:
+            idx = (self.seq + 1) % self.num_slots
+            self.slot_seqs[idx] = -1
+            return self.slots[idx]
+
+    def commit(self, frame, timestamp=None):
+        """
+        Publishes the frame written into the claimed slot. If the decoder
+        returned a different array (first frame, resolution change) the ring
+        adopts it as the slot's buffer. Returns the new sequence number.
+        """
+        with self.cond:
+            seq = self.seq + 1
+            idx = seq % self.num_slots
+            now = time.time()
+            self.slots[idx] = frame
+            self.slot_stamps[idx] = now if timestamp is None else timestamp
+            self.slot_decoded[idx] = now
+            self.slot_seqs[idx] = seq
+            self.seq = seq
+            self.cond.notify_all()
+            return seq
+
+    # ===================== READER SIDE =====================
+    def borrow(self):
+        """Returns a FrameRef to the newest frame without copying, or None."""
+        with self.cond:
+            return self._latest_ref()
+
+    def wait_next(self, after_seq, timeout=None):
+        """
+        Blocks until a frame newer than `after_seq` is committed and returns
+        a FrameRef to the newest one. Returns None on timeout.
+        """
+        with self.cond:
+            self.waiters += 1
+            self.cond.notify_all()  # a writer in wait_demand() may proceed
+            try:
+                if not self.cond.wait_for(lambda: self.seq > after_seq, timeout):
+                    return None
+                return self._latest_ref()
+            finally:
+                self.waiters -= 1
+
+    def wait_seq(self, after_seq, timeout=None):
+        """
+        Like wait_next() but only returns the newest sequence number (None on
+        timeout), and does not count as a reader, so it creates no decode demand.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > after_seq, timeout):
+                return None
+            return self.seq
+
+    def _latest_ref(self):
+        # Caller holds self.cond
+        if self.seq == 0:
+            return None
+        idx = self.seq % self.num_slots
+        view = self.slots[idx].view()
+        view.flags.writeable = False
+        if self.read_seq != self.seq:
+            self.read_seq = self.seq
+            self.cond.notify_all()  # wakes a writer in wait_demand()
+        return FrameRef(self.seq, self.slot_stamps[idx], view, self.slot_decoded[idx])
+
+    def nearest(self, timestamp):
+        """
+        FrameRef to the kept frame captured closest to `timestamp` (no copy,
+        not counted as a read), or None. Check is_valid(ref.seq) after use.
+        """
+        with self.cond:
+            kept = [idx for idx in range(self.num_slots) if self.slot_seqs[idx] > 0]
+            if not kept:
+                return None
+            idx = min(kept, key=lambda i: abs(self.slot_stamps[i] - timestamp))
+            view = self.slots[idx].view()
+            view.flags.writeable = False
+            return FrameRef(self.slot_seqs[idx], self.slot_stamps[idx], view, self.slot_decoded[idx])
+
+    def has_demand(self):
+        """True if a reader is waiting or has already taken the newest frame."""
+        return self.waiters > 0 or self.read_seq >= self.seq
+
+    def wait_demand(self, timeout=None):
+        """Writer side: blocks until has_demand(). Returns False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(self.has_demand, timeout)
+
+    def has_waiters(self):
+        return self.waiters > 0
+
+    def is_valid(self, seq):
+        """True while the slot that held `seq` has not been reused."""
+        return self.slot_seqs[seq % self.num_slots] == seq
+
+    def copy_latest(self):
+        """Returns a private copy of the newest frame, or None."""
+        ref = self.borrow()
+        return None if ref is None else ref.copy()
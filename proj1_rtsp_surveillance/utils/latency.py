@@ -0,0 +1,121 @@
+# utils/latency.py
+import json
+import math
+import os
+import threading
+import cv2
+
+class LatencyHistogram:
+    """
+    Log-spaced latency histogram (0.1 ms .. 100 s, ~12% wide buckets).
+    record() is O(1) and keeps no samples, so it can run on every frame;
+    percentiles are accurate to one bucket.
+    """
+    def __init__(self, min_ms=0.1, max_ms=100000.0, buckets_per_decade=20):
+        self.min_ms = min_ms
+        self.buckets_per_decade = buckets_per_decade
+        self.num_buckets = int(math.ceil(math.log10(max_ms / min_ms) * buckets_per_decade)) + 2
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        if ms <= self.min_ms:
+            idx = 0
+        else:
+            idx = min(self.num_buckets - 1,
+                      int(math.log10(ms / self.min_ms) * self.buckets_per_decade) + 1)
+        self.counts[idx] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def _upper_edge(self, idx):
+        return self.min_ms * 10 ** (idx / self.buckets_per_decade)
+
+    def percentile(self, p):
+        """Upper edge (ms) of the bucket holding the p-th percentile."""
+        if self.count == 0:
+            return 0.0
+        target = p / 100.0 * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return min(self._upper_edge(idx), self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "last_ms": self.last_ms,
+        }
+
+class LatencyTracer:
+    """
+    Named latency histograms for the stages a frame goes through
+    (decode, queue, inference, zone, blur, render, glass_to_glass, ...).
+    Shared by the capture, AI and UI threads.
+    """
+    # HUD / report order; stages not listed here follow in first-seen order
+    STAGE_ORDER = ("decode", "queue", "inference", "zone", "blur", "render",
+                   "glass_to_glass", "detection_age")
+
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = LatencyHistogram()
+            hist.record(seconds)
+
+    def record_span(self, stage, start, end):
+        """Records end - start if both timestamps are known."""
+        if start is not None and end is not None:
+            self.record(stage, end - start)
+
+    def stages(self):
+        with self.lock:
+            names = list(self.histograms)
+        ordered = [s for s in self.STAGE_ORDER if s in names]
+        return ordered + [s for s in names if s not in ordered]
+
+    def summary(self):
+        stages = self.stages()
+        with self.lock:
+            return {stage: self.histograms[stage].summary() for stage in stages}
+
+    def draw(self, frame, position=(20, 150), color=(255, 255, 0)):
+        """Draws a p50/p95/p99 table (ms) onto the frame."""
+        x, y = position
+        columns = (x, x + 140, x + 200, x + 260)
+        rows = [("latency ms", "p50", "p95", "p99")]
+        for stage, s in self.summary().items():
+            rows.append((stage, f"{s['p50_ms']:.1f}", f"{s['p95_ms']:.1f}", f"{s['p99_ms']:.1f}"))
+        for row in rows:
+            for cx, text in zip(columns, row):
+                cv2.putText(frame, text, (cx, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+            y += 20
+
+    def dump(self, path):
+        """Writes the per-stage summary to a JSON file."""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(self.summary(), f, indent=2)
+            print(f"⏱️ Latency report saved to {path}")
+        except Exception as e:
+            print(f"⚠️ Error saving latency report: {e}")
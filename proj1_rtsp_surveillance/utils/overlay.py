@@ -0,0 +1,122 @@
+# utils/overlay.py
+import cv2
+import numpy as np
+
+_UNSET = object()   # never rendered (or frame size changed)
+_HIDDEN = object()  # declared with visible=False
+
+class OverlayCompositor:
+    """
+    Retained-mode HUD: the parts of the overlay that rarely change (zones,
+    counters, help text) are rasterized once into cached BGRA sprites and
+    put onto every frame with a single alpha blend.
+
+    Every frame, call begin(frame.shape) and declare each layer with
+    layer(name, key, render). render(canvas) draws the layer with ordinary
+    cv2 calls on a frame-sized BGR canvas and is only called again when
+    `key` changes, i.e. the layer is dirty. Then apply(frame) writes the
+    layers onto the frame. Layers stack in the order they were first declared.
+
+    A dirty layer is drawn twice, on black and on white, which gives its
+    exact colour and coverage (alpha, anti-aliased edges included) whatever
+    cv2 does. The sprite is the BGRA of the layer's bounding box. Whenever a
+    sprite changes, all sprites are flattened into one premultiplied image
+    over the union of their boxes, so apply() is one blend per frame:
+    frame * (1 - alpha) + colour * alpha.
+
+    A layer whose key changes on two frames in a row (a zone being dragged)
+    is not worth caching: it is drawn straight onto the frame, under the
+    cached layers, until its key holds still for a frame again.
+    """
+    def __init__(self):
+        self.layers = {}          # name -> {"key", "sprite": (x, y, bgra) or None, "live", "changed"}
+        self.shape = None         # frame shape the sprites were made for
+        self.black = None         # scratch canvases, kept clean between renders
+        self.white = None
+        self.frame_no = 0
+        self.renders = 0          # layer re-rasterizations so far (telemetry)
+        self.composed = []        # sprites the flattened overlay was built from
+        self.flat = None          # (x, y, premultiplied BGR, 255 - alpha as 3 channels)
+
+    def begin(self, frame_shape):
+        """Call once per frame before declaring layers; a new frame size re-renders all."""
+        if frame_shape[:2] != self.shape:
+            self.shape = frame_shape[:2]
+            self.black = np.zeros((*self.shape, 3), dtype=np.uint8)
+            self.white = np.full((*self.shape, 3), 255, dtype=np.uint8)
+            for layer in self.layers.values():
+                layer["key"], layer["sprite"], layer["live"] = _UNSET, None, None
+        self.frame_no += 1
+
+    def layer(self, name, key, render, visible=True):
+        """Declares a layer; render(canvas) runs only if `key` differs from last time."""
+        layer = self.layers.setdefault(name, {"key": _UNSET, "sprite": None, "live": None,
+                                              "changed": None})
+        if not visible:
+            layer["key"], layer["sprite"], layer["live"] = _HIDDEN, None, None
+            return
+        if layer["key"] is _UNSET or layer["key"] is _HIDDEN or layer["key"] != key:
+            if layer["changed"] == self.frame_no - 1:
+                # Changing every frame: draw it directly in apply()
+                layer["sprite"], layer["live"] = None, render
+            else:
+                layer["sprite"], layer["live"] = self._rasterize(render), None
+            layer["key"] = key
+            layer["changed"] = self.frame_no
+        elif layer["live"] is not None:
+            # Held still for a frame: cache it again
+            layer["sprite"], layer["live"] = self._rasterize(render), None
+
+    def _rasterize(self, render):
+        """Draws the layer and returns (x, y, BGRA) of what it covered, or None."""
+        self.renders += 1
+        render(self.black)
+        render(self.white)
+        # On black a pixel is colour * alpha, on white that + 255 * (1 - alpha),
+        # in every channel
+        alpha = cv2.subtract(255, cv2.subtract(cv2.extractChannel(self.white, 0),
+                                               cv2.extractChannel(self.black, 0)))
+        x, y, w, h = cv2.boundingRect(alpha)
+        if w == 0 or h == 0:
+            return None
+        black = self.black[y:y + h, x:x + w]
+        alpha = alpha[y:y + h, x:x + w]
+        bgr = cv2.divide(black, cv2.merge([cv2.max(alpha, 1)] * 3), scale=255.0)
+        bgra = np.dstack((bgr, alpha))
+        black[:] = 0  # leave the scratch canvases clean for the next layer
+        self.white[y:y + h, x:x + w] = 255
+        return x, y, bgra
+
+    def _flatten(self, sprites):
+        """Stacks the sprites (in order) into one premultiplied image over their union box."""
+        self.composed = sprites
+        if not sprites:
+            self.flat = None
+            return
+        x0 = min(x for x, _, _ in sprites)
+        y0 = min(y for _, y, _ in sprites)
+        x1 = max(x + bgra.shape[1] for x, _, bgra in sprites)
+        y1 = max(y + bgra.shape[0] for _, y, bgra in sprites)
+        colour = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.float32)
+        alpha = np.zeros((y1 - y0, x1 - x0, 1), dtype=np.float32)
+        for x, y, bgra in sprites:
+            region = (slice(y - y0, y - y0 + bgra.shape[0]), slice(x - x0, x - x0 + bgra.shape[1]))
+            a = bgra[..., 3:].astype(np.float32) / 255.0
+            colour[region] = colour[region] * (1.0 - a) + bgra[..., :3] * a
+            alpha[region] = alpha[region] * (1.0 - a) + a
+        inverse = np.round(255.0 * (1.0 - alpha)).astype(np.uint8)
+        self.flat = (x0, y0, np.round(colour).astype(np.uint8), cv2.merge([inverse] * 3))
+
+    def apply(self, frame):
+        """Writes the visible layers onto `frame` (frame size given to begin())."""
+        for layer in self.layers.values():
+            if layer["live"] is not None:
+                layer["live"](frame)
+        sprites = [layer["sprite"] for layer in self.layers.values() if layer["sprite"] is not None]
+        if len(sprites) != len(self.composed) or any(a is not b for a, b in zip(sprites, self.composed)):
+            self._flatten(sprites)
+        if self.flat is not None:
+            x, y, colour, inverse = self.flat
+            roi = frame[y:y + colour.shape[0], x:x + colour.shape[1]]
+            cv2.add(cv2.multiply(roi, inverse, scale=1.0 / 255), colour, dst=roi)
+        return frame
@@ -0,0 +1,54 @@
+# utils/render_trigger.py
+import threading
+
+class RenderTrigger:
+    """
+    Tells a display loop when there is something new to draw, so it can
+    sleep instead of redrawing the same frame over and over.
+
+    Anyone may notify(reason) ("zone", "key", ...). Given a producer, a
+    watcher thread notifies "frame" for every new camera frame (without
+    reading it, so the producer does not decode more); given a consumer, its
+    stored results notify "detections". wait(timeout) blocks until at least
+    one notification arrived and returns (and clears) the set of reasons,
+    or an empty set on timeout. Notifications during a render are not lost.
+    """
+    def __init__(self, producer=None, consumer=None):
+        self.cond = threading.Condition()
+        self.reasons = set()
+        self.counts = {}  # notifications per reason (telemetry)
+        self.is_running = True
+        if consumer is not None:
+            consumer.on_update = lambda: self.notify("detections")
+        self.thread = None
+        if producer is not None:
+            self.thread = threading.Thread(target=self._watch_frames, args=(producer,),
+                                           name="render-trigger", daemon=True)
+            self.thread.start()
+
+    def _watch_frames(self, producer):
+        seq = 0
+        while self.is_running:
+            # Timeout keeps stop() responsive
+            new_seq = producer.wait_frame_seq(seq, timeout=0.5)
+            if new_seq is not None:
+                seq = new_seq
+                self.notify("frame")
+
+    def notify(self, reason):
+        with self.cond:
+            self.reasons.add(reason)
+            self.counts[reason] = self.counts.get(reason, 0) + 1
+            self.cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Set of reasons since the last wait(); empty if nothing happened within timeout."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.reasons, timeout)
+            reasons, self.reasons = self.reasons, set()
+            return reasons
+
+    def stop(self):
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
@@ -0,0 +1,207 @@
+# utils/shared_frame_ring.py
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from utils.frame_ring import FrameRef
+
+# Control block (int64): latest seq, newest seq read, blocked readers
+_SEQ, _READ_SEQ, _WAITERS = range(3)
+_CONTROL_LEN = 4
+# Capture-process stats mirrored for the parent (float64, NaN = None)
+STAT_FIELDS = ("grabbed", "decoded", "connected", "on_fallback", "reconnects",
+               "time_to_first_frame", "last_recovery_time")
+_INT_STATS = ("grabbed", "decoded", "reconnects")
+_BOOL_STATS = ("connected", "on_fallback")
+# Per-slot header (int64): seq, height, width, channels (0 = single-channel image)
+_META_LEN = 4
+
+class SharedFrameRing:
+    """
+    FrameRing with its slots in multiprocessing.shared_memory, so a capture
+    process can publish frames that inference/UI processes read without
+    pickling. Same interface as FrameRing (begin_write / commit / borrow /
+    wait_next / is_valid / has_demand).
+
+    Layout: control block | stats | slot headers | slot timestamps | pixel slots.
+    Every pixel slot is max_frame_bytes long; frames are uint8.
+    `cond` must be a multiprocessing Condition shared by both sides.
+    After close(), blocked and later readers get None instead of touching
+    the unmapped segment.
+    """
+    def __init__(self, cond, num_slots=4, max_frame_bytes=1920 * 1080 * 3, name=None):
+        if num_slots < 2:
+            raise ValueError("SharedFrameRing needs at least 2 slots")
+        self.cond = cond
+        self.num_slots = num_slots
+        self.max_frame_bytes = max_frame_bytes
+
+        header_bytes = 8 * (_CONTROL_LEN + len(STAT_FIELDS) + num_slots * _META_LEN + num_slots * 2)
+        self.owner = name is None
+        if self.owner:
+            size = header_bytes + num_slots * max_frame_bytes
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        buf = self.shm.buf
+        self.control = np.ndarray((_CONTROL_LEN,), np.int64, buffer=buf, offset=0)
+        offset = 8 * _CONTROL_LEN
+        self.stat_values = np.ndarray((len(STAT_FIELDS),), np.float64, buffer=buf, offset=offset)
+        offset += 8 * len(STAT_FIELDS)
+        self.meta = np.ndarray((num_slots, _META_LEN), np.int64, buffer=buf, offset=offset)
+        offset += 8 * num_slots * _META_LEN
+        # Per slot: capture timestamp, commit (decode done) timestamp
+        self.stamps = np.ndarray((num_slots, 2), np.float64, buffer=buf, offset=offset)
+        self.pixel_offset = offset + 8 * num_slots * 2
+        if self.owner:
+            self.control[:] = 0
+            self.stat_values[:] = np.nan
+            self.meta[:] = 0
+
+        self.write_shape = None  # writer side: shape of the last committed frame
+        self.closed = False      # this side's mapping is (being) released
+
+    def attach_args(self):
+        """Arguments another process needs to open this ring."""
+        return (self.cond, self.num_slots, self.max_frame_bytes, self.name)
+
+    @property
+    def seq(self):
+        return int(self.control[_SEQ])
+
+    def _slot_view(self, idx, shape):
+        return np.ndarray(shape, np.uint8, buffer=self.shm.buf,
+                          offset=self.pixel_offset + idx * self.max_frame_bytes)
+
+    # ===================== WRITER SIDE =====================
+    def begin_write(self):
+        with self.cond:
+            idx = (self.seq + 1) % self.num_slots
+            self.meta[idx, 0] = -1
+        return None if self.write_shape is None else self._slot_view(idx, self.write_shape)
+
+    def commit(self, frame, timestamp=None):
+        seq = self.seq + 1
+        idx = seq % self.num_slots
+        if frame.nbytes > self.max_frame_bytes:
+            raise ValueError(f"Frame {frame.shape} exceeds shared slot size ({self.max_frame_bytes} bytes)")
+
+        slot = self._slot_view(idx, frame.shape)
+        if frame.__array_interface__["data"][0] != slot.__array_interface__["data"][0]:
+            # Decoder allocated its own buffer (first frame / resolution change)
+            np.copyto(slot, frame)
+        self.write_shape = frame.shape
+
+        with self.cond:
+            h, w = frame.shape[:2]
+            self.meta[idx, 1:] = (h, w, frame.shape[2] if frame.ndim == 3 else 0)
+            now = time.time()
+            self.stamps[idx] = (now if timestamp is None else timestamp, now)
+            self.meta[idx, 0] = seq
+            self.control[_SEQ] = seq
+            self.cond.notify_all()
+        return seq
+
+    def publish_stats(self, stats):
+        """Writes the STAT_FIELDS of a producer's get_stats() into shared memory."""
+        for i, name in enumerate(STAT_FIELDS):
+            value = stats.get(name)
+            self.stat_values[i] = np.nan if value is None else float(value)
+
+    # ===================== READER SIDE =====================
+    def borrow(self):
+        with self.cond:
+            return None if self.closed else self._latest_ref()
+
+    def wait_next(self, after_seq, timeout=None):
+        with self.cond:
+            if self.closed:
+                return None
+            self.control[_WAITERS] += 1
+            try:
+                if not self.cond.wait_for(lambda: self.closed or self.seq > after_seq, timeout):
+                    return None
+                return None if self.closed else self._latest_ref()
+            finally:
+                if not self.closed:
+                    self.control[_WAITERS] -= 1
+
+    def wait_seq(self, after_seq, timeout=None):
+        with self.cond:
+            if self.closed:
+                return None
+            if not self.cond.wait_for(lambda: self.closed or self.seq > after_seq, timeout):
+                return None
+            return None if self.closed else self.seq
+
+    def _latest_ref(self):
+        # Caller holds self.cond
+        seq = self.seq
+        if seq == 0:
+            return None
+        idx = seq % self.num_slots
+        h, w, c = (int(v) for v in self.meta[idx, 1:])
+        view = self._slot_view(idx, (h, w, c) if c else (h, w))
+        view.flags.writeable = False
+        self.control[_READ_SEQ] = max(int(self.control[_READ_SEQ]), seq)
+        captured, decoded = self.stamps[idx].tolist()
+        return FrameRef(seq, captured, view, decoded)
+
+    def nearest(self, timestamp):
+        with self.cond:
+            if self.closed:
+                return None
+            kept = [idx for idx in range(self.num_slots) if self.meta[idx, 0] > 0]
+            if not kept:
+                return None
+            idx = min(kept, key=lambda i: abs(self.stamps[i, 0] - timestamp))
+            h, w, c = (int(v) for v in self.meta[idx, 1:])
+            view = self._slot_view(idx, (h, w, c) if c else (h, w))
+            view.flags.writeable = False
+            captured, decoded = self.stamps[idx].tolist()
+            return FrameRef(int(self.meta[idx, 0]), captured, view, decoded)
+
+    def has_demand(self):
+        if self.closed:
+            return False
+        return self.control[_WAITERS] > 0 or self.control[_READ_SEQ] >= self.control[_SEQ]
+
+    def has_waiters(self):
+        return not self.closed and self.control[_WAITERS] > 0
+
+    def is_valid(self, seq):
+        return not self.closed and self.meta[seq % self.num_slots, 0] == seq
+
+    def copy_latest(self):
+        ref = self.borrow()
+        return None if ref is None else ref.copy()
+
+    def stats(self):
+        if self.closed:
+            return dict.fromkeys(STAT_FIELDS)
+        out = {}
+        for name, value in zip(STAT_FIELDS, self.stat_values.tolist()):
+            if value != value:  # NaN
+                out[name] = None
+            elif name in _INT_STATS:
+                out[name] = int(value)
+            elif name in _BOOL_STATS:
+                out[name] = bool(value)
+            else:
+                out[name] = value
+        return out
+
+    def close(self):
+        # Wake blocked readers first; they see `closed` and return None
+        with self.cond:
+            self.closed = True
+            self.control = self.stat_values = self.meta = self.stamps = None
+            self.cond.notify_all()
+        # Views still held by readers keep the mapping alive; ignore in that case
+        if self.owner:
+            self.shm.unlink()
+        try:
+            self.shm.close()
+        except BufferError:
+            print("SharedFrameRing: frames still borrowed, leaving segment mapped")
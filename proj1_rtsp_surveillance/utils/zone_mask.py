@@ -0,0 +1,89 @@
+# utils/zone_mask.py
+import cv2
+import numpy as np
+
+class ZoneMask:
+    """
+    Zone polygons rasterized for vectorized point-in-zone tests, with a
+    grid index so the cost stays flat with dozens of zones per camera.
+
+    Each zone is rasterized once (cv2.fillPoly) into a mask of its bounding
+    box only. The frame is divided into `cell` px buckets listing the zones
+    whose bounding box overlaps them; a lookup only visits the zones in the
+    buckets the points fall in, and tests all points of a zone with one
+    numpy gather. Everything is rebuilt only when update() is called with a
+    different version or frame size; callers bump the version whenever a
+    zone is edited.
+    """
+    def __init__(self, cell=64):
+        self.cell = cell
+        self.key = None    # (version, (h, w)) the index was built for
+        self.count = 0     # number of zones
+        self.boxes = []    # per zone: (x0, y0, x1, y1) in the frame, or None if off-frame
+        self.masks = []    # per zone: uint8 mask of its box (1 = inside)
+        self.buckets = []  # per grid cell: indices of the zones overlapping it
+        self.cols = 0
+
+    def update(self, zones, version, frame_shape):
+        """zones: list of polygons ([[x, y], ...]). Cheap when nothing changed."""
+        key = (version, tuple(frame_shape[:2]))
+        if key == self.key:
+            return self
+        h, w = frame_shape[:2]
+        rows, self.cols = -(-h // self.cell), -(-w // self.cell)
+        self.buckets = [[] for _ in range(rows * self.cols)]
+        self.boxes, self.masks = [], []
+        for i, zone in enumerate(zones):
+            box, mask = None, None
+            if len(zone) >= 3:
+                pts = np.array(zone, dtype=np.int32)
+                x, y, bw, bh = cv2.boundingRect(pts)
+                x0, y0, x1, y1 = max(0, x), max(0, y), min(w, x + bw), min(h, y + bh)
+                if x1 > x0 and y1 > y0:
+                    box = (x0, y0, x1, y1)
+                    mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+                    cv2.fillPoly(mask, [pts - (x0, y0)], 1)
+                    for r in range(y0 // self.cell, (y1 - 1) // self.cell + 1):
+                        for c in range(x0 // self.cell, (x1 - 1) // self.cell + 1):
+                            self.buckets[r * self.cols + c].append(i)
+            self.boxes.append(box)
+            self.masks.append(mask)
+        self.count = len(zones)
+        self.key = key
+        return self
+
+    def _test(self, index, xs, ys, valid):
+        """Boolean array: which points lie in zone `index`."""
+        inside = np.zeros(len(xs), dtype=bool)
+        if self.boxes[index] is None:
+            return inside
+        x0, y0, x1, y1 = self.boxes[index]
+        sel = valid & (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+        inside[sel] = self.masks[index][ys[sel] - y0, xs[sel] - x0] == 1
+        return inside
+
+    def _points(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        h, w = self.key[1]
+        valid = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        return xs, ys, valid
+
+    def membership(self, xs, ys):
+        """(N, zones) boolean matrix: point i lies in zone j."""
+        xs, ys, valid = self._points(xs, ys)
+        out = np.zeros((len(xs), self.count), dtype=bool)
+        if not valid.any():
+            return out
+        cells = np.unique((ys[valid] // self.cell) * self.cols + xs[valid] // self.cell)
+        candidates = set()
+        for c in cells.tolist():
+            candidates.update(self.buckets[c])
+        for i in candidates:
+            out[:, i] = self._test(i, xs, ys, valid)
+        return out
+
+    def contains(self, xs, ys, index=0):
+        """Boolean array: which points lie in zones[index]."""
+        xs, ys, valid = self._points(xs, ys)
+        return self._test(index, xs, ys, valid)
@@ -30,6 +30,25 @@ def build_rtsp_url(user, password, ip, port, path):
 # Construct the final URL
 RTSP_URL = os.getenv("RTSP_URL") or build_rtsp_url(USER, PASS, IP, PORT, PATH)
 
+# ===================== CAPTURE BACKEND =====================
+# "opencv" = cv2.VideoCapture, "ffmpeg" = ffmpeg subprocess pipe (scales,
+# drops frames and converts pixel format inside the decoder).
+# RTSP_URL may also be a local video file for testing without a camera.
+CAPTURE_BACKEND = os.getenv("CAPTURE_BACKEND", "opencv")
+CAPTURE_WIDTH = int(os.getenv("CAPTURE_WIDTH", "0")) or None   # ffmpeg only
+CAPTURE_HEIGHT = int(os.getenv("CAPTURE_HEIGHT", "0")) or None # ffmpeg only
+CAPTURE_FPS = float(os.getenv("CAPTURE_FPS", "0")) or None     # ffmpeg only
+
+# ===================== REPLAY =====================
+# Set REPLAY_SOURCE to a video file or image directory to run on recorded
+# footage instead of the camera. "realtime" follows the file's timestamps
+# (dropping frames when the pipeline is slow); "fast" runs unthrottled.
+REPLAY_SOURCE = os.getenv("REPLAY_SOURCE") or None
+REPLAY_PACING = os.getenv("REPLAY_PACING", "realtime")
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1.0"))
+REPLAY_LOOP = os.getenv("REPLAY_LOOP", "1") != "0"
+REPLAY_START_FRAME = int(os.getenv("REPLAY_START_FRAME", "0"))
+
 # ===================== DRAWING CONFIG =====================
 BRUSH_THICKNESS = 6
 ERASER_THICKNESS = 40
@@ -18,6 +18,7 @@ from modules.hand_tracker import HandTracker
 from modules.canvas_manager import CanvasManager
 from utils.fps import FPSCounter
 from utils.capture_thread import VideoCaptureThreaded
+from utils.replay_thread import ReplayCaptureThreaded
 
 # ===================== HELPER FUNCTIONS =====================
 
@@ -59,11 +60,18 @@ def main():
     # Force TCP transport globally
     os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp"
     
-    # Debug: Print the URL to console
-    print(f"--- [DEBUG] Connecting to: {RTSP_URL} ---")
-
-    # Initialize the threaded video capture
-    video_thread = VideoCaptureThreaded(RTSP_URL)
+    if REPLAY_SOURCE:
+        # Recorded footage instead of the camera (same read() interface)
+        print(f"--- [DEBUG] Replaying: {REPLAY_SOURCE} ({REPLAY_PACING}) ---")
+        video_thread = ReplayCaptureThreaded(REPLAY_SOURCE, REPLAY_PACING, REPLAY_SPEED,
+                                             REPLAY_LOOP, REPLAY_START_FRAME)
+    else:
+        # Debug: Print the URL to console
+        print(f"--- [DEBUG] Connecting to: {RTSP_URL} ---")
+
+        # Initialize the threaded video capture
+        video_thread = VideoCaptureThreaded(RTSP_URL, CAPTURE_BACKEND, width=CAPTURE_WIDTH,
+                                            height=CAPTURE_HEIGHT, fps=CAPTURE_FPS)
     video_thread.start()
     
     # Give the thread a moment to connect before we start processing
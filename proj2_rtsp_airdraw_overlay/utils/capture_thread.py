@@ -3,10 +3,14 @@ import queue
 import cv2
 import time
 import os
+from rtsp_common.ffmpeg_capture import open_capture
 
 class VideoCaptureThreaded:
-    def __init__(self, rtsp_url):
+    def __init__(self, rtsp_url, backend="opencv", **capture_options):
         self.rtsp_url = rtsp_url
+        # backend="ffmpeg" accepts width/height/fps/pix_fmt/realtime (see open_capture)
+        self.backend = backend
+        self.capture_options = capture_options
         self.q = queue.Queue(maxsize=1) # Queue size 1 ensures we always get the latest frame
         self.stopped = False
         self.cap = None
@@ -26,7 +30,7 @@ class VideoCaptureThreaded:
         # Force TCP for reliability
         os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp"
         
-        self.cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG)
+        self.cap = self._open()
         if self.cap.isOpened():
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         else:
@@ -38,7 +42,7 @@ class VideoCaptureThreaded:
                 # Try to reconnect if stream drops
                 print("[Thread] Connection lost. Reconnecting...")
                 time.sleep(1.0) # Wait a second before retrying
-                self.cap.open(self.rtsp_url, cv2.CAP_FFMPEG)
+                self.cap = self._open()
                 if self.cap.isOpened():
                     self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
                     print("[Thread] Reconnected successfully.")
@@ -60,6 +64,9 @@ class VideoCaptureThreaded:
                 print("[Thread] Frame read failed. Releasing cap...")
                 self.cap.release()
 
+    def _open(self):
+        return open_capture(self.rtsp_url, self.backend, **self.capture_options)
+
     def read(self):
         """Returns the latest frame. Returns None if no frame is available yet."""
         try:
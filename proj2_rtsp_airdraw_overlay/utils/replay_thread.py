@@ -0,0 +1,97 @@
+import threading
+import queue
+import time
+from rtsp_common.replay_reader import ReplayReader
+
+class ReplayCaptureThreaded:
+    """
+    Same interface as VideoCaptureThreaded (start/read/stop), but plays a
+    recorded file or image directory so the pipeline can be tested and
+    benchmarked on identical footage.
+
+    pacing="realtime": frames are released at their recorded timestamps;
+    late frames are skipped like a live camera drops them.
+    pacing="fast": no clock; the next frame is queued as soon as read() has
+    taken the previous one (maximum throughput, nothing dropped).
+    """
+    def __init__(self, source, pacing="realtime", speed=1.0, loop=True, start_frame=0, fps=None):
+        self.source = source
+        self.pacing = pacing
+        self.speed = speed or 1.0
+        self.reader = ReplayReader(source, fps=fps, loop=loop)
+        self.reader.seek(start_frame)
+        self.q = queue.Queue(maxsize=1)
+        self.stopped = False
+        self.finished = False
+        self.dropped = 0
+        self.thread = None
+
+    def start(self):
+        """Start the background thread."""
+        self.stopped = False
+        self.thread = threading.Thread(target=self.update, args=())
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def update(self):
+        """Read frames from the recording in a loop."""
+        if not self.reader.isOpened():
+            print(f"[Replay] Could not open {self.source}")
+            return
+        frame_interval = 1.0 / self.reader.fps / self.speed
+        clock_start = None
+
+        while not self.stopped:
+            if not self.reader.grab():
+                print(f"[Replay] End of {self.source}")
+                self.finished = True
+                break
+
+            if self.pacing == "realtime":
+                now = time.time()
+                if clock_start is None:
+                    clock_start = (now, self.reader.pts)
+                due = clock_start[0] + (self.reader.pts - clock_start[1]) / self.speed
+                if now - due > frame_interval:
+                    self.dropped += 1
+                    continue
+                if due > now:
+                    time.sleep(due - now)
+
+            ret, frame = self.reader.retrieve()
+            if not ret:
+                self.dropped += 1
+                continue
+
+            if self.pacing == "fast":
+                # Block until the consumer has taken the previous frame
+                while not self.stopped:
+                    try:
+                        self.q.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                continue
+
+            # Realtime: replace an unread frame, as VideoCaptureThreaded does
+            if not self.q.empty():
+                try:
+                    self.q.get_nowait()
+                except queue.Empty:
+                    pass
+            self.q.put(frame)
+
+    def read(self):
+        """Returns the latest frame. Returns None if no frame is available yet."""
+        try:
+            return self.q.get(timeout=0.01)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        """Stop the thread and release resources."""
+        self.stopped = True
+        if self.thread is not None:
+            self.thread.join()
+        self.reader.release()
@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,6 +15,22 @@ class Config:
     rtsp_path: str = os.getenv("RTSP_PATH", "Streaming/Channels/101")
     flip_horizontal: bool = True
 
+    # Capture backend: "opencv" or "ffmpeg" (subprocess pipe that scales and
+    # drops frames inside the decoder). The size/fps options are ffmpeg-only.
+    capture_backend: str = os.getenv("CAPTURE_BACKEND", "opencv")
+    capture_width: Optional[int] = int(os.getenv("CAPTURE_WIDTH", "0")) or None
+    capture_height: Optional[int] = int(os.getenv("CAPTURE_HEIGHT", "0")) or None
+    capture_fps: Optional[float] = float(os.getenv("CAPTURE_FPS", "0")) or None
+
+    # Replay: a video file or image directory used instead of the camera.
+    # "realtime" follows the file's timestamps (drops frames when slow),
+    # "fast" hands every frame over as quickly as the app can take it.
+    replay_source: Optional[str] = os.getenv("REPLAY_SOURCE") or None
+    replay_pacing: str = os.getenv("REPLAY_PACING", "realtime")
+    replay_speed: float = float(os.getenv("REPLAY_SPEED", "1.0"))
+    replay_loop: bool = os.getenv("REPLAY_LOOP", "1") != "0"
+    replay_start_frame: int = int(os.getenv("REPLAY_START_FRAME", "0"))
+
     # Pinch Settings
     pinch_on_threshold: float = 0.045
     pinch_off_threshold: float = 0.070
@@ -37,6 +54,14 @@ class Config:
     slider_y1: int = 120
     slider_y2: int = 520
 
+    @property
+    def capture_options(self) -> dict:
+        return {
+            "width": self.capture_width,
+            "height": self.capture_height,
+            "fps": self.capture_fps,
+        }
+
     @property
     def rtsp_url(self) -> str:
         return f"rtsp://{self.rtsp_user}:{self.rtsp_pass}@{self.rtsp_ip}:{self.rtsp_port}/{self.rtsp_path}"
\ No newline at end of file
@@ -9,6 +9,8 @@ from modules.mouse_controller import MouseController
 from modules.hand_processor import HandProcessor
 from modules.ui_manager import VolumeSliderUI
 from utils.video_thread import VideoCaptureThread
+from utils.replay_thread import ReplayVideoThread
+from rtsp_common.ffmpeg_capture import open_capture
 
 class RTSPVolumeApp:
     def __init__(self, cfg: Config):
@@ -36,24 +38,32 @@ class RTSPVolumeApp:
         # ==========================================
         # SOURCE DETECTION (RTSP vs WEBCAM)
         # ==========================================
-        print(f"Attempting to connect to RTSP: {cfg.rtsp_url}")
-        temp_cap = cv2.VideoCapture(cfg.rtsp_url, cv2.CAP_FFMPEG)
-        temp_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        connected = False
-        if temp_cap.isOpened():
-            ret, _ = temp_cap.read()
-            if ret:
-                connected = True
-        temp_cap.release()
-
-        if connected:
-            self.active_source = cfg.rtsp_url
-            print("[SUCCESS] RTSP Stream connected.")
+        if cfg.replay_source:
+            # Recorded footage (same read()/reconnect() interface as the camera thread)
+            print(f"Replaying {cfg.replay_source} ({cfg.replay_pacing})")
+            self.active_source = cfg.replay_source
+            self.video_thread = ReplayVideoThread(cfg.replay_source, cfg.replay_pacing, cfg.replay_speed,
+                                                  cfg.replay_loop, cfg.replay_start_frame).start()
         else:
-            self.active_source = 0
-            print("[WARNING] RTSP Connection failed. Falling back to Local Webcam (Source 0).")
-
-        self.video_thread = VideoCaptureThread(self.active_source).start()
+            print(f"Attempting to connect to RTSP: {cfg.rtsp_url}")
+            temp_cap = open_capture(cfg.rtsp_url, cfg.capture_backend, **cfg.capture_options)
+            temp_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            connected = False
+            if temp_cap.isOpened():
+                ret, _ = temp_cap.read()
+                if ret:
+                    connected = True
+            temp_cap.release()
+
+            if connected:
+                self.active_source = cfg.rtsp_url
+                print("[SUCCESS] RTSP Stream connected.")
+            else:
+                self.active_source = 0
+                print("[WARNING] RTSP Connection failed. Falling back to Local Webcam (Source 0).")
+
+            self.video_thread = VideoCaptureThread(self.active_source, cfg.capture_backend,
+                                                   **cfg.capture_options).start()
         cv2.namedWindow("RTSP Pinch Volume", cv2.WINDOW_NORMAL)
         cv2.resizeWindow("RTSP Pinch Volume", 1100, 650)
 
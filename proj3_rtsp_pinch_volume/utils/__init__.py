@@ -0,0 +1,7 @@
+import os
+import sys
+
+# ffmpeg_capture / replay_reader live in rtsp_common/ at the repo root, shared by all projects
+_repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _repo_root not in sys.path:
+    sys.path.append(_repo_root)
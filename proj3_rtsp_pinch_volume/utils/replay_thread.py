@@ -0,0 +1,106 @@
+import threading
+import time
+from rtsp_common.replay_reader import ReplayReader
+
+class ReplayVideoThread:
+    """
+    Same interface as VideoCaptureThread (start/read/stop/reconnect), but
+    plays a recorded file or image directory for repeatable tests and
+    benchmarks.
+
+    pacing="realtime": frames follow their recorded timestamps; late frames
+    are skipped like a live camera drops them.
+    pacing="fast": no clock; each read() gets the next frame and the reader
+    only decodes once the previous frame was taken (maximum throughput).
+    """
+    def __init__(self, src, pacing="realtime", speed=1.0, loop=True, start_frame=0, fps=None):
+        self.src = src
+        self.pacing = pacing
+        self.speed = speed or 1.0
+        self.start_frame = start_frame
+        self.reader = ReplayReader(src, fps=fps, loop=loop)
+        self.reader.seek(start_frame)
+        self.grabbed, self.frame = False, None
+        self.started = False
+        self.finished = False
+        self.dropped = 0
+        self.seq = 0        # frames published
+        self.read_seq = 0   # last frame handed to read()
+        self.cond = threading.Condition()
+        self.last_read_time = time.time()
+
+        if not self.reader.isOpened():
+            print(f"Error: Cannot open recording {self.src}")
+
+    def set(self, var1, var2):
+        self.reader.set(var1, var2)
+
+    def start(self):
+        if self.started:
+            print('[!] Threaded video capturing has already been started.')
+            return None
+        self.started = True
+        self.thread = threading.Thread(target=self.update, args=())
+        self.thread.start()
+        return self
+
+    def update(self):
+        frame_interval = 1.0 / self.reader.fps / self.speed
+        clock_start = None
+        while self.started:
+            if self.pacing == "fast":
+                with self.cond:
+                    if not self.cond.wait_for(lambda: self.read_seq >= self.seq or not self.started, 0.1):
+                        continue
+
+            if not self.reader.grab():
+                print(f"End of recording {self.src}")
+                self.finished = True
+                break
+
+            if self.pacing == "realtime":
+                now = time.time()
+                if clock_start is None:
+                    clock_start = (now, self.reader.pts)
+                due = clock_start[0] + (self.reader.pts - clock_start[1]) / self.speed
+                if now - due > frame_interval:
+                    self.dropped += 1
+                    continue
+                if due > now:
+                    time.sleep(due - now)
+
+            grabbed, frame = self.reader.retrieve()
+            if not grabbed:
+                self.dropped += 1
+                continue
+            with self.cond:
+                self.grabbed = True
+                self.frame = frame
+                self.seq += 1
+                self.last_read_time = time.time()
+                self.cond.notify_all()
+
+    def read(self):
+        with self.cond:
+            if self.pacing == "fast" and not self.finished:
+                self.cond.wait_for(lambda: self.seq > self.read_seq, 0.1)
+            frame = self.frame.copy() if self.grabbed else None
+            grabbed = self.grabbed
+            self.read_seq = self.seq
+            self.cond.notify_all()
+        return grabbed, frame
+
+    def stop(self):
+        self.started = False
+        with self.cond:
+            self.cond.notify_all()
+        self.thread.join()
+        self.reader.release()
+
+    def reconnect(self):
+        # Nothing to reconnect to: restart playback from the configured frame
+        print("Restarting replay...")
+        self.stop()
+        self.reader.seek(self.start_frame)
+        self.finished = False
+        self.start()
@@ -1,11 +1,15 @@
 import threading
 import cv2
 import time
+from rtsp_common.ffmpeg_capture import open_capture
 
 class VideoCaptureThread:
-    def __init__(self, src=0):
+    def __init__(self, src=0, backend="opencv", **capture_options):
         self.src = src
-        self.cap = cv2.VideoCapture(self.src, cv2.CAP_FFMPEG)
+        # backend="ffmpeg" accepts width/height/fps/pix_fmt/realtime (see open_capture)
+        self.backend = backend
+        self.capture_options = capture_options
+        self.cap = open_capture(self.src, self.backend, **self.capture_options)
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         self.grabbed, self.frame = self.cap.read()
         self.started = False
@@ -54,6 +58,6 @@ class VideoCaptureThread:
         print("Attempting to reconnect...")
         self.stop()
         time.sleep(0.5)
-        self.cap = cv2.VideoCapture(self.src, cv2.CAP_FFMPEG)
+        self.cap = open_capture(self.src, self.backend, **self.capture_options)
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         self.start()
\ No newline at end of file
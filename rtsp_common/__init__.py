@@ -0,0 +1,5 @@
+# rtsp_common/__init__.py
+# Capture helpers shared by proj1, proj2 and proj3. Each project's utils
+# package puts the repo root on sys.path so this package is importable.
+from .ffmpeg_capture import FFmpegCapture, open_capture
+from .replay_reader import ReplayReader
@@ -0,0 +1,228 @@
+# rtsp_common/ffmpeg_capture.py
+import subprocess
+import threading
+import time
+import cv2
+import numpy as np
+
+# pixel format name -> (ffmpeg pix_fmt, channels)
+PIX_FMTS = {
+    "bgr": ("bgr24", 3),
+    "rgb": ("rgb24", 3),
+    "gray": ("gray", 1),
+}
+
+READ_TIMEOUT = 10.0  # seconds a frame read may block before ffmpeg is killed (no open_timeout given)
+
+def _is_network(source):
+    return isinstance(source, str) and "://" in source
+
+def probe_size(source, ffprobe_bin="ffprobe", timeout=15.0):
+    """Returns (width, height) of the first video stream, or None."""
+    cmd = [ffprobe_bin, "-v", "error"]
+    if str(source).startswith("rtsp://"):
+        cmd += ["-rtsp_transport", "tcp"]
+    cmd += ["-select_streams", "v:0", "-show_entries", "stream=width,height",
+            "-of", "csv=p=0:s=x", str(source)]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout).stdout.strip()
+        w, h = out.splitlines()[0].split("x")[:2]
+        return int(w), int(h)
+    except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+        return None
+
+class FFmpegCapture:
+    """
+    cv2.VideoCapture look-alike that runs `ffmpeg` as a subprocess and reads
+    raw frames from its stdout.
+
+    Scaling (width/height), fps decimation and pixel format are done inside
+    ffmpeg, so every frame is decoded once at the size the pipeline needs.
+    read(image) / retrieve(image) fill a caller-provided buffer in place
+    when its shape matches, so it plugs into FrameRing without extra copies:
+    grab() only waits for the next frame to start arriving, retrieve() reads
+    it off the pipe into the buffer, and a grabbed frame that was never
+    retrieved is skipped by the next grab().
+    Works with RTSP URLs and local video files; `realtime=True` makes a file
+    play at its native rate like a live camera (ffmpeg -re).
+
+    A stream that stalls without closing the pipe would block a read
+    forever, so a watchdog thread kills ffmpeg once a read has waited
+    read_timeout seconds: the read then fails like EOF and the caller
+    reconnects. Pipes cannot be select()ed on Windows, hence the thread.
+    """
+    def __init__(self, source, width=None, height=None, fps=None, pix_fmt="bgr",
+                 realtime=False, open_timeout=None, read_timeout=None, ffmpeg_bin="ffmpeg"):
+        self.source = source
+        self.proc = None
+        self.fps = fps
+        self.read_timeout = read_timeout or open_timeout or READ_TIMEOUT
+        self._read_since = None  # time.monotonic() when the blocking read in progress started
+        self.timed_out = False
+        fmt, channels = PIX_FMTS[pix_fmt]
+
+        # Output size: ask ffprobe for whatever was not given (keeps aspect ratio)
+        if width is None or height is None:
+            size = probe_size(source, ffmpeg_bin.replace("ffmpeg", "ffprobe"), open_timeout or 15.0)
+            if size is None:
+                print(f"FFmpegCapture: ❌ Could not probe {source}")
+                return
+            src_w, src_h = size
+            if width is None and height is None:
+                width, height = src_w, src_h
+            elif width is None:
+                width = int(round(src_w * height / src_h / 2)) * 2
+            else:
+                height = int(round(src_h * width / src_w / 2)) * 2
+        self.width, self.height = width, height
+        self.shape = (height, width) if channels == 1 else (height, width, channels)
+        self.frame_bytes = width * height * channels
+
+        cmd = [ffmpeg_bin, "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if _is_network(source):
+            cmd += ["-fflags", "nobuffer", "-flags", "low_delay"]
+            if source.startswith("rtsp://"):
+                cmd += ["-rtsp_transport", "tcp"]
+        elif realtime:
+            cmd += ["-re"]
+        filters = []
+        if fps:
+            filters.append(f"fps={fps}")
+        filters.append(f"scale={width}:{height}")
+        cmd += ["-i", str(source), "-an", "-sn", "-vf", ",".join(filters),
+                "-pix_fmt", fmt, "-f", "rawvideo", "pipe:1"]
+
+        try:
+            self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                         bufsize=self.frame_bytes)
+        except OSError as e:
+            print(f"FFmpegCapture: ❌ Could not start {ffmpeg_bin}: {e}")
+            self.proc = None
+            return
+
+        # grab() saw a frame start arriving that has not been read off the pipe yet
+        self._has_pending = False
+        self._skip_buf = None  # scratch for frames grabbed but never retrieved
+        threading.Thread(target=self._watchdog, args=(self.proc,),
+                         name="ffmpeg-watchdog", daemon=True).start()
+
+    def _watchdog(self, proc):
+        while proc.poll() is None:
+            since = self._read_since
+            if since is not None and time.monotonic() - since > self.read_timeout:
+                print(f"FFmpegCapture: ❌ No frame from {self.source} for {self.read_timeout:.0f}s, "
+                      f"stopping ffmpeg")
+                self.timed_out = True
+                proc.kill()
+                return
+            time.sleep(0.5)
+
+    def isOpened(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def _read_into(self, buf):
+        """Fills `buf` with exactly one frame from the pipe. False on EOF/error."""
+        view = memoryview(buf).cast("B")
+        got = 0
+        self._read_since = time.monotonic()
+        try:
+            while got < self.frame_bytes:
+                n = self.proc.stdout.readinto(view[got:])
+                if not n:
+                    return False  # EOF, or killed by the watchdog
+                got += n
+            return True
+        finally:
+            self._read_since = None
+
+    def _usable(self, image):
+        return (image is not None and image.shape == self.shape and image.dtype == np.uint8
+                and image.flags.c_contiguous and image.flags.writeable)
+
+    def _wait_frame(self):
+        """Blocks until the next frame starts arriving (without reading it). False on EOF."""
+        self._read_since = time.monotonic()
+        try:
+            return bool(self.proc.stdout.peek(1))
+        except (OSError, ValueError):
+            return False
+        finally:
+            self._read_since = None
+
+    def read(self, image=None):
+        if self.proc is None:
+            return False, None
+        self._has_pending = False
+        out = image if self._usable(image) else np.empty(self.shape, dtype=np.uint8)
+        if not self._read_into(out):
+            return False, None
+        return True, out
+
+    def grab(self):
+        """Waits for the next frame (ffmpeg has already decoded it); retrieve() reads it."""
+        if self.proc is None:
+            return False
+        if self._has_pending:
+            # The previous frame was not wanted: drop it off the pipe
+            if self._skip_buf is None:
+                self._skip_buf = np.empty(self.shape, dtype=np.uint8)
+            if not self._read_into(self._skip_buf):
+                self._has_pending = False
+                return False
+        self._has_pending = self._wait_frame()
+        return self._has_pending
+
+    def retrieve(self, image=None):
+        if self.proc is None or not self._has_pending:
+            return False, None
+        self._has_pending = False
+        out = image if self._usable(image) else np.empty(self.shape, dtype=np.uint8)
+        if not self._read_into(out):
+            return False, None
+        return True, out
+
+    def get(self, prop):
+        if self.proc is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0.0)
+        return 0.0
+
+    def set(self, prop, value):
+        # Buffer size etc. are meaningless for a pipe; accepted for compatibility
+        return False
+
+    def release(self):
+        if self.proc is None:
+            return
+        self.proc.kill()
+        try:
+            self.proc.stdout.close()
+            self.proc.wait(timeout=2.0)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.proc = None
+
+def open_capture(source, backend="opencv", width=None, height=None, fps=None,
+                 pix_fmt="bgr", realtime=False, open_timeout=None, read_timeout=None):
+    """
+    Opens a capture for `source` with the chosen backend.
+    Integer sources (local webcams) always use OpenCV; the scaling/fps/pix_fmt
+    options only apply to the "ffmpeg" backend. open_timeout (seconds) bounds
+    how long opening/reading a network stream may block; read_timeout
+    overrides the read part for the ffmpeg backend.
+    """
+    if backend == "ffmpeg" and not isinstance(source, int):
+        return FFmpegCapture(source, width=width, height=height, fps=fps, pix_fmt=pix_fmt,
+                             realtime=realtime, open_timeout=open_timeout, read_timeout=read_timeout)
+    if isinstance(source, int):
+        return cv2.VideoCapture(source)
+    if open_timeout and hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+        ms = int(open_timeout * 1000)
+        return cv2.VideoCapture(source, cv2.CAP_FFMPEG, [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, ms,
+                                                         cv2.CAP_PROP_READ_TIMEOUT_MSEC, ms])
+    return cv2.VideoCapture(source, cv2.CAP_FFMPEG)
@@ -0,0 +1,114 @@
+# rtsp_common/replay_reader.py
+import os
+import cv2
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+class ReplayReader:
+    """
+    Recorded-footage source: a video file (MP4/MKV/...) or a directory of
+    images, read frame by frame with its presentation timestamp.
+
+    grab()/retrieve() mirror cv2.VideoCapture so skipped frames are not
+    converted. `pts` is the container timestamp of the last grabbed frame
+    (image directories use index / fps) and keeps increasing across loops.
+    seek(index) is exact, so benchmark runs are repeatable.
+    """
+    def __init__(self, source, fps=None, loop=True):
+        self.source = source
+        self.loop = loop
+        self.cap = None
+        self.images = None
+        if os.path.isdir(source):
+            self.images = sorted(os.path.join(source, f) for f in os.listdir(source)
+                                 if f.lower().endswith(IMAGE_EXTS))
+            self.fps = fps or 25.0
+            self.frame_count = len(self.images)
+        else:
+            self.cap = cv2.VideoCapture(source)
+            self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+            self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        self.index = -1        # index of the last grabbed frame
+        self.pts = 0.0         # its timestamp in seconds (monotonic across loops)
+        self.loops = 0
+        self._pts_offset = 0.0
+
+    def isOpened(self):
+        if self.images is not None:
+            return len(self.images) > 0
+        return self.cap is not None and self.cap.isOpened()
+
+    def _grab_once(self):
+        if self.images is not None:
+            if self.index + 1 >= len(self.images):
+                return False
+            self.index += 1
+            self.pts = self._pts_offset + self.index / self.fps
+            return True
+        if not self.cap.grab():
+            return False
+        self.index += 1
+        msec = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        # Some containers report 0 for every frame; fall back to index / fps
+        file_pts = msec / 1000.0 if (msec > 0 or self.index == 0) else self.index / self.fps
+        self.pts = self._pts_offset + file_pts
+        return True
+
+    def grab(self):
+        """Advances to the next frame (wrapping around when looping)."""
+        if self._grab_once():
+            return True
+        if not self.loop or self.index < 0:
+            return False
+        last_pts = self.pts
+        self.seek(0)
+        self.loops += 1
+        self._pts_offset = last_pts + 1.0 / self.fps
+        return self._grab_once()
+
+    def retrieve(self, image=None):
+        if self.images is not None:
+            frame = cv2.imread(self.images[self.index])
+            return frame is not None, frame
+        if image is not None:
+            return self.cap.retrieve(image)
+        return self.cap.retrieve()
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def seek(self, index):
+        """Positions the reader so the next grab() returns frame `index`."""
+        self.index = index - 1
+        if self.images is not None:
+            return
+        # CAP_PROP_POS_FRAMES is fast but inexact for some codecs: verify it,
+        # otherwise reopen and step through the frames
+        self.cap.release()
+        self.cap = cv2.VideoCapture(self.source)
+        if index == 0:
+            return
+        if self.cap.set(cv2.CAP_PROP_POS_FRAMES, index) and int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) == index:
+            return
+        self.cap.release()
+        self.cap = cv2.VideoCapture(self.source)
+        for _ in range(index):
+            if not self.cap.grab():
+                break
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index + 1)
+        return self.cap.get(prop) if self.cap is not None else 0.0
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()